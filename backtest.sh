@@ -13,29 +13,41 @@ export LD_PRELOAD=$CONDA_PREFIX/lib/libstdc++.so.6
 
 # Default values
 STRATEGY_CLASS_NAME=""
+STRATEGIES=""
+RUN_ALL=false
 
 # Parse input arguments
 for arg in "$@"; do
     case $arg in
         --strategy_class_name=*) STRATEGY_CLASS_NAME="${arg#*=}" ;;
+        --strategies=*) STRATEGIES="${arg#*=}" ;;
+        --all) RUN_ALL=true ;;
         *) echo "Unknown argument: $arg"; exit 1 ;;
     esac
 done
 
 # Check if required parameters are provided
-if [[ -z "$STRATEGY_CLASS_NAME" ]]; then
-    echo "Error: --strategy_class_name must be provided."
+if [[ -z "$STRATEGY_CLASS_NAME" && -z "$STRATEGIES" && "$RUN_ALL" != true ]]; then
+    echo "Error: --strategy_class_name, --strategies or --all must be provided."
     echo "Available strategies: TibetanMastiffTWStrategy, PeterWuStrategy, AlanTWStrategy1, AlanTWStrategy2, AlanTWStrategyC, AlanTWStrategyE, RAndDManagementStrategy"
     exit 1
 fi
 
+if [[ "$RUN_ALL" == true ]]; then
+    BACKTEST_ARGS=(--all)
+elif [[ -n "$STRATEGIES" ]]; then
+    BACKTEST_ARGS=(--strategies "$STRATEGIES")
+else
+    BACKTEST_ARGS=(--strategy_class_name "$STRATEGY_CLASS_NAME")
+fi
+
 # Display the strategy being executed
-echo "Executing backtest for strategy: $STRATEGY_CLASS_NAME"
+echo "Executing backtest with: ${BACKTEST_ARGS[*]}"
 echo "Timestamp: $(date)"
 
 # Run the Python script
 echo "Running Python script 'backtest_executor.py'..."
-python -m jobs.backtest_executor --strategy_class_name "$STRATEGY_CLASS_NAME"
+python -m jobs.backtest_executor "${BACKTEST_ARGS[@]}"
 
 # Deactivate conda environment
 echo "Deactivating conda environment..."
@@ -0,0 +1,95 @@
+"""
+inventory_history 大量寫入效能比較
+比較逐筆 conn.execute (原本 InventoryDAO.insert_inventory_data 的寫法) 與
+dao.connection.bulk_insert (executemany 分批) 寫入 inventory_history 的耗時
+
+使用方式:
+    python -m benchmarks.bench_inventory_bulk_insert --rows 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+
+from dao.connection import get_connection, close_connections
+from dao.inventory_dao import InventoryDAO
+
+INSERT_SQL = """
+    INSERT INTO inventory_history (
+        account_id, fetch_timestamp, stock_id, stock_name, quantity, last_price, pnl, raw_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def iter_inventory(rows):
+    """產生模擬的庫存資料 (generator，不預先建立完整 list)"""
+    for i in range(rows):
+        stock_id = f"{1101 + i % 2000}"
+        yield {
+            'stock_id': stock_id,
+            'stock_name': f"股票{stock_id}",
+            'quantity': 1000 * (i % 7 + 1),
+            'last_price': 50.0 + i % 300,
+            'pnl': (i % 200 - 100) * 10.0,
+            'raw_data': {'code': stock_id, 'quantity': i % 7 + 1, 'cost': 48.5},
+        }
+
+
+def insert_row_by_row(db_path, account_id, inventory_data, fetch_timestamp):
+    """原本的寫法: 同一個交易中逐筆 execute"""
+    conn = get_connection(db_path)
+    batch_ts_str = fetch_timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        for item in inventory_data:
+            conn.execute(INSERT_SQL, (
+                account_id,
+                batch_ts_str,
+                item.get('stock_id'),
+                item.get('stock_name'),
+                item.get('quantity'),
+                item.get('last_price'),
+                item.get('pnl'),
+                json.dumps(item.get('raw_data', {})),
+            ))
+
+
+def timed(name, rows, func):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        dao = InventoryDAO(db_path=db_path)
+        fetch_timestamp = datetime.datetime(2026, 1, 2, 14, 0, 0)
+
+        start = time.perf_counter()
+        func(dao, db_path, fetch_timestamp)
+        elapsed = time.perf_counter() - start
+
+        count = get_connection(db_path).execute("SELECT COUNT(*) FROM inventory_history").fetchone()[0]
+        close_connections()
+
+    print(f"{name:<28} {elapsed:>9.3f} {rows / elapsed:>14,.0f} {count:>10}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inventory_history bulk insert")
+    parser.add_argument("--rows", type=int, default=100000, help="寫入筆數")
+    args = parser.parse_args()
+
+    print(f"寫入筆數: {args.rows}")
+    print(f"{'方法':<28} {'耗時 (s)':>9} {'rows/s':>14} {'筆數':>10}")
+
+    inventory_data = list(iter_inventory(args.rows))
+    row_time = timed("execute 逐筆", args.rows, lambda dao, db_path, ts: insert_row_by_row(
+        db_path, 1, inventory_data, ts))
+    bulk_time = timed("bulk_insert (list)", args.rows, lambda dao, db_path, ts: dao.insert_inventory_data(
+        1, inventory_data, fetch_timestamp=ts))
+    stream_time = timed("bulk_insert (generator)", args.rows, lambda dao, db_path, ts: dao.insert_inventory_data(
+        1, (item for item in inventory_data), fetch_timestamp=ts))
+
+    print(f"加速: list {row_time / bulk_time:.1f}x, generator {row_time / stream_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+top_n_mask 效能比較
+比較 strategy_class/alan_tw_strategy_*.py 原本的 df.rank(axis=1, ascending=False) <= top_n
+與 strategy_class.ranking.top_n_mask 在 (交易日 x 股票數) 寬表上的耗時
+
+使用方式:
+    python -m benchmarks.bench_top_n_mask --rows 2000 --cols 2000 --top_n 20 25 40
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from strategy_class.ranking import top_n_mask
+
+
+def make_frame(rows, cols, nan_ratio, seed=0):
+    """產生類似買賣超比例的寬表 (含 NaN 與大量 0 值的同值情況)"""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1e-3, size=(rows, cols))
+    values[rng.random(values.shape) < 0.15] = 0.0
+    values[rng.random(values.shape) < nan_ratio] = np.nan
+    index = pd.date_range('2017-01-01', periods=rows, freq='B')
+    columns = [f"{i:04d}" for i in range(cols)]
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top_n_mask vs rank(axis=1)")
+    parser.add_argument("--rows", type=int, default=2000, help="交易日數")
+    parser.add_argument("--cols", type=int, default=2000, help="股票數")
+    parser.add_argument("--nan_ratio", type=float, default=0.1, help="NaN 比例")
+    parser.add_argument("--top_n", type=int, nargs="+", default=[20, 25, 40])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols, args.nan_ratio)
+    print(f"資料大小: {df.shape[0]} x {df.shape[1]}, NaN 比例 {args.nan_ratio:.0%}")
+    print(f"{'top_n':>6} {'rank<=n (s)':>12} {'top_n_mask (s)':>15} {'加速':>8} {'一致':>6}")
+
+    for top_n in args.top_n:
+        rank_time, expected = best_of(lambda: df.rank(axis=1, ascending=False) <= top_n, args.repeat)
+        mask_time, result = best_of(lambda: top_n_mask(df, top_n), args.repeat)
+        print(f"{top_n:>6} {rank_time:>12.3f} {mask_time:>15.3f} {rank_time / mask_time:>7.1f}x {str(expected.equals(result)):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,18 @@
-import sqlite3
 import logging
+from dao.connection import get_connection, ensure_schema
+from dao.data_version import ensure_data_versions, bump_data_version
 
 logger = logging.getLogger(__name__)
 
 class AccountDAO:
     def __init__(self, db_path="data_prod.db"):
         self.db_path = db_path
-        self._create_table()
+        ensure_schema(self.db_path, "account", self._create_table)
+        ensure_data_versions(self.db_path)
     
-    def _create_table(self):
+    def _create_table(self, conn):
         """建立 account 資料表，包含 account_id (PK)user_name 與建立時間"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS account (
                 account_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 account_name TEXT UNIQUE,
@@ -21,8 +21,6 @@ class AccountDAO:
                 created_timestamp TEXT DEFAULT (datetime('now','localtime'))
             );
         """)
-        conn.commit()
-        conn.close()
     
     def get_account_id(self, account_name, broker_name, user_name):
         """
@@ -36,33 +34,32 @@ class AccountDAO:
         Returns:
             int: 資料表 account 的主鍵 account_id。
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT account_id FROM account WHERE account_name = ?", (account_name,))
-        row = cursor.fetchone()
+        conn = get_connection(self.db_path)
+        row = conn.execute("SELECT account_id FROM account WHERE account_name = ?", (account_name,)).fetchone()
         if row:
             account_id = row[0]
             logger.info(f"Found existing account_id: {account_id}")
         else:
-            cursor.execute("""
-                INSERT INTO account (account_name, broker_name, user_name)
-                VALUES (?, ?, ?)
-            """, (account_name, broker_name, user_name))
-            conn.commit()
-            account_id = cursor.lastrowid
+            with conn:
+                # INSERT OR IGNORE: 多個行程同時建立同一帳戶時不會因 UNIQUE 衝突失敗
+                conn.execute("""
+                    INSERT OR IGNORE INTO account (account_name, broker_name, user_name)
+                    VALUES (?, ?, ?)
+                """, (account_name, broker_name, user_name))
+                bump_data_version(conn, "account")
+            account_id = conn.execute(
+                "SELECT account_id FROM account WHERE account_name = ?", (account_name,)
+            ).fetchone()[0]
             logger.info(f"Created new account_id: {account_id}")
-        conn.close()
         return account_id
     
     def get_all_accounts(self):
         """
         取得所有帳戶資料，回傳一個列表，每個項目為 dict，包含 account_id, account_name, broker_name, user_name, created_timestamp。
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT account_id, account_name, broker_name, user_name, created_timestamp FROM account")
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        conn.close()
-        accounts = [dict(zip(columns, row)) for row in rows]
+        conn = get_connection(self.db_path)
+        rows = conn.execute(
+            "SELECT account_id, account_name, broker_name, user_name, created_timestamp FROM account"
+        ).fetchall()
+        accounts = [dict(row) for row in rows]
         return accounts
\ No newline at end of file
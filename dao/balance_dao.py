@@ -1,7 +1,9 @@
-import sqlite3
 import logging
 import datetime
 from dao.account_dao import AccountDAO
+from dao.connection import get_connection, ensure_schema
+from dao.data_version import ensure_data_versions, bump_data_version
+from dao.schema import apply_migrations
 
 logger = logging.getLogger(__name__)
 
@@ -9,13 +11,12 @@ class BalanceDAO:
     def __init__(self, db_path="data_prod.db"):
         self.db_path = db_path
         self.account_dao = AccountDAO(db_path)
-        self._create_table()
+        ensure_schema(self.db_path, "balance_history", self._create_table)
+        ensure_data_versions(self.db_path)
     
-    def _create_table(self):
+    def _create_table(self, conn):
         """建立 balance_history 資料表，記錄帳戶餘額資訊"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS balance_history (
                 balance_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 account_id INTEGER,
@@ -29,8 +30,29 @@ class BalanceDAO:
                 FOREIGN KEY (account_id) REFERENCES account (account_id)
             );
         """)
-        conn.commit()
-        conn.close()
+        # 由 insert_balance 同步維護的彙總表: 每日收盤 (當日最後一筆) 與每月首末筆總資產
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_balance_close (
+                account_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                total_assets REAL,
+                fetch_timestamp TEXT NOT NULL,
+                PRIMARY KEY (account_id, date)
+            );
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS monthly_returns (
+                account_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                start_assets REAL,
+                start_timestamp TEXT NOT NULL,
+                end_assets REAL,
+                end_timestamp TEXT NOT NULL,
+                n_records INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (account_id, month)
+            );
+        """)
+        apply_migrations(conn, "balance_history")
     
     def get_account_id(self, account_name, broker_name, user_name):
         """
@@ -63,32 +85,59 @@ class BalanceDAO:
             
         batch_ts_str = fetch_timestamp.strftime("%Y-%m-%d %H:%M:%S")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = get_connection(self.db_path)
         
-        cursor.execute("""
-            INSERT INTO balance_history (
-                account_id, bank_balance, settlements, adjusted_bank_balance, 
-                market_value, total_assets, fetch_timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            account_id,
-            balance_data['bank_balance'],
-            balance_data['settlements'],
-            balance_data['adjusted_bank_balance'],
-            balance_data['market_value'],
-            balance_data['total_assets'],
-            batch_ts_str
-        ))
-        
-        conn.commit()
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO balance_history (
+                    account_id, bank_balance, settlements, adjusted_bank_balance, 
+                    market_value, total_assets, fetch_timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                account_id,
+                balance_data['bank_balance'],
+                balance_data['settlements'],
+                balance_data['adjusted_bank_balance'],
+                balance_data['market_value'],
+                balance_data['total_assets'],
+                batch_ts_str
+            ))
+            self._update_summaries(conn, account_id, balance_data['total_assets'], batch_ts_str)
+            bump_data_version(conn, "balance_history")
         balance_id = cursor.lastrowid
-        conn.close()
         
         logger.info(f"Inserted balance record with ID {balance_id} for account {account_id}")
         return balance_id
     
         
+    def _update_summaries(self, conn, account_id, total_assets, batch_ts_str):
+        """
+        更新 daily_balance_close 與 monthly_returns (需在寫入 balance_history 的同一個交易中呼叫)
+        資料可能不依時間順序寫入，因此以時間戳記比較決定是否取代首筆/末筆
+        """
+        conn.execute("""
+            INSERT INTO daily_balance_close (account_id, date, total_assets, fetch_timestamp)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(account_id, date) DO UPDATE SET
+                total_assets = CASE WHEN excluded.fetch_timestamp >= fetch_timestamp
+                                    THEN excluded.total_assets ELSE total_assets END,
+                fetch_timestamp = MAX(fetch_timestamp, excluded.fetch_timestamp)
+        """, (account_id, batch_ts_str[:10], total_assets, batch_ts_str))
+
+        conn.execute("""
+            INSERT INTO monthly_returns (
+                account_id, month, start_assets, start_timestamp, end_assets, end_timestamp, n_records
+            ) VALUES (?, ?, ?, ?, ?, ?, 1)
+            ON CONFLICT(account_id, month) DO UPDATE SET
+                start_assets = CASE WHEN excluded.start_timestamp < start_timestamp
+                                    THEN excluded.start_assets ELSE start_assets END,
+                start_timestamp = MIN(start_timestamp, excluded.start_timestamp),
+                end_assets = CASE WHEN excluded.end_timestamp >= end_timestamp
+                                  THEN excluded.end_assets ELSE end_assets END,
+                end_timestamp = MAX(end_timestamp, excluded.end_timestamp),
+                n_records = n_records + 1
+        """, (account_id, batch_ts_str[:7], total_assets, batch_ts_str, total_assets, batch_ts_str))
+
     def get_balance_history(self, account_id, start_date, end_date):
         """
         獲取指定日期範圍內的帳戶餘額歷史記錄
@@ -101,8 +150,7 @@ class BalanceDAO:
         Returns:
             list: 餘額歷史記錄列表
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 使結果以字典形式返回
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 轉換日期格式
@@ -126,7 +174,6 @@ class BalanceDAO:
         results = cursor.fetchall()
         balance_history = [dict(row) for row in results]
         
-        conn.close()
         return balance_history
 
     def get_latest_balance(self, account_id):
@@ -139,8 +186,7 @@ class BalanceDAO:
         Returns:
             dict: 最新餘額記錄，如果沒有則返回None
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -160,12 +206,12 @@ class BalanceDAO:
         result = cursor.fetchone()
         latest_balance = dict(result) if result else None
         
-        conn.close()
         return latest_balance
 
     def get_monthly_balance_data(self, account_id, start_year, end_year):
         """
         獲取每月首日和末日的餘額資料，用於計算月度報酬率
+        讀取 insert_balance 時維護的 monthly_returns，不再掃描 balance_history
         
         Args:
             account_id (int): 帳戶ID
@@ -174,68 +220,44 @@ class BalanceDAO:
             
         Returns:
             dict: 包含每月首日和末日餘額的字典，格式為 {年份: {月份: {"start": 值, "end": 值}}}
+                  當月只有一筆記錄時只有 "start"
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 獲取每個月的第一天和最後一天的資料
-        query = """
-        WITH monthly_data AS (
-            -- 為每條記錄添加月份信息
-            SELECT 
-                strftime('%Y', fetch_timestamp) as year,
-                strftime('%m', fetch_timestamp) as month,
-                total_assets,
-                fetch_timestamp,
-                -- 在每個月中的排序 (1表示最早，-1表示最晚)
-                ROW_NUMBER() OVER (
-                    PARTITION BY strftime('%Y-%m', fetch_timestamp) 
-                    ORDER BY fetch_timestamp ASC
-                ) as month_start_rank,
-                ROW_NUMBER() OVER (
-                    PARTITION BY strftime('%Y-%m', fetch_timestamp) 
-                    ORDER BY fetch_timestamp DESC
-                ) as month_end_rank
-            FROM 
-                balance_history
-            WHERE 
-                account_id = ? AND
-                strftime('%Y', fetch_timestamp) BETWEEN ? AND ?
-        )
-        -- 選取每個月的第一條和最後一條記錄
-        SELECT 
-            year, month, total_assets, fetch_timestamp,
-            CASE 
-                WHEN month_start_rank = 1 THEN 'start'
-                WHEN month_end_rank = 1 THEN 'end'
-            END as position
-        FROM 
-            monthly_data
-        WHERE 
-            month_start_rank = 1 OR month_end_rank = 1
-        ORDER BY 
-            year, month, position
-        """
-        
-        cursor.execute(query, (account_id, str(start_year), str(end_year)))
-        results = cursor.fetchall()
+        conn = get_connection(self.db_path)
+        rows = conn.execute("""
+            SELECT month, start_assets, end_assets, n_records
+            FROM monthly_returns
+            WHERE account_id = ? AND month >= ? AND month <= ?
+            ORDER BY month
+        """, (account_id, f"{int(start_year)}-01", f"{int(end_year)}-12")).fetchall()
         
         # 整理數據為所需格式
         monthly_data = {}
-        for row in results:
-            year = row['year']
-            month = row['month']
-            position = row['position']
-            total_assets = row['total_assets']
-            
-            if year not in monthly_data:
-                monthly_data[year] = {}
-            
-            if month not in monthly_data[year]:
-                monthly_data[year][month] = {}
-            
-            monthly_data[year][month][position] = total_assets
+        for row in rows:
+            year, month = row['month'][:4], row['month'][5:7]
+            month_data = monthly_data.setdefault(year, {}).setdefault(month, {})
+            month_data['start'] = row['start_assets']
+            if row['n_records'] >= 2:
+                month_data['end'] = row['end_assets']
+        
+        return monthly_data
+
+    def get_daily_close(self, account_id, start_date, end_date):
+        """
+        獲取指定日期範圍內每日最後一筆的總資產
         
-        conn.close()
-        return monthly_data
\ No newline at end of file
+        Args:
+            account_id (int): 帳戶ID
+            start_date (datetime.date): 開始日期
+            end_date (datetime.date): 結束日期
+            
+        Returns:
+            list: [{'date': 'YYYY-MM-DD', 'total_assets': 值, 'fetch_timestamp': 時間}]
+        """
+        conn = get_connection(self.db_path)
+        rows = conn.execute("""
+            SELECT date, total_assets, fetch_timestamp
+            FROM daily_balance_close
+            WHERE account_id = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+        """, (account_id, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,136 @@
+"""
+SQLite 連線管理
+原本每個 DAO 方法都會 sqlite3.connect() 再 close()，每個 DAO 建構時也會重跑
+CREATE TABLE。此模組改為:
+
+- 每個 thread 對每個資料庫保留一條共用連線 (sqlite3 連線不可跨 thread 使用)
+- 建立連線時設定 pragma: WAL、synchronous=NORMAL、mmap_size、busy_timeout
+- 資料表建立 (ensure_schema) 每個行程只執行一次
+- 連線的 row_factory 為 sqlite3.Row，可用 row['欄位'] 或 row[0] 取值
+
+寫入請使用 `with conn:`，成功時 commit、例外時 rollback，避免共用連線殘留未結束的交易。
+大量寫入使用 bulk_insert (executemany 分批執行，輸入可為 generator)。
+
+環境變數 SQLITE_JOURNAL_MODE 可覆寫 journal mode (預設 WAL)。WAL 需要 -wal / -shm 檔案
+與資料庫位於同一目錄且所有行程都看得到；資料庫以單一檔案掛載給多個容器時應改用 DELETE。
+
+使用方式:
+    conn = get_connection("data_prod.db")
+    ensure_schema("data_prod.db", "account", create_account_table)
+    with conn:
+        conn.execute("INSERT INTO ...", params)
+"""
+import os
+import sqlite3
+import threading
+import logging
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 10000
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+BULK_CHUNK_SIZE = 5000
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized_schemas = set()
+
+
+def _connection_key(db_path):
+    if db_path == ":memory:":
+        return db_path
+    return os.path.abspath(db_path)
+
+
+def _journal_mode():
+    return os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+
+
+def _configure(conn):
+    journal_mode = _journal_mode()
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    # WAL 模式下 NORMAL 仍可確保資料庫不會損毀；rollback journal 維持 FULL
+    conn.execute(f"PRAGMA synchronous={'NORMAL' if journal_mode == 'WAL' else 'FULL'}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def get_connection(db_path="data_prod.db") -> sqlite3.Connection:
+    """取得目前 thread 對 db_path 的共用連線 (第一次使用時建立並設定 pragma)"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    key = _connection_key(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        _configure(conn)
+        connections[key] = conn
+    return conn
+
+
+def ensure_schema(db_path, name, create):
+    """
+    每個行程對同一個資料庫只執行一次 create(conn)
+
+    Args:
+        db_path: 資料庫路徑
+        name: schema 名稱 (通常為資料表名稱)
+        create: 建立資料表的函式，接收 sqlite3.Connection
+    """
+    conn = get_connection(db_path)
+    # :memory: 資料庫每條連線各自獨立，需以連線區分
+    key = (_connection_key(db_path) if db_path != ":memory:" else id(conn), name)
+    if key in _initialized_schemas:
+        return
+
+    with _schema_lock:
+        if key in _initialized_schemas:
+            return
+        with conn:
+            create(conn)
+        _initialized_schemas.add(key)
+
+
+def iter_chunks(iterable, size=BULK_CHUNK_SIZE):
+    """將 iterable 依 size 分批 (不會一次展開整個 iterable)"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(conn, sql, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    以 executemany 分批寫入
+
+    不會自行 commit，呼叫端應在 `with conn:` 中使用，讓整批資料在同一個交易中寫入。
+
+    Args:
+        conn: sqlite3.Connection
+        sql: 含 ? 參數的 INSERT 語句
+        rows: 參數 tuple 的 iterable (可為 generator，大量資料時不必先建立完整 list)
+        chunk_size: 每次 executemany 的筆數
+
+    Returns:
+        int: 寫入筆數
+    """
+    count = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        conn.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def close_connections():
+    """關閉目前 thread 的所有共用連線"""
+    connections = getattr(_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
@@ -0,0 +1,41 @@
+"""
+資料表版本計數器
+每次寫入資料表時在同一個交易中遞增 data_versions 的版本號，讀取端可用版本號判斷行程內的
+快取是否過期 (其他行程寫入也看得到，不需要共享記憶體)。
+
+只有透過 DAO 寫入才會遞增版本；直接以 SQLite 工具修改資料表時快取不會失效。
+"""
+from dao.connection import get_connection, ensure_schema
+
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_timestamp TEXT DEFAULT (datetime('now','localtime'))
+        );
+    """)
+
+
+def ensure_data_versions(db_path):
+    ensure_schema(db_path, "data_versions", _create_table)
+
+
+def bump_data_version(conn, *tables):
+    """遞增 tables 的版本號 (需在寫入資料的同一個交易中呼叫)"""
+    conn.executemany("""
+        INSERT INTO data_versions (table_name, version) VALUES (?, 1)
+        ON CONFLICT(table_name) DO UPDATE SET
+            version = version + 1,
+            updated_timestamp = datetime('now','localtime')
+    """, [(table,) for table in tables])
+
+
+def get_data_version(db_path, table):
+    """取得 table 目前的版本號 (從未寫入過為 0)"""
+    ensure_data_versions(db_path)
+    row = get_connection(db_path).execute(
+        "SELECT version FROM data_versions WHERE table_name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else 0
@@ -1,20 +1,31 @@
-import sqlite3
 import logging
 import json
 from datetime import datetime
+from dao.connection import get_connection, ensure_schema, bulk_insert
+from dao.data_version import ensure_data_versions, bump_data_version
+from dao.paging import build_where, build_order_by, normalize_page
+from dao.schema import apply_migrations
 
 logger = logging.getLogger(__name__)
 
+# 庫存歷史表格可排序 / 篩選的欄位 (DataTable 欄位 id: SQL 欄位)
+INVENTORY_TABLE_COLUMNS = {
+    'stock_id': 'stock_id',
+    'stock_name': 'stock_name',
+    'quantity': 'quantity',
+    'last_price': 'last_price',
+    'pnl': 'pnl',
+}
+
 class InventoryDAO:
     def __init__(self, db_path="data_prod.db"):
         self.db_path = db_path
-        self._create_table()
+        ensure_schema(self.db_path, "inventory_history", self._create_table)
+        ensure_data_versions(self.db_path)
     
-    def _create_table(self):
+    def _create_table(self, conn):
         """建立 inventory_history 資料表，記錄庫存資料並以 account_id 作為外鍵"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS inventory_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 account_id INTEGER,
@@ -29,8 +40,7 @@ class InventoryDAO:
                 FOREIGN KEY (account_id) REFERENCES account(account_id)
             );
         """)
-        conn.commit()
-        conn.close()
+        apply_migrations(conn, "inventory_history")
     
     def insert_inventory_data(self, account_id, inventory_data, fetch_timestamp=None):
         """
@@ -38,24 +48,38 @@ class InventoryDAO:
         
         Args:
             account_id (int): 對應 Account 資料表的 account_id。
-            inventory_data (list[dict]): 庫存資料，每筆需包含 'stock_id', 'stock_name', 
+            inventory_data (Iterable[dict]): 庫存資料 (可為 generator)，每筆需包含 'stock_id', 'stock_name', 
                 'quantity', 'last_price', 'pnl', 以及原始資料('raw_data')
             fetch_timestamp (str, optional): 資料擷取時間戳記，若未提供則使用當前時間
+
+        Returns:
+            int: 寫入筆數
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # 使用提供的擷取時間戳記或當前時間
         if fetch_timestamp is None:
             raise ValueError("fetch_timestamp cannot be None")
         batch_ts_str = fetch_timestamp.strftime("%Y-%m-%d %H:%M:%S")
         
-        # 寫入新資料 (不刪除舊資料，以保留歷史記錄)
-        for item in inventory_data:
-            # 將原始資料轉為 JSON 字串儲存
-            raw_data_json = json.dumps(item.get('raw_data', {}))
-            
-            cursor.execute("""
+        rows = (
+            (
+                account_id,
+                batch_ts_str,
+                item.get('stock_id'),
+                item.get('stock_name'),
+                item.get('quantity'),
+                item.get('last_price'),
+                item.get('pnl'),
+                # 將原始資料轉為 JSON 字串儲存
+                json.dumps(item.get('raw_data', {}))
+            )
+            for item in inventory_data
+        )
+
+        conn = get_connection(self.db_path)
+
+        # 寫入新資料 (不刪除舊資料，以保留歷史記錄)，同一批次在同一個交易中以 executemany 寫入
+        with conn:
+            count = bulk_insert(conn, """
                 INSERT INTO inventory_history (
                     account_id,
                     fetch_timestamp,
@@ -66,20 +90,11 @@ class InventoryDAO:
                     pnl,
                     raw_data
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                account_id,
-                batch_ts_str,
-                item.get('stock_id'),
-                item.get('stock_name'),
-                item.get('quantity'),
-                item.get('last_price'),
-                item.get('pnl'),
-                raw_data_json
-            ))
+            """, rows)
+            bump_data_version(conn, "inventory_history")
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Inserted {len(inventory_data)} inventory_history records for account_id {account_id}")
+        logger.info(f"Inserted {count} inventory_history records for account_id {account_id}")
+        return count
 
 
     def get_inventories_by_account_and_date(self, account_id, query_date):
@@ -93,8 +108,7 @@ class InventoryDAO:
         Returns:
             list: 包含庫存記錄的列表
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 使結果以字典形式返回
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 將日期轉換為開始和結束時間範圍
@@ -124,5 +138,47 @@ class InventoryDAO:
             
             inventories.append(inventory)
         
-        conn.close()
-        return inventories
\ No newline at end of file
+        return inventories
+
+    def get_latest_inventories_page(self, account_id, query_date, page_current=0, page_size=10, sort_by=(), filter_query=None):
+        """
+        分頁查詢帳戶當天最後一次擷取的庫存 (同一天多次擷取時只取最新的一批)
+        
+        Args:
+            account_id (int): 帳戶ID
+            query_date (datetime.date): 查詢日期
+            page_current (int): 頁碼 (從 0 開始)
+            page_size (int): 每頁筆數
+            sort_by: [(欄位, 'asc' | 'desc'), ...]
+            filter_query (str): DataTable filter_query
+            
+        Returns:
+            tuple: (當頁庫存列表, 符合條件的總筆數)
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        date_str = query_date.strftime("%Y-%m-%d")
+        conn = get_connection(self.db_path)
+        
+        # 以 (account_id, fetch_timestamp) 索引取得當天最後一次擷取的時間
+        latest = conn.execute("""
+            SELECT MAX(fetch_timestamp) FROM inventory_history
+            WHERE account_id = ? AND fetch_timestamp BETWEEN ? AND ?
+        """, (account_id, f"{date_str} 00:00:00", f"{date_str} 23:59:59")).fetchone()[0]
+        if latest is None:
+            return [], 0
+        
+        filters, filter_params = build_where(filter_query, INVENTORY_TABLE_COLUMNS)
+        where = " AND ".join(["account_id = ?", "fetch_timestamp = ?"] + filters)
+        params = [account_id, latest] + filter_params
+        order_by = build_order_by(sort_by, INVENTORY_TABLE_COLUMNS, default="id ASC")
+        
+        total = conn.execute(f"SELECT COUNT(*) FROM inventory_history WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT {", ".join(INVENTORY_TABLE_COLUMNS.values())}
+            FROM inventory_history
+            WHERE {where}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """, params + [page_size, page_current * page_size]).fetchall()
+        
+        return [dict(row) for row in rows], total
@@ -1,18 +1,33 @@
-import sqlite3
 import logging
+from dao.connection import get_connection, ensure_schema, bulk_insert
+from dao.data_version import ensure_data_versions, bump_data_version
+from dao.paging import build_where, build_order_by, normalize_page
+from dao.schema import apply_migrations
 
 logger = logging.getLogger(__name__)
 
+# 訂單歷史表格可排序 / 篩選的欄位 (DataTable 欄位 id: SQL 欄位)
+ORDER_TABLE_COLUMNS = {
+    'order_timestamp': 'order_timestamp',
+    'action': 'action',
+    'stock_id': 'stock_id',
+    'stock_name': 'stock_name',
+    'quantity': 'quantity',
+    'limit_price': 'limit_price',
+    'extra_bid_pct': 'extra_bid_pct',
+    'order_condition': 'order_condition',
+    'view_only': 'view_only',
+}
+
 class OrderDAO:
     def __init__(self, db_path="data_prod.db"):
         self.db_path = db_path
-        self._create_table()
+        ensure_schema(self.db_path, "order_history", self._create_table)
+        ensure_data_versions(self.db_path)
     
-    def _create_table(self):
+    def _create_table(self, conn):
         """建立 order_history 資料表，記錄下單紀錄並以 account_id 作為外鍵"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS order_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 account_id INTEGER,
@@ -29,29 +44,45 @@ class OrderDAO:
                 FOREIGN KEY (account_id) REFERENCES account(account_id)
             );
         """)
-        conn.commit()
-        conn.close()
+        apply_migrations(conn, "order_history")
     
     def insert_order_logs(self, order_logs, account_id, order_timestamp, view_only=False):
         """
         將下單記錄寫入 order_history 表。
         
         Args:
-            order_logs (list[dict]): 每筆訂單資料，包含 'action', 'stock_id', 'stock_name', 
+            order_logs (Iterable[dict]): 每筆訂單資料 (可為 generator)，包含 'action', 'stock_id', 'stock_name', 
                 'quantity', 'limit_price', 'extra_bid_pct', 'order_condition'
             account_id (int): 對應 Account 資料表的 account_id。
             order_timestamp (datetime.datetime): 批次時間，用於標記這次下單作業。
             view_only (bool): 是否為模擬下單 (True) 或實際下單 (False)
+
+        Returns:
+            int: 寫入筆數
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         if order_timestamp is None:
             raise ValueError("order_timestamp cannot be None")
         # 將批次時間轉為字串格式儲存 (ISO 格式)
         batch_ts_str = order_timestamp.strftime("%Y-%m-%d %H:%M:%S")
         view_only_int = 1 if view_only else 0  # 轉換布爾值為整數
-        for order in order_logs:
-            cursor.execute("""
+        rows = (
+            (
+                account_id,
+                batch_ts_str,
+                order.get("action"),
+                order.get("stock_id"),
+                order.get("stock_name"),
+                order.get("quantity"),
+                order.get("limit_price"),
+                order.get("extra_bid_pct"),
+                order.get("order_condition"),
+                view_only_int
+            )
+            for order in order_logs
+        )
+        conn = get_connection(self.db_path)
+        with conn:
+            count = bulk_insert(conn, """
                 INSERT INTO order_history (
                     account_id,
                     order_timestamp,
@@ -64,21 +95,10 @@ class OrderDAO:
                     order_condition,
                     view_only
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                account_id,
-                batch_ts_str,
-                order.get("action"),
-                order.get("stock_id"),
-                order.get("stock_name"),
-                order.get("quantity"),
-                order.get("limit_price"),
-                order.get("extra_bid_pct"),
-                order.get("order_condition"),
-                view_only_int
-            ))
-        conn.commit()
-        conn.close()
-        logger.info(f"Inserted {len(order_logs)} order logs into order_history")
+            """, rows)
+            bump_data_version(conn, "order_history")
+        logger.info(f"Inserted {count} order logs into order_history")
+        return count
 
 
     def get_orders_by_account_and_date(self, account_id, query_date):
@@ -86,8 +106,7 @@ class OrderDAO:
         根據 account_id 與 query_date 撈取當天的訂單資料。
         query_date 為 datetime.date 物件
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 使結果以字典形式返回
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 將日期轉換為開始和結束時間範圍
@@ -107,49 +126,102 @@ class OrderDAO:
         # 將結果轉換為列表
         orders = [dict(row) for row in results]
         
-        conn.close()
         return orders
     
+    def get_orders_page(self, account_id, query_date, page_current=0, page_size=10, sort_by=(), filter_query=None):
+        """
+        分頁查詢指定帳戶當天的訂單 (供 DataTable 伺服器端分頁使用)
+        
+        Args:
+            account_id (int): 帳戶ID
+            query_date (datetime.date): 查詢日期
+            page_current (int): 頁碼 (從 0 開始)
+            page_size (int): 每頁筆數
+            sort_by: [(欄位, 'asc' | 'desc'), ...]
+            filter_query (str): DataTable filter_query
+            
+        Returns:
+            tuple: (當頁訂單列表, 符合條件的總筆數)
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        date_str = query_date.strftime("%Y-%m-%d")
+        filters, filter_params = build_where(filter_query, ORDER_TABLE_COLUMNS)
+        where = " AND ".join(["account_id = ?", "order_timestamp BETWEEN ? AND ?"] + filters)
+        params = [account_id, f"{date_str} 00:00:00", f"{date_str} 23:59:59"] + filter_params
+        order_by = build_order_by(sort_by, ORDER_TABLE_COLUMNS, default="id ASC")
+        
+        conn = get_connection(self.db_path)
+        total = conn.execute(f"SELECT COUNT(*) FROM order_history WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT {", ".join(ORDER_TABLE_COLUMNS.values())}
+            FROM order_history
+            WHERE {where}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """, params + [page_size, page_current * page_size]).fetchall()
+        
+        return [dict(row) for row in rows], total
+    
     def get_available_years(self, account_id):
         """取得指定帳戶所有可用的年份"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
+        # 以 (account_id, order_date) 索引逐年跳躍查詢 MAX，耗時只與年份數有關，不隨筆數增加
         cursor.execute("""
-            SELECT DISTINCT strftime('%Y', order_timestamp) as year
-            FROM order_history
-            WHERE account_id = ?
-            ORDER BY year DESC
-        """, (account_id,))
+            WITH RECURSIVE years(year) AS (
+                SELECT substr(MAX(order_date), 1, 4)
+                FROM order_history
+                WHERE account_id = ?
+                UNION ALL
+                SELECT (
+                    SELECT substr(MAX(order_date), 1, 4)
+                    FROM order_history
+                    WHERE account_id = ? AND order_date < years.year
+                )
+                FROM years
+                WHERE years.year IS NOT NULL
+            )
+            SELECT year FROM years WHERE year IS NOT NULL
+        """, (account_id, account_id))
         years = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return years
 
     def get_available_months(self, account_id, year):
         """取得指定帳戶和年份所有可用的月份"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
+        year_start = f"{year}-01-01"
         cursor.execute("""
-            SELECT DISTINCT strftime('%m', order_timestamp) as month
-            FROM order_history
-            WHERE account_id = ? AND strftime('%Y', order_timestamp) = ?
-            ORDER BY month DESC
-        """, (account_id, year))
+            WITH RECURSIVE months(month) AS (
+                SELECT substr(MAX(order_date), 6, 2)
+                FROM order_history
+                WHERE account_id = ? AND order_date >= ? AND order_date < ?
+                UNION ALL
+                SELECT (
+                    SELECT substr(MAX(order_date), 6, 2)
+                    FROM order_history
+                    WHERE account_id = ? AND order_date >= ? AND order_date < ? || '-' || months.month
+                )
+                FROM months
+                WHERE months.month IS NOT NULL
+            )
+            SELECT month FROM months WHERE month IS NOT NULL
+        """, (account_id, year_start, f"{int(year) + 1}-01-01", account_id, year_start, year))
         months = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return months
 
     def get_available_days(self, account_id, year, month):
         """取得指定帳戶、年份和月份所有可用的日期"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
+        month_prefix = f"{year}-{month}"
         cursor.execute("""
-            SELECT DISTINCT strftime('%d', order_timestamp) as day
+            SELECT DISTINCT substr(order_date, 9, 2) as day
             FROM order_history
             WHERE account_id = ? 
-            AND strftime('%Y', order_timestamp) = ? 
-            AND strftime('%m', order_timestamp) = ?
+            AND order_date >= ? || '-01'
+            AND order_date <= ? || '-31'
             ORDER BY day DESC
-        """, (account_id, year, month))
+        """, (account_id, month_prefix, month_prefix))
         days = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return days
\ No newline at end of file
+        return days
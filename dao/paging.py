@@ -0,0 +1,124 @@
+"""
+Dash DataTable 伺服器端分頁 / 排序 / 篩選的 SQL 組合工具
+DataTable 設定 page_action / sort_action / filter_action='custom' 時，只把目前頁面需要的資料
+查詢出來，排序與篩選也交給 SQLite 處理。
+
+欄位名稱只允許白名單中的欄位 (會直接組進 SQL)，值一律以參數傳遞。
+
+filter_query 支援 DataTable 產生的語法，以 && 連接多個條件:
+    {stock_id} contains 23 && {quantity} >= 2 && {action} = "BUY"
+運算子: = eq != ne < lt <= le > gt >= ge contains datestartswith
+(前綴 s / i 代表區分 / 不區分大小寫，例如 icontains、s=)
+"""
+import math
+import re
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 200
+
+_OPERATORS = {
+    '=': '=', 'eq': '=',
+    '!=': '!=', 'ne': '!=',
+    '<': '<', 'lt': '<',
+    '<=': '<=', 'le': '<=',
+    '>': '>', 'gt': '>',
+    '>=': '>=', 'ge': '>=',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+
+_EXPRESSION = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+(?P<operator>[si]?(?:contains|datestartswith|eq|ne|lt|le|gt|ge|!=|<=|>=|=|<|>))\s*(?P<value>.*)$"
+)
+
+
+def _parse_value(raw):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "\"'`":
+        return raw[1:-1]
+    if re.fullmatch(r"[+-]?\d+", raw):
+        return int(raw)
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def build_where(filter_query, columns):
+    """
+    將 DataTable 的 filter_query 轉為 SQL 條件
+
+    Args:
+        filter_query (str): DataTable filter_query，空字串或 None 表示不篩選
+        columns (dict): {DataTable 欄位 id: SQL 欄位}
+
+    Returns:
+        tuple: (SQL 條件列表, 參數列表)
+
+    Raises:
+        ValueError: 無法解析的條件或不在白名單中的欄位
+    """
+    clauses, params = [], []
+    if not filter_query:
+        return clauses, params
+
+    for expression in filter_query.split(' && '):
+        match = _EXPRESSION.match(expression.strip())
+        if not match:
+            raise ValueError(f"無法解析的篩選條件: {expression}")
+
+        column = match.group('column')
+        if column not in columns:
+            raise ValueError(f"不支援篩選的欄位: {column}")
+        sql_column = columns[column]
+
+        operator = match.group('operator')
+        case_insensitive = operator[0] == 'i' and operator[1:] in _OPERATORS
+        if operator[0] in 'si' and operator[1:] in _OPERATORS:
+            operator = operator[1:]
+        operator = _OPERATORS[operator]
+        value = _parse_value(match.group('value'))
+
+        if operator in ('contains', 'datestartswith'):
+            clauses.append(f"{sql_column} LIKE ? ESCAPE '\\'")
+            escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%" if operator == 'contains' else f"{escaped}%")
+        else:
+            collate = " COLLATE NOCASE" if case_insensitive and isinstance(value, str) else ""
+            clauses.append(f"{sql_column} {operator} ?{collate}")
+            params.append(value)
+
+    return clauses, params
+
+
+def build_order_by(sort_by, columns, default):
+    """
+    將排序設定轉為 ORDER BY 子句內容
+
+    Args:
+        sort_by: [(DataTable 欄位 id, 'asc' | 'desc'), ...]
+        columns (dict): {DataTable 欄位 id: SQL 欄位}
+        default (str): 沒有排序設定時使用的 ORDER BY 內容 (亦作為最後的排序依據，讓分頁結果穩定)
+
+    Raises:
+        ValueError: 不在白名單中的欄位
+    """
+    terms = []
+    for column, direction in sort_by or ():
+        if column not in columns:
+            raise ValueError(f"不支援排序的欄位: {column}")
+        terms.append(f"{columns[column]} {'DESC' if direction == 'desc' else 'ASC'}")
+    terms.append(default)
+    return ", ".join(terms)
+
+
+def normalize_page(page_current, page_size):
+    """回傳合法的 (page_current, page_size)"""
+    page_size = min(max(int(page_size or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    page_current = max(int(page_current or 0), 0)
+    return page_current, page_size
+
+
+def page_count(total, page_size):
+    """總頁數 (至少 1 頁)"""
+    return max(1, math.ceil(total / page_size))
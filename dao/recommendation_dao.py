@@ -3,12 +3,29 @@ Data Access Object (DAO) for stock recommendations.
 Handles storage and retrieval of stock recommendation data using SQLite database.
 """
 
-import sqlite3
 import logging
-from typing import List, Dict, Optional
+import os
+import threading
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from dao.connection import get_connection, ensure_schema, bulk_insert, iter_chunks
+from dao.data_version import ensure_data_versions, bump_data_version, get_data_version
 
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = "recommendation_stocks"
+FRAME_COLUMNS = [
+    'date', 'frequency', 'priority', 'stock_id', 'stock_name', 'sentiment', 'target_price', 'stop_loss'
+]
+
+# Process-level cache of load()/load_frame(): {(db_path, frequency): entry}
+_cache = {}
+_cache_lock = threading.Lock()
+
 
 class Stock:
     """Represents a single stock recommendation"""
@@ -87,11 +104,11 @@ class RecommendationDAO:
         """
         self.db_path = db_path
         self.frequency = frequency
-        self._create_table()
+        ensure_schema(self.db_path, TABLE_NAME, self._create_table)
+        ensure_data_versions(self.db_path)
     
-    def _create_table(self):
+    def _create_table(self, conn):
         """建立 recommendation_stocks 資料表"""
-        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         # Single table design: recommendation_stocks
@@ -141,70 +158,96 @@ class RecommendationDAO:
             CREATE INDEX IF NOT EXISTS idx_recommendation_stocks_date_priority 
             ON recommendation_stocks(date, priority);
         """)
-        
-        conn.commit()
-        conn.close()
     
+    def _cache_entry(self) -> Dict:
+        """
+        Return the process-level cache entry for this db/frequency
+
+        The entry is discarded when the recommendation_stocks data version
+        changes (every DAO write bumps it, from any process).
+        """
+        key = (os.path.abspath(self.db_path), self.frequency)
+        version = get_data_version(self.db_path, TABLE_NAME)
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is None or entry['version'] != version:
+                entry = _cache[key] = {'version': version}
+            return entry
+
+    def _fetch_rows(self) -> List[tuple]:
+        """Fetch every stock row in a single ordered query"""
+        conn = get_connection(self.db_path)
+        sql = """
+            SELECT date, frequency, priority, stock_id, stock_name, sentiment, target_price, stop_loss
+            FROM recommendation_stocks
+            {where}
+            ORDER BY date ASC, priority ASC
+        """
+        if self.frequency:
+            cursor = conn.execute(sql.format(where="WHERE frequency = ?"), (self.frequency,))
+        else:
+            cursor = conn.execute(sql.format(where=""))
+        return [tuple(row) for row in cursor]
+
     def load(self) -> List[RecommendationRecord]:
         """
         Load all recommendation records from database
         
+        The result is cached per process until the data version changes;
+        the returned records are shared and should not be modified.
+        
         Returns:
             List of RecommendationRecord objects sorted by date
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Get all unique dates (filtered by frequency if set)
-        if self.frequency:
-            cursor.execute("""
-                SELECT DISTINCT date FROM recommendation_stocks 
-                WHERE frequency = ?
-                ORDER BY date ASC
-            """, (self.frequency,))
-        else:
-            cursor.execute("""
-                SELECT DISTINCT date FROM recommendation_stocks 
-                ORDER BY date ASC
-            """)
-        
-        records = []
-        for row in cursor.fetchall():
-            date = row['date']
-            
-            # Get stocks for this date (filtered by frequency if set)
-            if self.frequency:
-                cursor.execute("""
-                    SELECT stock_id, stock_name, sentiment, target_price, stop_loss
-                    FROM recommendation_stocks
-                    WHERE date = ? AND frequency = ?
-                    ORDER BY priority ASC
-                """, (date, self.frequency))
-            else:
-                cursor.execute("""
-                    SELECT stock_id, stock_name, sentiment, target_price, stop_loss
-                    FROM recommendation_stocks
-                    WHERE date = ?
-                    ORDER BY priority ASC
-                """, (date,))
-            
-            stocks = [
-                Stock(
-                    id=stock_row['stock_id'],
-                    name=stock_row['stock_name'],
-                    sentiment=stock_row['sentiment'],
-                    TP=stock_row['target_price'],
-                    SL=stock_row['stop_loss']
+        entry = self._cache_entry()
+        records = entry.get('records')
+        if records is None:
+            records = [
+                RecommendationRecord(
+                    date=date,
+                    stocks=[
+                        Stock(id=row[3], name=row[4], sentiment=row[5], TP=row[6], SL=row[7])
+                        for row in rows
+                    ]
                 )
-                for stock_row in cursor.fetchall()
+                for date, rows in groupby(self._fetch_rows(), key=itemgetter(0))
             ]
-            
-            records.append(RecommendationRecord(date=date, stocks=stocks))
+            entry['records'] = records
+        
+        return list(records)
+
+    def load_frame(self) -> pd.DataFrame:
+        """
+        Load all recommendations as a tidy DataFrame (one row per stock)
+        
+        Columns: date (datetime64), frequency, priority, stock_id, stock_name,
+        sentiment, target_price, stop_loss; sorted by date and priority.
+        Cached per process until the data version changes.
         
-        conn.close()
-        return records
+        Returns:
+            DataFrame (a copy of the cached frame)
+        """
+        entry = self._cache_entry()
+        frame = entry.get('frame')
+        if frame is None:
+            frame = pd.DataFrame.from_records(self._fetch_rows(), columns=FRAME_COLUMNS)
+            frame['date'] = pd.to_datetime(frame['date'])
+            entry['frame'] = frame
+        
+        return frame.copy()
     
+    _INSERT_SQL = """
+        INSERT INTO recommendation_stocks 
+        (date, frequency, priority, stock_id, stock_name, sentiment, target_price, stop_loss)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _stock_rows(self, records: Iterable[RecommendationRecord]) -> Iterator[tuple]:
+        """Yield INSERT parameter tuples for every stock in the records"""
+        for record in records:
+            for idx, stock in enumerate(record.stocks):
+                yield (record.date, self.frequency, idx, stock.id, stock.name, stock.sentiment, stock.TP, stock.SL)
+
     def save(self, records: List[RecommendationRecord]) -> None:
         """
         Save recommendation records to database (full replacement for this frequency)
@@ -215,24 +258,17 @@ class RecommendationDAO:
         if not self.frequency:
             raise ValueError("frequency must be set when calling save()")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = get_connection(self.db_path)
         
-        # Clear existing data for this frequency only
-        cursor.execute("DELETE FROM recommendation_stocks WHERE frequency = ?", (self.frequency,))
+        with conn:
+            # Clear existing data for this frequency only
+            conn.execute("DELETE FROM recommendation_stocks WHERE frequency = ?", (self.frequency,))
+            
+            # Insert new records
+            sorted_records = sorted(records, key=lambda r: r.date)
+            bulk_insert(conn, self._INSERT_SQL, self._stock_rows(sorted_records))
+            bump_data_version(conn, TABLE_NAME)
         
-        # Insert new records
-        sorted_records = sorted(records, key=lambda r: r.date)
-        for record in sorted_records:
-            for idx, stock in enumerate(record.stocks):
-                cursor.execute("""
-                    INSERT INTO recommendation_stocks 
-                    (date, frequency, priority, stock_id, stock_name, sentiment, target_price, stop_loss)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (record.date, self.frequency, idx, stock.id, stock.name, stock.sentiment, stock.TP, stock.SL))
-        
-        conn.commit()
-        conn.close()
         logger.info(f"Saved {len(records)} recommendation records to database")
     
     def add_record(self, record: RecommendationRecord) -> None:
@@ -245,24 +281,55 @@ class RecommendationDAO:
         if not self.frequency:
             raise ValueError("frequency must be set when calling add_record()")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Delete existing stocks for this date and frequency
-        cursor.execute("DELETE FROM recommendation_stocks WHERE date = ? AND frequency = ?", (record.date, self.frequency))
+        conn = get_connection(self.db_path)
         
-        # Insert stocks
-        for idx, stock in enumerate(record.stocks):
-            cursor.execute("""
-                INSERT INTO recommendation_stocks 
-                (date, frequency, priority, stock_id, stock_name, sentiment, target_price, stop_loss)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (record.date, self.frequency, idx, stock.id, stock.name, stock.sentiment, stock.TP, stock.SL))
+        with conn:
+            # Delete existing stocks for this date and frequency
+            conn.execute("DELETE FROM recommendation_stocks WHERE date = ? AND frequency = ?", (record.date, self.frequency))
+            
+            # Insert stocks
+            bulk_insert(conn, self._INSERT_SQL, self._stock_rows([record]))
+            bump_data_version(conn, TABLE_NAME)
         
-        conn.commit()
-        conn.close()
         logger.info(f"Added/updated {self.frequency} recommendation for {record.date} with {len(record.stocks)} stocks")
     
+    def add_records(self, records: Iterable[RecommendationRecord], chunk_size: int = 500) -> int:
+        """
+        Add or update many recommendation records in a single transaction
+
+        Records are consumed lazily in chunks, so a generator can be passed for
+        very large inputs (e.g. the JSON migration). For each chunk the existing
+        stocks of those dates are deleted, then all stocks are inserted with
+        executemany. If the same date appears more than once, the last one wins.
+
+        Args:
+            records: Iterable of RecommendationRecord to add
+            chunk_size: Number of records per executemany batch
+
+        Returns:
+            Number of records written
+        """
+        if not self.frequency:
+            raise ValueError("frequency must be set when calling add_records()")
+
+        conn = get_connection(self.db_path)
+        count = 0
+
+        with conn:
+            for chunk in iter_chunks(records, chunk_size):
+                # Keep only the last record of each date within the chunk
+                latest = {record.date: record for record in chunk}
+                conn.executemany(
+                    "DELETE FROM recommendation_stocks WHERE date = ? AND frequency = ?",
+                    [(date, self.frequency) for date in latest]
+                )
+                bulk_insert(conn, self._INSERT_SQL, self._stock_rows(latest.values()))
+                count += len(latest)
+            bump_data_version(conn, TABLE_NAME)
+
+        logger.info(f"Added/updated {count} {self.frequency} recommendation records")
+        return count
+    
     def get_by_date(self, date: str) -> Optional[RecommendationRecord]:
         """
         Get recommendation record by date
@@ -273,8 +340,7 @@ class RecommendationDAO:
         Returns:
             RecommendationRecord or None if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         if self.frequency:
@@ -295,7 +361,6 @@ class RecommendationDAO:
         rows = cursor.fetchall()
         
         if not rows:
-            conn.close()
             return None
         
         stocks = [
@@ -309,7 +374,6 @@ class RecommendationDAO:
             for row in rows
         ]
         
-        conn.close()
         return RecommendationRecord(date=date, stocks=stocks)
     
     def get_latest(self) -> Optional[RecommendationRecord]:
@@ -319,8 +383,7 @@ class RecommendationDAO:
         Returns:
             Latest RecommendationRecord or None if empty
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Get latest date (filtered by frequency if set)
@@ -338,7 +401,6 @@ class RecommendationDAO:
         
         row = cursor.fetchone()
         if not row:
-            conn.close()
             return None
         
         date = row['date']
@@ -369,7 +431,6 @@ class RecommendationDAO:
             for stock_row in cursor.fetchall()
         ]
         
-        conn.close()
         return RecommendationRecord(date=date, stocks=stocks)
     
     def get_stock_ids(self, date: str) -> List[str]:
@@ -392,15 +453,13 @@ class RecommendationDAO:
         Args:
             date: Date string in YYYY-MM-DD format
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if self.frequency:
-            cursor.execute("DELETE FROM recommendation_stocks WHERE date = ? AND frequency = ?", (date, self.frequency))
-            logger.info(f"Deleted {self.frequency} recommendation for {date}")
-        else:
-            cursor.execute("DELETE FROM recommendation_stocks WHERE date = ?", (date,))
-            logger.info(f"Deleted recommendation for {date}")
+        conn = get_connection(self.db_path)
         
-        conn.commit()
-        conn.close()
+        with conn:
+            bump_data_version(conn, TABLE_NAME)
+            if self.frequency:
+                conn.execute("DELETE FROM recommendation_stocks WHERE date = ? AND frequency = ?", (date, self.frequency))
+                logger.info(f"Deleted {self.frequency} recommendation for {date}")
+            else:
+                conn.execute("DELETE FROM recommendation_stocks WHERE date = ?", (date,))
+                logger.info(f"Deleted recommendation for {date}")
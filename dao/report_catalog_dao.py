@@ -0,0 +1,135 @@
+import logging
+from dao.connection import get_connection, ensure_schema
+from dao.data_version import ensure_data_versions, bump_data_version
+from dao.paging import build_where, build_order_by, normalize_page
+
+logger = logging.getLogger(__name__)
+
+# 報告列表可排序 / 篩選的欄位 (DataTable 欄位 id: SQL 欄位)
+REPORT_TABLE_COLUMNS = {
+    'strategy_name': 'strategy_name',
+    'report_timestamp': 'report_timestamp',
+    'annual_return': 'annual_return',
+    'max_drawdown': 'max_drawdown',
+    'sharpe_ratio': 'sharpe_ratio',
+    'win_rate': 'win_rate',
+    'size_bytes': 'size_bytes',
+}
+
+
+class ReportCatalogDAO:
+    """
+    回測報告目錄
+    BacktestExecutor 儲存 HTML 報告時寫入一筆紀錄 (策略、時間、檔案大小、主要績效指標)，
+    dashboard 以分頁查詢列出報告，不必每次掃描 assets/ 目錄。
+    """
+
+    def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
+        ensure_schema(self.db_path, "report_catalog", self._create_table)
+        ensure_data_versions(self.db_path)
+
+    def _create_table(self, conn):
+        """建立 report_catalog 資料表，path 為相對於 assets/ 的報告路徑"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_catalog (
+                report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                strategy_name TEXT NOT NULL,
+                report_timestamp TEXT NOT NULL,
+                path TEXT NOT NULL UNIQUE,
+                size_bytes INTEGER,
+                annual_return REAL,
+                max_drawdown REAL,
+                sharpe_ratio REAL,
+                win_rate REAL,
+                created_timestamp TEXT DEFAULT (datetime('now','localtime'))
+            );
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_report_catalog_timestamp
+            ON report_catalog(report_timestamp DESC)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_report_catalog_strategy_timestamp
+            ON report_catalog(strategy_name, report_timestamp DESC)
+        """)
+
+    def upsert_report(self, strategy_name, report_timestamp, path, size_bytes=None, metrics=None):
+        """
+        新增或更新一筆報告紀錄 (同一路徑重複儲存時覆寫)
+
+        Args:
+            strategy_name (str): 策略名稱
+            report_timestamp (datetime.datetime | str): 回測時間
+            path (str): 相對於 assets/ 的報告路徑，例如 "AlanTWStrategyACE/2025-03-05_20-00-00.html"
+            size_bytes (int, optional): 檔案大小
+            metrics (dict, optional): annual_return, max_drawdown, sharpe_ratio, win_rate
+        """
+        if not isinstance(report_timestamp, str):
+            report_timestamp = report_timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        metrics = metrics or {}
+
+        conn = get_connection(self.db_path)
+        with conn:
+            conn.execute("""
+                INSERT INTO report_catalog (
+                    strategy_name, report_timestamp, path, size_bytes,
+                    annual_return, max_drawdown, sharpe_ratio, win_rate
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    strategy_name = excluded.strategy_name,
+                    report_timestamp = excluded.report_timestamp,
+                    size_bytes = excluded.size_bytes,
+                    annual_return = COALESCE(excluded.annual_return, annual_return),
+                    max_drawdown = COALESCE(excluded.max_drawdown, max_drawdown),
+                    sharpe_ratio = COALESCE(excluded.sharpe_ratio, sharpe_ratio),
+                    win_rate = COALESCE(excluded.win_rate, win_rate)
+            """, (
+                strategy_name,
+                report_timestamp,
+                path,
+                size_bytes,
+                metrics.get('annual_return'),
+                metrics.get('max_drawdown'),
+                metrics.get('sharpe_ratio'),
+                metrics.get('win_rate'),
+            ))
+            bump_data_version(conn, "report_catalog")
+        logger.info(f"Cataloged report {path}")
+
+    def get_reports_page(self, page_current=0, page_size=20, sort_by=(), filter_query=None, strategy_name=None):
+        """
+        分頁查詢報告 (預設新到舊)
+
+        Args:
+            filter_query (str): DataTable filter_query
+            strategy_name (str, optional): 只查詢此策略的報告 (以參數綁定，不經過 filter_query 解析)
+
+        Returns:
+            tuple: (當頁報告列表, 符合條件的總筆數)
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        filters, params = build_where(filter_query, REPORT_TABLE_COLUMNS)
+        if strategy_name:
+            filters.insert(0, "strategy_name = ?")
+            params.insert(0, strategy_name)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        order_by = build_order_by(sort_by, REPORT_TABLE_COLUMNS, default="report_timestamp DESC, report_id DESC")
+
+        conn = get_connection(self.db_path)
+        total = conn.execute(f"SELECT COUNT(*) FROM report_catalog {where}", params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT report_id, path, {", ".join(REPORT_TABLE_COLUMNS.values())}
+            FROM report_catalog
+            {where}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """, params + [page_size, page_current * page_size]).fetchall()
+
+        return [dict(row) for row in rows], total
+
+    def get_strategy_names(self):
+        """取得所有有報告的策略名稱"""
+        conn = get_connection(self.db_path)
+        rows = conn.execute("SELECT DISTINCT strategy_name FROM report_catalog ORDER BY strategy_name").fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,146 @@
+"""
+資料表 schema 版本管理
+CREATE TABLE IF NOT EXISTS 無法替既有資料庫加欄位或索引，因此資料表建立後的 schema 變更
+以版本號登記在 MIGRATIONS，套用紀錄寫入 schema_migrations 資料表，每個版本只執行一次。
+
+新增變更時在 MIGRATIONS 最後加一筆 (版本號遞增)，並在對應 DAO 的 _create_table 結尾呼叫
+apply_migrations(conn, "<資料表>")。
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _column_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def _add_generated_column(conn, table, column, expression):
+    """新增 VIRTUAL generated column (不佔儲存空間，可建立索引)"""
+    if column not in _column_names(conn, table):
+        conn.execute(
+            f"ALTER TABLE {table} ADD COLUMN {column} TEXT GENERATED ALWAYS AS ({expression}) VIRTUAL"
+        )
+
+
+def _order_history_date_columns(conn):
+    # order_timestamp 格式為 'YYYY-MM-DD HH:MM:SS'
+    _add_generated_column(conn, "order_history", "order_date", "substr(order_timestamp, 1, 10)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_order_history_account_timestamp
+        ON order_history(account_id, order_timestamp)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_order_history_account_date
+        ON order_history(account_id, order_date)
+    """)
+
+
+def _inventory_history_date_columns(conn):
+    _add_generated_column(conn, "inventory_history", "fetch_date", "substr(fetch_timestamp, 1, 10)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_inventory_history_account_timestamp
+        ON inventory_history(account_id, fetch_timestamp)
+    """)
+
+
+def _balance_history_date_columns(conn):
+    _add_generated_column(conn, "balance_history", "fetch_date", "substr(fetch_timestamp, 1, 10)")
+    _add_generated_column(conn, "balance_history", "fetch_month", "substr(fetch_timestamp, 1, 7)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_balance_history_account_timestamp
+        ON balance_history(account_id, fetch_timestamp)
+    """)
+
+
+def _backfill_balance_summaries(conn):
+    # 由既有的 balance_history 建立 daily_balance_close 與 monthly_returns (資料表由 BalanceDAO 建立)
+    conn.execute("DELETE FROM daily_balance_close")
+    conn.execute("""
+        INSERT INTO daily_balance_close (account_id, date, total_assets, fetch_timestamp)
+        SELECT account_id, fetch_date, total_assets, fetch_timestamp
+        FROM (
+            SELECT account_id, fetch_date, total_assets, fetch_timestamp,
+                ROW_NUMBER() OVER (
+                    PARTITION BY account_id, fetch_date ORDER BY fetch_timestamp DESC, balance_id DESC
+                ) as rank_desc
+            FROM balance_history
+            WHERE account_id IS NOT NULL AND fetch_timestamp IS NOT NULL
+        )
+        WHERE rank_desc = 1
+    """)
+    conn.execute("DELETE FROM monthly_returns")
+    conn.execute("""
+        INSERT INTO monthly_returns (
+            account_id, month, start_assets, start_timestamp, end_assets, end_timestamp, n_records
+        )
+        SELECT
+            account_id, fetch_month,
+            MAX(CASE WHEN rank_asc = 1 THEN total_assets END),
+            MIN(fetch_timestamp),
+            MAX(CASE WHEN rank_desc = 1 THEN total_assets END),
+            MAX(fetch_timestamp),
+            COUNT(*)
+        FROM (
+            SELECT account_id, fetch_month, total_assets, fetch_timestamp,
+                ROW_NUMBER() OVER (
+                    PARTITION BY account_id, fetch_month ORDER BY fetch_timestamp ASC, balance_id ASC
+                ) as rank_asc,
+                ROW_NUMBER() OVER (
+                    PARTITION BY account_id, fetch_month ORDER BY fetch_timestamp DESC, balance_id DESC
+                ) as rank_desc
+            FROM balance_history
+            WHERE account_id IS NOT NULL AND fetch_timestamp IS NOT NULL
+        )
+        GROUP BY account_id, fetch_month
+    """)
+
+
+# (版本, 資料表, 說明, 套用函式)
+MIGRATIONS = [
+    (1, "order_history", "order_date generated column 與 (account_id, 時間) 索引", _order_history_date_columns),
+    (2, "inventory_history", "fetch_date generated column 與 (account_id, 時間) 索引", _inventory_history_date_columns),
+    (3, "balance_history", "fetch_date/fetch_month generated column 與 (account_id, 時間) 索引", _balance_history_date_columns),
+    (4, "balance_history", "回填 daily_balance_close 與 monthly_returns", _backfill_balance_summaries),
+]
+
+
+def _create_migrations_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            description TEXT,
+            applied_timestamp TEXT DEFAULT (datetime('now','localtime'))
+        );
+    """)
+
+
+def apply_migrations(conn, table):
+    """
+    套用 table 尚未執行的 migration (呼叫端負責交易，通常在 ensure_schema 的 create 中呼叫)
+
+    Args:
+        conn: sqlite3.Connection
+        table: 資料表名稱
+
+    Returns:
+        list[int]: 本次套用的版本
+    """
+    _create_migrations_table(conn)
+    applied = {row[0] for row in conn.execute(
+        "SELECT version FROM schema_migrations WHERE table_name = ?", (table,)
+    )}
+
+    versions = []
+    for version, table_name, description, migrate in MIGRATIONS:
+        if table_name != table or version in applied:
+            continue
+        migrate(conn)
+        conn.execute(
+            "INSERT INTO schema_migrations (version, table_name, description) VALUES (?, ?, ?)",
+            (version, table_name, description)
+        )
+        logger.info(f"Applied schema migration {version} ({table_name}): {description}")
+        versions.append(version)
+    return versions
@@ -9,9 +9,12 @@ from service.account_service import AccountService
 from service.inventory_service import InventoryService
 from service.order_service import OrderService
 from service.balance_service import BalanceService
+from service.report_catalog_service import ReportCatalogService
 from tabs.order_history import OrderHistoryTab
 from tabs.inventory_history import InventoryHistoryTab
 from tabs.balance_history import BalanceHistoryTab
+from tabs.report_catalog import ReportCatalogTab
+from utils.report_store import register_report_route
 
 def create_app():
     # 初始化服務
@@ -19,11 +22,13 @@ def create_app():
     order_service = OrderService()
     inventory_service = InventoryService()
     balance_service = BalanceService()
+    report_catalog_service = ReportCatalogService()
 
     # 初始化標籤
     order_history_tab = OrderHistoryTab(order_service)
     inventory_history_tab = InventoryHistoryTab(inventory_service)
     balance_history_tab = BalanceHistoryTab(balance_service)
+    report_catalog_tab = ReportCatalogTab(report_catalog_service)
 
     # 獲取根目錄路徑
     root_dir = os.path.dirname(os.path.abspath(__file__))
@@ -46,6 +51,9 @@ def create_app():
     @server.route('/assets/<path:path>')
     def autoindex(path='.'):
         return auto_index.render_autoindex(path)
+
+    # 回測報告 (壓縮儲存的報告以 Content-Encoding: gzip 直接傳送)
+    register_report_route(server, assets_path)
     
     # 創建 Dash 應用
     app = dash.Dash(
@@ -89,6 +97,9 @@ def create_app():
                 dcc.Tab(label='帳戶資金', value='tab-balance-history', children=[
                     balance_history_tab.get_layout()
                 ]),
+                dcc.Tab(label='回測報告', value='tab-report-catalog', children=[
+                    report_catalog_tab.get_layout()
+                ]),
             ])
         ])
     
@@ -99,6 +110,7 @@ def create_app():
     order_history_tab.register_callbacks(app)
     inventory_history_tab.register_callbacks(app)
     balance_history_tab.register_callbacks(app)
+    report_catalog_tab.register_callbacks(app)
     
     return app
     
@@ -3,19 +3,21 @@
 # Default values
 USER_NAME=""
 BROKER_NAME=""
+ALL_ACCOUNTS=false
 
 # Parse input arguments
 while [[ "$#" -gt 0 ]]; do
     case $1 in
         --user_name=*) USER_NAME="${1#*=}"; shift ;;
         --broker_name=*) BROKER_NAME="${1#*=}"; shift ;;
+        --all-accounts) ALL_ACCOUNTS=true; shift ;;
         *) echo "Unknown parameter passed: $1"; exit 1 ;;
     esac
 done
 
 # Check if required parameters are provided
-if [[ -z "$USER_NAME" || -z "$BROKER_NAME" ]]; then
-    echo "Error: Missing required arguments --user_name and --broker_name"
+if [[ "$ALL_ACCOUNTS" != true && ( -z "$USER_NAME" || -z "$BROKER_NAME" ) ]]; then
+    echo "Error: Missing required arguments --user_name and --broker_name (or --all-accounts)"
     exit 1
 fi
 
@@ -32,7 +34,11 @@ export LD_PRELOAD=$CONDA_PREFIX/lib/libstdc++.so.6
 
 # Run the Python script
 echo "Running Python script 'scheduler.py'..."
-python -m jobs.scheduler --user_name "$USER_NAME" --broker_name "$BROKER_NAME"
+if [[ "$ALL_ACCOUNTS" == true ]]; then
+    python -m jobs.scheduler --all-accounts
+else
+    python -m jobs.scheduler --user_name "$USER_NAME" --broker_name "$BROKER_NAME"
+fi
 
 # Deactivate conda environment
 echo "Deactivating conda environment..."
@@ -1,73 +1,307 @@
 import argparse
+import gc
+import importlib
+import inspect
 import logging
+import multiprocessing
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dao.report_catalog_dao import ReportCatalogDAO
 from utils.config_loader import ConfigLoader
+from utils.data_cache import apply_data_cache
 from utils.logger_manager import LoggerManager
+from utils.position_snapshot import create_position_snapshot_store, current_data_date, strategy_fingerprint
+from utils.report_store import create_report_store
+from utils.shared_frames import SharedFrameStore
 from utils.notifier import create_notification_manager
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 logger = logging.getLogger(__name__)
 
+# 策略名稱 -> (模組路徑, 類別名稱)
+STRATEGY_REGISTRY = {
+    'TibetanMastiffTWStrategy': ('strategy_class.tibetanmastiff_tw_strategy', 'TibetanMastiffTWStrategy'),
+    'PeterWuStrategy': ('strategy_class.peterwu_tw_strategy', 'PeterWuStrategy'),
+    'AlanTWStrategyACE': ('strategy_class.alan_tw_strategy_ACE', 'AlanTWStrategyACE'),
+    'AlanTWStrategyNotStart': ('strategy_class.alan_tw_strategy_not_start', 'AlanTWStrategyNotStart'),
+    'AlanTWStrategyNotStartA': ('strategy_class.alan_tw_strategy_not_start_A', 'AlanTWStrategyNotStartA'),
+    'AlanTWStrategyNotStartB': ('strategy_class.alan_tw_strategy_not_start_B', 'AlanTWStrategyNotStartB'),
+    'RAndDManagementStrategy': ('strategy_class.r_and_d_management_strategy', 'RAndDManagementStrategy'),
+    'RogerTWStrategyWeekly': ('strategy_class.roger_tw_strategy_weekly', 'RogerTWStrategyWeekly'),
+    'RogerTWStrategyMonthly': ('strategy_class.roger_tw_strategy_monthly', 'RogerTWStrategyMonthly'),
+}
+
 class BacktestExecutor:
-    def __init__(self, strategy_class_name, config_path="config.yaml", base_log_directory="logs"):
-        self.strategy_class_name = strategy_class_name
-        self.backtest_timestamp = datetime.now(ZoneInfo("Asia/Taipei"))
+    def __init__(self, strategy_class_names, config_path="config.yaml", base_log_directory="logs",
+                 workers=1, backtest_timestamp=None, log_mode='w'):
+        if isinstance(strategy_class_names, str):
+            strategy_class_names = [strategy_class_names]
+        self.strategy_class_names = list(strategy_class_names)
+        self.strategy_class_name = self.strategy_class_names[0]
+        self.config_path = config_path
+        self.base_log_directory = base_log_directory
+        self.workers = max(1, workers)
+        self.backtest_timestamp = backtest_timestamp or datetime.now(ZoneInfo("Asia/Taipei"))
         self.logger_manager = LoggerManager(
             base_log_directory=base_log_directory,
             current_datetime=self.backtest_timestamp,
         )
         self.config_loader = ConfigLoader(config_path)
         self.config_loader.load_global_env_vars()
-        self.log_file = self.logger_manager.setup_logging()
+        self.log_file = self.logger_manager.setup_logging(mode=log_mode)
+        self.data_cache = apply_data_cache(self.config_loader.config.get('data_cache', {}))
+        self.snapshot_store = create_position_snapshot_store(self.config_loader.config.get('position_snapshot', {}))
+        self.compact_mode = self.config_loader.config.get('backtest', {}).get('compact_mode', False)
+        self.report_storage_config = self.config_loader.config.get('report_storage', {})
 
-    def run_strategy_and_save(self):
-        strategy = self.load_strategy()
+    def run_strategy_and_save(self, strategy_class_name=None):
+        strategy_class_name = strategy_class_name or self.strategy_class_name
+        # 先取得資料日期: 若回測途中資料更新，快照會以較舊的日期保存，下單時自然失效
+        data_date = current_data_date() if self.snapshot_store is not None else None
+        strategy = self.load_strategy(strategy_class_name)
         report = strategy.run_strategy()
-        self.save_finlab_report(report)
+        self.save_finlab_report(report, strategy_class_name=strategy_class_name)
+        if self.snapshot_store is None:
+            return
+        strategy_kwargs = self.strategy_kwargs(type(strategy))
+        if strategy_kwargs.get('compact'):
+            # compact 模式的持倉以 float32 計算，不提供給下單使用
+            logger.info(f"{strategy_class_name} 以 compact 模式執行，不保存持倉快照")
+            return
+        fingerprint = strategy_fingerprint(type(strategy), **strategy_kwargs)
+        self.snapshot_store.save(strategy_class_name, data_date, report, fingerprint)
 
+    def run_batch(self):
+        """
+        執行多個策略並儲存報告
 
-    def save_finlab_report(self, report, base_directory="assets/"):
-        subdirectory = self.strategy_class_name
-        report_directory = os.path.join(base_directory, subdirectory)
-        if not os.path.exists(report_directory):
-            os.makedirs(report_directory)
-        datetime_str = self.backtest_timestamp.strftime("%Y-%m-%d_%H-%M-%S")
-        save_report_path = os.path.join(report_directory, f"{datetime_str}.html")
-        report.display(save_report_path=save_report_path)
-        
-
-
-    def load_strategy(self):
-        if self.strategy_class_name == 'TibetanMastiffTWStrategy':
-            from strategy_class.tibetanmastiff_tw_strategy import TibetanMastiffTWStrategy as strategy_class
-        elif self.strategy_class_name == 'PeterWuStrategy':
-            from strategy_class.peterwu_tw_strategy import PeterWuStrategy as strategy_class
-        elif self.strategy_class_name == 'AlanTWStrategyACE':
-            from strategy_class.alan_tw_strategy_ACE import AlanTWStrategyACE as strategy_class
-        elif self.strategy_class_name == 'AlanTWStrategyNotStart':
-            from strategy_class.alan_tw_strategy_not_start import AlanTWStrategyNotStart as strategy_class
-        elif self.strategy_class_name == 'AlanTWStrategyNotStartA':
-            from strategy_class.alan_tw_strategy_not_start_A import AlanTWStrategyNotStartA as strategy_class
-        elif self.strategy_class_name == 'AlanTWStrategyNotStartB':
-            from strategy_class.alan_tw_strategy_not_start_B import AlanTWStrategyNotStartB as strategy_class
-        elif self.strategy_class_name == 'RAndDManagementStrategy':
-            from strategy_class.r_and_d_management_strategy import RAndDManagementStrategy as strategy_class
-        elif self.strategy_class_name == 'RogerTWStrategyWeekly':
-            from strategy_class.roger_tw_strategy_weekly import RogerTWStrategyWeekly as strategy_class
-        elif self.strategy_class_name == 'RogerTWStrategyMonthly':
-            from strategy_class.roger_tw_strategy_monthly import RogerTWStrategyMonthly as strategy_class
+        workers 為 1 時在同一個行程依序執行 (data_cache.enabled 時共用的 FinLab 資料只讀取一次)，
+        大於 1 時改由 run_parallel 以多個子行程同時執行 (FinLab 數值寬表由父行程放進 shared memory 共用)。
+        單一策略失敗不影響其他策略，全部執行完後若有失敗則拋出彙總錯誤。
+        """
+        if self.workers > 1 and len(self.strategy_class_names) > 1:
+            failed = self.run_parallel()
+        else:
+            failed = self.run_serial()
+
+        if failed:
+            summary = "; ".join(f"{name}: {error}" for name, error in failed.items())
+            raise RuntimeError(f"{len(failed)}/{len(self.strategy_class_names)} 個策略回測失敗 - {summary}")
+
+    def run_serial(self):
+        """依序執行策略，回傳 {策略名稱: 錯誤訊息}"""
+        if self.data_cache is not None:
+            self.data_cache.enable_memory()
+        else:
+            # 記憶體快取掛在 FinLabDataCache 上，未啟用 data_cache 時每個策略各自呼叫 finlab data.get
+            logger.warning("data_cache 未啟用，批次回測不共用已讀取的 FinLab 資料")
+
+        failed = {}
+        try:
+            for strategy_class_name in self.strategy_class_names:
+                logger.info(f"開始回測: {strategy_class_name}")
+                start_time = datetime.now(ZoneInfo("Asia/Taipei"))
+                try:
+                    self.run_strategy_and_save(strategy_class_name)
+                    elapsed = datetime.now(ZoneInfo("Asia/Taipei")) - start_time
+                    logger.info(f"完成回測: {strategy_class_name} (耗時 {elapsed.total_seconds():.1f} 秒)")
+                except Exception as e:
+                    logger.exception(f"回測失敗: {strategy_class_name}: {e}")
+                    failed[strategy_class_name] = str(e)
+                finally:
+                    gc.collect()
+        finally:
+            if self.data_cache is not None:
+                self.data_cache.clear_memory()
+
+        return failed
+
+    def run_parallel(self):
+        """
+        以 ProcessPoolExecutor 平行執行策略，回傳 {策略名稱: 錯誤訊息}
+
+        父行程先更新過期的本地快取，再讀取快取中的 dataset 並放進 shared memory
+        (見 utils/shared_frames.py)；子行程只收到名稱、shape、dtype 與 index/columns，
+        直接包裝共用的數值陣列，不各自載入一份資料。無法共用的 dataset (非數值或混合 dtype)
+        子行程照常從本地快取讀取。策略計算過程產生的中間資料仍由各子行程各自持有。
+        子行程只回傳錯誤訊息與耗時，不在行程間 pickle DataFrame。
+        使用 spawn 避免 fork 時複製父行程的 finlab / 網路連線狀態。
+        """
+        shared_store = SharedFrameStore()
+        shared_specs = []
+        if self.data_cache is not None:
+            refreshed = self.data_cache.warm()
+            logger.info(f"平行回測前已更新 {len(refreshed)} 個快取 dataset")
+            shared_specs = self.publish_shared_frames(shared_store)
         else:
-            raise ValueError(f"Unknown strategy class: {self.strategy_class_name}")
-        return strategy_class()
+            logger.warning("data_cache 未啟用，各子行程將各自下載資料")
+
+        max_workers = min(self.workers, len(self.strategy_class_names))
+        logger.info(f"平行回測: {len(self.strategy_class_names)} 個策略, {max_workers} 個子行程")
+
+        failed = {}
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+                futures = {
+                    pool.submit(
+                        run_strategy_in_worker,
+                        strategy_class_name,
+                        self.config_path,
+                        self.base_log_directory,
+                        self.backtest_timestamp,
+                        shared_specs,
+                    ): strategy_class_name
+                    for strategy_class_name in self.strategy_class_names
+                }
+                for future in as_completed(futures):
+                    strategy_class_name = futures[future]
+                    try:
+                        error, elapsed_seconds = future.result()
+                    except Exception as e:
+                        # 子行程異常終止 (例如記憶體不足被 kill)
+                        error, elapsed_seconds = f"{type(e).__name__}: {e}", None
+
+                    if error:
+                        logger.error(f"回測失敗: {strategy_class_name}: {error}")
+                        failed[strategy_class_name] = error.strip().splitlines()[-1]
+                    else:
+                        logger.info(f"完成回測: {strategy_class_name} (耗時 {elapsed_seconds:.1f} 秒)")
+        finally:
+            shared_store.close()
+
+        return failed
+
+    def publish_shared_frames(self, shared_store):
+        """讀取本地快取中的 dataset 放進 shared memory，回傳給子行程的 SharedFrameSpec 清單"""
+        specs = []
+        for dataset in self.data_cache.list_datasets():
+            try:
+                spec = shared_store.publish(dataset, self.data_cache.get(dataset))
+            except Exception as e:
+                logger.warning(f"無法共用 dataset {dataset}: {e}")
+                continue
+            if spec is not None:
+                specs.append(spec)
+        logger.info(f"平行回測共用 {len(specs)} 個 dataset ({shared_store.nbytes / 1024 ** 2:.0f} MB shared memory)")
+        return specs
+
+
+    def save_finlab_report(self, report, base_directory="assets/", strategy_class_name=None):
+        subdirectory = strategy_class_name or self.strategy_class_name
+        datetime_str = self.backtest_timestamp.strftime("%Y-%m-%d_%H-%M-%S")
+        relative_path = f"{subdirectory}/{datetime_str}.html"
+        # report_storage.compress 開啟時存為 .html.gz (見 utils/report_store.py)
+        report_store = create_report_store(self.report_storage_config, base_directory=base_directory)
+        save_report_path, size_bytes = report_store.save(report, relative_path)
+        self.catalog_report(report, relative_path, subdirectory, size_bytes)
+
+    def catalog_report(self, report, relative_path, strategy_class_name, size_bytes):
+        """將報告寫入 report_catalog (失敗只記錄警告，不影響報告本身)"""
+        try:
+            ReportCatalogDAO().upsert_report(
+                strategy_name=strategy_class_name,
+                report_timestamp=self.backtest_timestamp,
+                path=relative_path,
+                size_bytes=size_bytes,
+                metrics=extract_report_metrics(report),
+            )
+        except Exception as e:
+            logger.warning(f"報告目錄寫入失敗: {relative_path}: {e}")
+
+
+
+    def load_strategy(self, strategy_class_name=None):
+        strategy_class_name = strategy_class_name or self.strategy_class_name
+        if strategy_class_name not in STRATEGY_REGISTRY:
+            raise ValueError(f"Unknown strategy class: {strategy_class_name}")
+        module_path, class_name = STRATEGY_REGISTRY[strategy_class_name]
+        strategy_class = getattr(importlib.import_module(module_path), class_name)
+        return strategy_class(**self.strategy_kwargs(strategy_class))
+
+    def strategy_kwargs(self, strategy_class):
+        """建立策略的參數 (也納入快照的 strategy_fingerprint)"""
+        # compact 模式 (float32 + 位元壓縮) 降低記憶體峰值，讓多個策略可以同時執行
+        if self.compact_mode and 'compact' in inspect.signature(strategy_class.__init__).parameters:
+            return {'compact': True}
+        return {}
+
+def extract_report_metrics(report):
+    """從 finlab report.get_metrics() 取出報告目錄需要的主要指標 (取不到的為 None)"""
+    try:
+        metrics = report.get_metrics()
+    except Exception as e:
+        logger.warning(f"無法取得報告績效指標: {e}")
+        return {}
+
+    def pick(section, key):
+        value = (metrics.get(section) or {}).get(key)
+        return float(value) if value is not None else None
+
+    return {
+        'annual_return': pick('profitability', 'annualReturn'),
+        'max_drawdown': pick('risk', 'maxDrawdown'),
+        'sharpe_ratio': pick('ratio', 'sharpeRatio'),
+        'win_rate': pick('winrate', 'winRate'),
+    }
+
+def run_strategy_in_worker(strategy_class_name, config_path, base_log_directory, backtest_timestamp,
+                           shared_specs=()):
+    """
+    子行程入口: 執行單一策略並儲存報告
+
+    Args:
+        shared_specs: 父行程放進 shared memory 的 dataset (SharedFrameSpec 清單)
+
+    Returns:
+        tuple: (錯誤 traceback 或 None, 耗時秒數)
+    """
+    start_time = datetime.now(ZoneInfo("Asia/Taipei"))
+    try:
+        backtest_executor = BacktestExecutor(
+            strategy_class_names=[strategy_class_name],
+            config_path=config_path,
+            base_log_directory=base_log_directory,
+            backtest_timestamp=backtest_timestamp,
+            log_mode='a',
+        )
+        if shared_specs and backtest_executor.data_cache is not None:
+            backtest_executor.data_cache.attach_shared(shared_specs)
+        backtest_executor.run_strategy_and_save(strategy_class_name)
+    except Exception:
+        # 回傳字串而非例外物件，避免例外無法 pickle 回父行程
+        return traceback.format_exc(), None
+    return None, (datetime.now(ZoneInfo("Asia/Taipei")) - start_time).total_seconds()
+
+def resolve_strategy_names(args, config_loader):
+    """依命令列參數決定要執行的策略清單"""
+    if args.all:
+        names = config_loader.config.get('backtest', {}).get('nightly_strategies', [])
+        if not names:
+            raise ValueError("config.yaml 的 backtest.nightly_strategies 為空")
+    elif args.strategies:
+        names = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    else:
+        names = [args.strategy_class_name]
+
+    unknown = [name for name in names if name not in STRATEGY_REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown strategy class: {', '.join(unknown)}")
+    return names
 
 if __name__ == "__main__":
     root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(root_dir)
 
     parser = argparse.ArgumentParser(description="Run BacktestExecutor")
-    parser.add_argument("--strategy_class_name", required=True, help="strategy_class_name (e.g., TibetanMastiffTWStrategy)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--strategy_class_name", help="strategy_class_name (e.g., TibetanMastiffTWStrategy)")
+    group.add_argument("--strategies", help="以逗號分隔的策略清單 (e.g., AlanTWStrategyACE,PeterWuStrategy)")
+    group.add_argument("--all", action='store_true', help="執行 config.yaml 中 backtest.nightly_strategies 的所有策略")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="平行執行的子行程數 (預設讀取 config.yaml 的 backtest.workers，1 為依序執行)")
 
     args = parser.parse_args()
     logger.info(f"args: {args}")
@@ -77,8 +311,10 @@ if __name__ == "__main__":
     notifier = create_notification_manager(config_loader.config.get('notification', {}), logger)
 
     try:
-        backtest_executor = BacktestExecutor(strategy_class_name=args.strategy_class_name)
-        backtest_executor.run_strategy_and_save()
+        strategy_class_names = resolve_strategy_names(args, config_loader)
+        workers = args.workers or config_loader.config.get('backtest', {}).get('workers', 1)
+        backtest_executor = BacktestExecutor(strategy_class_names=strategy_class_names, workers=workers)
+        backtest_executor.run_batch()
     except Exception as e:
         logger.exception(e)
 
@@ -90,3 +326,6 @@ if __name__ == "__main__":
         )
 
     # python -m jobs.backtest_executor --strategy_class_name AlanTwStrategy1
+    # python -m jobs.backtest_executor --strategies AlanTWStrategyACE,PeterWuStrategy
+    # python -m jobs.backtest_executor --all
+    # python -m jobs.backtest_executor --all --workers 4
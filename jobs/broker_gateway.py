@@ -0,0 +1,105 @@
+import argparse
+import datetime
+import logging
+import os
+import traceback
+from zoneinfo import ZoneInfo
+from utils.authentication import Authenticator, login_broker_for_user
+from utils.broker_gateway import BrokerGatewayServer, BrokerSessionPool, FakeBrokerAccount
+from utils.config_loader import ConfigLoader
+from utils.logger_manager import LoggerManager
+from utils.notifier import create_notification_manager
+
+logger = logging.getLogger(__name__)
+
+
+class BrokerGateway:
+    """
+    常駐的券商連線 Gateway
+    啟動時預先登入 config.yaml 中的帳戶，之後下單、抓取帳務等工作透過 Unix socket
+    使用已登入的帳戶，不必每次重新登入券商 (見 utils/broker_gateway.py)。
+    """
+
+    def __init__(self, config_path="config.yaml", base_log_directory="logs", socket_path=None, fake=False):
+        self.config_path = config_path
+        self.config_loader = ConfigLoader(config_path)
+        self.config_loader.load_global_env_vars()
+        self.gateway_config = self.config_loader.config.get('broker_gateway') or {}
+        self.socket_path = socket_path or self.gateway_config.get('socket_path', "/tmp/stock-analysis-broker-gateway.sock")
+        self.fake = fake
+
+        self.logger_manager = LoggerManager(
+            base_log_directory=base_log_directory,
+            current_datetime=datetime.datetime.now(ZoneInfo("Asia/Taipei")),
+        )
+        self.log_file = self.logger_manager.setup_logging()
+
+        max_age_hours = self.gateway_config.get('session_max_age_hours')
+        self.pool = BrokerSessionPool(
+            login=self._login,
+            max_age_seconds=max_age_hours * 3600 if max_age_hours else None,
+        )
+
+        if not fake:
+            Authenticator(self.config_loader).login_finlab()
+
+    def _login(self, user_name, broker_name):
+        if self.fake:
+            return FakeBrokerAccount()
+        # gateway 自己必須直接登入券商
+        return login_broker_for_user(self.config_path, user_name, broker_name, use_gateway=False)
+
+    def run(self):
+        """
+        預先登入帳戶後開始服務 (阻塞直到行程結束)
+        預先登入失敗的帳戶會在工作第一次使用時重新登入，失敗時由該工作發送錯誤通知
+        """
+        if self.gateway_config.get('warm_on_start', True):
+            self.pool.warm(self.config_loader.get_all_accounts())
+
+        server = BrokerGatewayServer(self.socket_path, self.pool)
+        logger.info(f"Broker gateway 已啟動: {self.socket_path} ({len(self.pool)} 個帳戶已登入)")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(root_dir)
+
+    parser = argparse.ArgumentParser(description="Run broker gateway daemon")
+    parser.add_argument("--socket_path", help="Unix socket 路徑 (預設讀取 config.yaml 的 broker_gateway.socket_path)")
+    parser.add_argument("--fake", action='store_true', help="使用假券商帳戶 (測試用，不連線券商)")
+
+    args = parser.parse_args()
+    logger.info(f"args: {args}")
+
+    # 初始化通知管理器
+    config_loader = ConfigLoader(os.path.join(root_dir, "config.yaml"))
+    notifier = create_notification_manager(config_loader.config.get('notification', {}), logger)
+
+    if not (config_loader.config.get('broker_gateway') or {}).get('enabled', False) and not args.fake:
+        logger.info("broker_gateway 未啟用，結束")
+    else:
+        try:
+            broker_gateway = BrokerGateway(
+                config_path=os.path.join(root_dir, "config.yaml"),
+                base_log_directory=os.path.join(root_dir, "logs"),
+                socket_path=args.socket_path,
+                fake=args.fake,
+            )
+            broker_gateway.run()
+        except Exception as e:
+            logger.exception(e)
+
+            # 發送錯誤通知
+            notifier.send_error(
+                task_name="券商連線 Gateway",
+                error_message=str(e),
+                error_traceback=traceback.format_exc()
+            )
+
+    # python -m jobs.broker_gateway
+    # python -m jobs.broker_gateway --fake --socket_path /tmp/fake-broker.sock
@@ -0,0 +1,87 @@
+import argparse
+import logging
+import os
+import traceback
+from utils.config_loader import ConfigLoader
+from utils.data_cache import apply_data_cache
+from utils.logger_manager import LoggerManager
+from utils.notifier import create_notification_manager
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+class DataRefresher:
+    """
+    每晚更新本地 FinLab 資料快取 (finlab 沒有依日期下載的 API，每個 dataset 都會完整下載，
+    再與快取比對後寫回；見 utils/data_cache.py)
+
+    只處理快取中已存在、且名稱符合 refresh_prefixes 的 dataset，
+    讓回測與下單排程讀到的都是當日最新且已落地的資料。
+    """
+    def __init__(self, config_path="config.yaml", base_log_directory="logs"):
+        self.refresh_timestamp = datetime.now(ZoneInfo("Asia/Taipei"))
+        self.logger_manager = LoggerManager(
+            base_log_directory=base_log_directory,
+            current_datetime=self.refresh_timestamp,
+        )
+        self.config_loader = ConfigLoader(config_path)
+        self.config_loader.load_global_env_vars()
+        self.log_file = self.logger_manager.setup_logging()
+
+        cache_config = self.config_loader.config.get('data_cache', {})
+        self.refresh_prefixes = tuple(cache_config.get('refresh_prefixes', []))
+        self.data_cache = apply_data_cache(cache_config)
+        if self.data_cache is None:
+            raise RuntimeError("data_cache 未啟用，無法執行資料更新")
+
+    def list_targets(self):
+        datasets = self.data_cache.list_datasets()
+        if not self.refresh_prefixes:
+            return datasets
+        return [d for d in datasets if d.startswith(self.refresh_prefixes)]
+
+    def refresh_all(self):
+        targets = self.list_targets()
+        logger.info(f"準備更新 {len(targets)} 個 dataset")
+
+        failed = {}
+        for dataset in targets:
+            try:
+                before = self.data_cache.last_date(dataset)
+                self.data_cache.refresh(dataset)
+                logger.info(f"{dataset}: {before} -> {self.data_cache.last_date(dataset)}")
+            except Exception as e:
+                logger.exception(f"更新 {dataset} 失敗: {e}")
+                failed[dataset] = str(e)
+
+        if failed:
+            summary = "; ".join(f"{name}: {error}" for name, error in failed.items())
+            raise RuntimeError(f"{len(failed)}/{len(targets)} 個 dataset 更新失敗 - {summary}")
+
+if __name__ == "__main__":
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(root_dir)
+
+    parser = argparse.ArgumentParser(description="Run DataRefresher")
+    args = parser.parse_args()
+    logger.info(f"args: {args}")
+
+    # 初始化通知管理器
+    config_loader = ConfigLoader(os.path.join(root_dir, "config.yaml"))
+    notifier = create_notification_manager(config_loader.config.get('notification', {}), logger)
+
+    try:
+        data_refresher = DataRefresher()
+        data_refresher.refresh_all()
+    except Exception as e:
+        logger.exception(e)
+
+        # 發送錯誤通知
+        notifier.send_error(
+            task_name="資料快取更新",
+            error_message=str(e),
+            error_traceback=traceback.format_exc()
+        )
+
+    # python -m jobs.data_refresher
@@ -1,12 +1,17 @@
 import argparse
 import datetime
+import inspect
 import logging
 import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
 from utils.logger_manager import LoggerManager
-from utils.authentication import Authenticator
+from utils.order_capture import OrderCapture
+from utils.authentication import Authenticator, login_broker_for_user
 from utils.config_loader import ConfigLoader
+from utils.data_cache import apply_data_cache
+from utils.position_snapshot import create_position_snapshot_store, current_data_date, strategy_fingerprint
 from utils.reservation_handler import ReservationHandlerFactory
 from utils.finlab_patcher import apply_finlab_patches  # 自動修補 finlab
 from utils.notifier import create_notification_manager
@@ -19,7 +24,129 @@ apply_finlab_patches()
 
 logger = logging.getLogger(__name__)
 
-class OrderExecutor:
+class StrategyReportLoader:
+    """載入策略持倉 report (需要 self.snapshot_store)"""
+
+    def load_report(self, strategy_class_name):
+        """優先載入前一晚回測保存的持倉快照，快照不存在或過期時才重新執行策略"""
+        if self.snapshot_store is not None:
+            strategy_class = self.load_strategy_class(strategy_class_name)
+            # 不帶建構參數: 只接受完整精度、完整歷史回測保存的快照
+            fingerprint = strategy_fingerprint(strategy_class)
+            data_date = current_data_date()
+            report = self.snapshot_store.load(strategy_class_name, data_date, fingerprint)
+            if report is not None:
+                return report
+            logger.info(f"持倉快照不可用，重新執行策略: {strategy_class_name} @ {data_date}")
+
+        strategy = self.load_strategy(strategy_class_name)
+        return strategy.run_strategy()
+
+    def load_strategy(self, strategy_class_name):
+        """下單只需要最後幾天的持倉，策略支援 live 模式時只計算最近的資料視窗"""
+        strategy_class = self.load_strategy_class(strategy_class_name)
+        if 'live' in inspect.signature(strategy_class.__init__).parameters:
+            return strategy_class(live=True)
+        return strategy_class()
+
+    def load_strategy_class(self, strategy_class_name):
+        if strategy_class_name == 'TibetanMastiffTWStrategy':
+            from strategy_class.tibetanmastiff_tw_strategy import TibetanMastiffTWStrategy as strategy_class
+        elif strategy_class_name == 'PeterWuStrategy':
+            from strategy_class.peterwu_tw_strategy import PeterWuStrategy as strategy_class
+        elif strategy_class_name == 'AlanTWStrategyACE':
+            from strategy_class.alan_tw_strategy_ACE import AlanTWStrategyACE as strategy_class
+        elif strategy_class_name == 'RAndDManagementStrategy':
+            from strategy_class.r_and_d_management_strategy import RAndDManagementStrategy as strategy_class
+        else:
+            raise ValueError(f"Unknown strategy class: {strategy_class_name}")
+        return strategy_class
+
+
+class AccountOrderSync:
+    """單一帳戶的 portfolio 同步、警示股圈存與下單紀錄 (可在多個 thread 同時執行)"""
+
+    def __init__(self, user_name, broker_name, account, user_constants, extra_bid_pct, view_only,
+                 order_timestamp, stock_mapper):
+        self.user_name = user_name
+        self.broker_name = broker_name
+        self.account = account
+        self.user_constants = user_constants
+        self.extra_bid_pct = extra_bid_pct
+        self.view_only = view_only
+        self.order_timestamp = order_timestamp
+        self.stock_mapper = stock_mapper
+
+        self.order_dao = OrderDAO()
+        self.account_dao = AccountDAO()
+
+    def sync(self, report):
+        """
+        依 report 同步帳戶持倉並寫入下單紀錄
+
+        Returns:
+            int: 下單筆數
+        """
+        port = Portfolio({
+            'strategy': (report, 1.0),
+        })
+        pm_name = f"{self.user_name}_{self.broker_name}"
+        try:
+            pm = PortfolioSyncManager.from_local(name=pm_name)
+        except FileNotFoundError:
+            pm = PortfolioSyncManager()
+
+        total_balance = self.account.get_total_balance()
+        logger.info(f"{pm_name} Total balance: {total_balance}")
+        if total_balance <= 0:
+            raise ValueError(f"{self.user_name}'s total balance is not positive. Please check your {self.broker_name} account balance.")
+
+        safety_weight = self.user_constants.get("rebalance_safety_weight")
+        pm.update(port, total_balance=total_balance, rebalance_safety_weight=safety_weight, odd_lot=True, force_override_difference=True, smooth_transition=False)
+        pm.to_local(name=pm_name)
+
+        # 下單與警示股訊息在執行當下擷取為結構化紀錄，不需事後重新解析日誌檔
+        with OrderCapture() as capture:
+            # 創建 order_executor（不實際下單，只用來顯示警示股）
+            order_executor = pm.create_order_executor(self.account)
+            order_executor.show_alerting_stocks()
+
+            # 處理警示股圈存
+            if not self.view_only:
+                self._handle_alerting_stocks_reservation(capture.alerting_stocks)
+
+            # 執行同步下單（會打印完整下單資訊）
+            pm.sync(self.account, extra_bid_pct=self.extra_bid_pct, view_only=self.view_only)
+        logger.info(f"{pm_name} Portfolio synced")
+
+        if not capture.orders:
+            logger.warning(f"{pm_name} Today not have any order")
+            return 0
+
+        for order in capture.orders:
+            order.stock_name = self.stock_mapper.map(order.stock_id)
+
+        account_id = self.account_dao.get_account_id(pm_name, broker_name=self.broker_name, user_name=self.user_name)
+        return self.order_dao.insert_order_logs(
+            (order.to_dict() for order in capture.orders),
+            account_id, self.order_timestamp, view_only=self.view_only
+        )
+
+    def _handle_alerting_stocks_reservation(self, alerting_stocks):
+        """
+        處理警示股圈存（使用策略模式支援多券商）
+
+        Args:
+            alerting_stocks (list[AlertingStockRecord]): show_alerting_stocks 擷取到的警示股
+        """
+        # 建立對應券商的圈存處理器
+        handler = ReservationHandlerFactory.create(self.broker_name, self.account)
+
+        # 執行圈存
+        handler.handle_alerting_stocks([stock.to_dict() for stock in alerting_stocks])
+
+
+class OrderExecutor(StrategyReportLoader):
     def __init__(self, user_name, broker_name, extra_bid_pct, view_only, config_path="config.yaml", base_log_directory="logs"):
         self.user_name = user_name
         self.broker_name = broker_name
@@ -41,126 +168,195 @@ class OrderExecutor:
         )
         self.log_file = self.logger_manager.setup_logging()
         logger.info(f"user_name: {self.user_name}, broker_name: {self.broker_name}")
+        apply_data_cache(self.config_loader.config.get('data_cache', {}))
+        self.snapshot_store = create_position_snapshot_store(self.config_loader.config.get('position_snapshot', {}))
 
-        self.order_dao = OrderDAO()
-        self.account_dao = AccountDAO()
         self.stock_mapper = StockMapper()
 
     def run_strategy_and_sync(self):
         strategy_class_name = self.config_loader.get_user_constant("strategy_class_name")
-        strategy = self.load_strategy(strategy_class_name)
-        report = strategy.run_strategy()
+        report = self.load_report(strategy_class_name)
 
-        port = Portfolio({
-            'strategy': (report, 1.0),
-        })
-        pm_name = f"{self.user_name}_{self.broker_name}"
-        try:
-            pm = PortfolioSyncManager.from_local(name=pm_name)
-        except FileNotFoundError:
-            pm = PortfolioSyncManager()
+        account_sync = AccountOrderSync(
+            self.user_name, self.broker_name, self.account, self.config_loader.user_constants,
+            self.extra_bid_pct, self.view_only, self.order_timestamp, self.stock_mapper
+        )
+        account_sync.sync(report)
 
-        total_balance = self.account.get_total_balance()
-        logger.info(f"Total balance: {total_balance}")
-        if total_balance <= 0:
-            raise ValueError(f"{self.user_name}'s total balance is not positive. Please check your {self.broker_name} account balance.")
 
-        safety_weight = self.config_loader.get_user_constant("rebalance_safety_weight")
-        pm.update(port, total_balance=total_balance, rebalance_safety_weight=safety_weight, odd_lot=True, force_override_difference=True, smooth_transition=False)
-        pm.to_local(name=pm_name)
+class MultiAccountOrderExecutor(StrategyReportLoader):
+    """
+    一次為多個帳戶同步下單
 
-        # 創建 order_executor（不實際下單，只用來顯示警示股）
-        order_executor = pm.create_order_executor(self.account)
-        order_executor.show_alerting_stocks()
+    - 每個策略的 report 只載入一次 (快照或重跑策略)，使用相同策略的帳戶共用
+    - 券商帳密經由 os.environ / keyring 傳給券商 SDK (行程共用)，登入依序執行 (見 login_broker_for_user)
+    - 登入後的 pm.update / 警示股圈存 / pm.sync 在 thread pool 中同時進行；finlab 的 print 導向與
+      下單擷取都以 contextvars 區分 thread (見 utils/finlab_patcher.py、utils/order_capture.py)
+    - 單一帳戶失敗不影響其他帳戶
+    """
 
-        # 處理警示股圈存
-        if not self.view_only:
-            self._handle_alerting_stocks_reservation()
+    def __init__(self, accounts, extra_bid_pct, view_only, config_path="config.yaml", base_log_directory="logs", max_workers=None):
+        self.accounts = list(accounts)
+        self.extra_bid_pct = extra_bid_pct
+        self.view_only = view_only
+        self.config_path = config_path
+        self.max_workers = max_workers or max(1, len(self.accounts))
 
-        # 執行同步下單（會打印完整下單資訊）
-        pm.sync(self.account, extra_bid_pct=self.extra_bid_pct, view_only=self.view_only)
-        logger.info("Portfolio synced")
+        self.config_loader = ConfigLoader(config_path)
+        self.config_loader.load_global_env_vars()
 
-        order_logs = self.logger_manager.extract_order_logs(self.log_file)
+        self.auth = Authenticator(self.config_loader)
+        self.auth.login_finlab()
 
-        if not order_logs:
-            logger.warning("Today not have any order")
-            return
-        else:
+        self.order_timestamp = datetime.datetime.now(ZoneInfo("Asia/Taipei"))
+        self.logger_manager = LoggerManager(
+            base_log_directory=base_log_directory,
+            current_datetime=self.order_timestamp
+        )
+        self.log_file = self.logger_manager.setup_logging()
+        logger.info(f"accounts: {self.accounts}")
+        apply_data_cache(self.config_loader.config.get('data_cache', {}))
+        self.snapshot_store = create_position_snapshot_store(self.config_loader.config.get('position_snapshot', {}))
 
-            for order in order_logs:
-                order['stock_name'] = self.stock_mapper.map(order['stock_id'])
+        self.stock_mapper = StockMapper()
 
-            account_name = self.user_name+"_"+self.broker_name
-            account_id = self.account_dao.get_account_id(account_name, broker_name=self.broker_name, user_name=self.user_name)
-            self.order_dao.insert_order_logs(order_logs, account_id, self.order_timestamp, view_only=self.view_only)
+    def load_reports(self, strategy_class_names):
+        """
+        依序載入每個策略的 report (每個策略只載入一次)
 
+        Returns:
+            tuple: ({策略名稱: report}, {策略名稱: (例外, traceback)})
+        """
+        reports, failed = {}, {}
+        for strategy_class_name in dict.fromkeys(strategy_class_names):
+            try:
+                reports[strategy_class_name] = self.load_report(strategy_class_name)
+            except Exception as e:
+                logger.exception(f"載入策略失敗: {strategy_class_name}: {e}")
+                failed[strategy_class_name] = (e, "".join(traceback.format_exception(e)))
+        return reports, failed
 
-    def _handle_alerting_stocks_reservation(self):
-        """處理警示股圈存（使用策略模式支援多券商）"""
-        # 從 log 提取警示股資訊
-        alerting_stocks = self.logger_manager.extract_alerting_stocks(self.log_file)
+    def run_account(self, user_name, broker_name, user_constants, report):
+        """登入並同步單一帳戶"""
+        start_time = datetime.datetime.now(ZoneInfo("Asia/Taipei"))
+        account = login_broker_for_user(self.config_path, user_name, broker_name)
+        account_sync = AccountOrderSync(
+            user_name, broker_name, account, user_constants,
+            self.extra_bid_pct, self.view_only, self.order_timestamp, self.stock_mapper
+        )
+        order_count = account_sync.sync(report)
+        elapsed = datetime.datetime.now(ZoneInfo("Asia/Taipei")) - start_time
+        logger.info(f"完成下單: {user_name}/{broker_name} {order_count} 筆 (耗時 {elapsed.total_seconds():.1f} 秒)")
 
-        # 建立對應券商的圈存處理器
-        handler = ReservationHandlerFactory.create(self.broker_name, self.account)
+    def run(self):
+        """
+        同時同步所有帳戶
 
-        # 執行圈存
-        handler.handle_alerting_stocks(alerting_stocks)
+        Returns:
+            dict: {(user_name, broker_name): (例外, traceback)}，全部成功時為空 dict
+        """
+        constants = {
+            (user_name, broker_name): self.config_loader.get_user_constants(user_name, broker_name)
+            for user_name, broker_name in self.accounts
+        }
+        reports, failed_reports = self.load_reports(
+            user_constants.get("strategy_class_name") for user_constants in constants.values()
+        )
 
-    def load_strategy(self, strategy_class_name):
-        if strategy_class_name == 'TibetanMastiffTWStrategy':
-            from strategy_class.tibetanmastiff_tw_strategy import TibetanMastiffTWStrategy as strategy_class
-        elif strategy_class_name == 'PeterWuStrategy':
-            from strategy_class.peterwu_tw_strategy import PeterWuStrategy as strategy_class
-        elif strategy_class_name == 'AlanTWStrategyACE':
-            from strategy_class.alan_tw_strategy_ACE import AlanTWStrategyACE as strategy_class
-        elif strategy_class_name == 'RAndDManagementStrategy':
-            from strategy_class.r_and_d_management_strategy import RAndDManagementStrategy as strategy_class
-        else:
-            raise ValueError(f"Unknown strategy class: {strategy_class_name}")
-        return strategy_class()
+        failed = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="order") as pool:
+            futures = {}
+            for (user_name, broker_name), user_constants in constants.items():
+                strategy_class_name = user_constants.get("strategy_class_name")
+                if strategy_class_name in failed_reports:
+                    failed[(user_name, broker_name)] = failed_reports[strategy_class_name]
+                    continue
+                future = pool.submit(self.run_account, user_name, broker_name, user_constants, reports[strategy_class_name])
+                futures[future] = (user_name, broker_name)
+
+            for future, (user_name, broker_name) in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception(f"下單失敗: {user_name}/{broker_name}: {e}")
+                    failed[(user_name, broker_name)] = (e, "".join(traceback.format_exception(e)))
+        return failed
 
 if __name__ == "__main__":
     root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(root_dir)
 
     parser = argparse.ArgumentParser(description="Run OrderExecutor")
-    parser.add_argument("--user_name", required=True, help="User name (e.g., junting)")
-    parser.add_argument("--broker_name", required=True, help="Broker name (e.g., fugle)")
+    parser.add_argument("--user_name", help="User name (e.g., junting)")
+    parser.add_argument("--broker_name", help="Broker name (e.g., fugle)")
+    parser.add_argument("--all-accounts", dest="all_accounts", action='store_true',
+                        help="同時為 config.yaml 中 users 下的所有帳戶下單")
     parser.add_argument("--extra_bid_pct", type=float, default=0.0,
                         help="Extra bid percentage (e.g., 0.01)")
     parser.add_argument("--view_only", action='store_true', help="Run in view-only mode")
 
     args = parser.parse_args()
+    if not args.all_accounts and not (args.user_name and args.broker_name):
+        parser.error("--user_name 與 --broker_name 為必填 (或使用 --all-accounts)")
     logger.info(f"args: {args}")
 
     # 初始化通知管理器
     config_loader = ConfigLoader(os.path.join(root_dir, "config.yaml"))
     notifier = create_notification_manager(config_loader.config.get('notification', {}), logger)
+    task_name = "尾盤下單" if args.extra_bid_pct > 0 else "早盤下單"
 
-    try:
-        order_executor = OrderExecutor(
-            user_name=args.user_name,
-            broker_name=args.broker_name,
-            extra_bid_pct=args.extra_bid_pct,
-            view_only=args.view_only,
-            config_path = os.path.join(root_dir, "config.yaml"),
-            base_log_directory = os.path.join(root_dir, "logs")
-        )
-        order_executor.run_strategy_and_sync()
-    except Exception as e:
-        logger.exception(e)
-
-        # 發送錯誤通知
-        task_name = "尾盤下單" if args.extra_bid_pct > 0 else "早盤下單"
-        notifier.send_error(
-            task_name=task_name,
-            error_message=str(e),
-            user_name=args.user_name,
-            broker_name=args.broker_name,
-            error_traceback=traceback.format_exc()
-        )
+    if args.all_accounts:
+        try:
+            order_executor = MultiAccountOrderExecutor(
+                accounts=config_loader.get_all_accounts(),
+                extra_bid_pct=args.extra_bid_pct,
+                view_only=args.view_only,
+                config_path=os.path.join(root_dir, "config.yaml"),
+                base_log_directory=os.path.join(root_dir, "logs")
+            )
+            failed = order_executor.run()
+        except Exception as e:
+            logger.exception(e)
+            notifier.send_error(
+                task_name=task_name,
+                error_message=str(e),
+                error_traceback=traceback.format_exc()
+            )
+            failed = {}
+
+        # 各帳戶分別發送錯誤通知
+        for (user_name, broker_name), (error, error_traceback) in failed.items():
+            notifier.send_error(
+                task_name=task_name,
+                error_message=str(error),
+                user_name=user_name,
+                broker_name=broker_name,
+                error_traceback=error_traceback
+            )
+    else:
+        try:
+            order_executor = OrderExecutor(
+                user_name=args.user_name,
+                broker_name=args.broker_name,
+                extra_bid_pct=args.extra_bid_pct,
+                view_only=args.view_only,
+                config_path = os.path.join(root_dir, "config.yaml"),
+                base_log_directory = os.path.join(root_dir, "logs")
+            )
+            order_executor.run_strategy_and_sync()
+        except Exception as e:
+            logger.exception(e)
+
+            # 發送錯誤通知
+            notifier.send_error(
+                task_name=task_name,
+                error_message=str(e),
+                user_name=args.user_name,
+                broker_name=args.broker_name,
+                error_traceback=traceback.format_exc()
+            )
 
     # python -m jobs.order_executor --user_name junting --broker_name fugle --extra_bid_pct 0 --view_only
     # python -m jobs.order_executor --user_name junting --broker_name shioaji --extra_bid_pct 0 --view_only
     # python -m jobs.order_executor --user_name alan --broker_name shioaji --extra_bid_pct 0 --view_only
+    # python -m jobs.order_executor --all-accounts --extra_bid_pct 0 --view_only
@@ -2,11 +2,13 @@
 import datetime
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
 from jobs.balance_fetcher import BalanceFetcherBase
 from jobs.inventory_fetcher import InventoryFetcher
-from utils.authentication import Authenticator
+from utils.authentication import Authenticator, login_broker_for_user
 from utils.config_loader import ConfigLoader
+from utils.data_cache import apply_data_cache
 from utils.logger_manager import LoggerManager
 from utils.notifier import create_notification_manager
 
@@ -32,6 +34,7 @@ class Scheduler:
         )
         self.log_file = self.logger_manager.setup_logging()
         logger.info(f"user_name: {self.user_name}, broker_name: {self.broker_name}")
+        apply_data_cache(self.config_loader.config.get('data_cache', {}))
 
     def run(self):
         inventory_fetcher = InventoryFetcher.create(self.user_name, self.broker_name, self.account, self.fetch_timestamp)
@@ -40,6 +43,72 @@ class Scheduler:
         balance_data = balance_fetcher.fetch_and_save()
 
 
+class MultiAccountScheduler:
+    """
+    一次抓取多個帳戶的持股與帳戶資訊
+
+    券商登入需要的帳密是透過 os.environ / keyring 傳給券商 SDK (行程共用)，
+    因此「載入帳戶設定 + 登入」依序執行 (見 login_broker_for_user)；登入後的持股、
+    餘額抓取則在 thread pool 中同時進行。單一帳戶失敗不影響其他帳戶。
+    """
+
+    def __init__(self, accounts, config_path="config.yaml", base_log_directory="logs", max_workers=None):
+        self.accounts = list(accounts)
+        self.config_path = config_path
+        self.max_workers = max_workers or max(1, len(self.accounts))
+
+        self.config_loader = ConfigLoader(config_path)
+        self.config_loader.load_global_env_vars()
+
+        self.auth = Authenticator(self.config_loader)
+        self.auth.login_finlab()
+
+        self.fetch_timestamp = datetime.datetime.now(ZoneInfo("Asia/Taipei"))
+        self.logger_manager = LoggerManager(
+            base_log_directory=base_log_directory,
+            current_datetime=self.fetch_timestamp,
+        )
+        self.log_file = self.logger_manager.setup_logging()
+        logger.info(f"accounts: {self.accounts}")
+        apply_data_cache(self.config_loader.config.get('data_cache', {}))
+
+    def login(self, user_name, broker_name):
+        """載入帳戶設定並登入券商"""
+        return login_broker_for_user(self.config_path, user_name, broker_name)
+
+    def run_account(self, user_name, broker_name):
+        """登入並抓取單一帳戶"""
+        start_time = datetime.datetime.now(ZoneInfo("Asia/Taipei"))
+        account = self.login(user_name, broker_name)
+        inventory_fetcher = InventoryFetcher.create(user_name, broker_name, account, self.fetch_timestamp)
+        inventory_fetcher.fetch_and_save()
+        balance_fetcher = BalanceFetcherBase(user_name, broker_name, account, self.fetch_timestamp)
+        balance_fetcher.fetch_and_save()
+        elapsed = datetime.datetime.now(ZoneInfo("Asia/Taipei")) - start_time
+        logger.info(f"完成抓取: {user_name}/{broker_name} (耗時 {elapsed.total_seconds():.1f} 秒)")
+
+    def run(self):
+        """
+        同時抓取所有帳戶
+
+        Returns:
+            dict: {(user_name, broker_name): (例外, traceback)}，全部成功時為空 dict
+        """
+        failed = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as pool:
+            futures = {
+                pool.submit(self.run_account, user_name, broker_name): (user_name, broker_name)
+                for user_name, broker_name in self.accounts
+            }
+            for future, (user_name, broker_name) in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception(f"抓取失敗: {user_name}/{broker_name}: {e}")
+                    failed[(user_name, broker_name)] = (e, "".join(traceback.format_exception(e)))
+        return failed
+
+
 if __name__ == "__main__":
     import argparse
     import os
@@ -48,36 +117,68 @@ if __name__ == "__main__":
     os.chdir(root_dir)
 
     parser = argparse.ArgumentParser(description="Fetch inventory data from broker API")
-    parser.add_argument("--user_name", required=True, help="User name (e.g., junting)")
-    parser.add_argument("--broker_name", required=True, help="Broker name (e.g., fugle or shioaji)")
+    parser.add_argument("--user_name", help="User name (e.g., junting)")
+    parser.add_argument("--broker_name", help="Broker name (e.g., fugle or shioaji)")
+    parser.add_argument("--all-accounts", dest="all_accounts", action='store_true',
+                        help="同時抓取 config.yaml 中 users 下的所有帳戶")
 
     args = parser.parse_args()
+    if not args.all_accounts and not (args.user_name and args.broker_name):
+        parser.error("--user_name 與 --broker_name 為必填 (或使用 --all-accounts)")
     logger.info(f"args: {args}")
 
     # 初始化通知管理器
     config_loader = ConfigLoader(os.path.join(root_dir, "config.yaml"))
     notifier = create_notification_manager(config_loader.config.get('notification', {}), logger)
 
-    try:
-        scheduler = Scheduler(
-            user_name=args.user_name,
-            broker_name=args.broker_name,
-            config_path = os.path.join(root_dir, "config.yaml"),
-            base_log_directory = os.path.join(root_dir, "logs")
-        )
-        scheduler.run()
-    except Exception as e:
-        logger.exception(e)
-
-        # 發送錯誤通知
-        notifier.send_error(
-            task_name="帳務資料抓取",
-            error_message=str(e),
-            user_name=args.user_name,
-            broker_name=args.broker_name,
-            error_traceback=traceback.format_exc()
-        )
+    if args.all_accounts:
+        try:
+            scheduler = MultiAccountScheduler(
+                accounts=config_loader.get_all_accounts(),
+                config_path=os.path.join(root_dir, "config.yaml"),
+                base_log_directory=os.path.join(root_dir, "logs")
+            )
+            failed = scheduler.run()
+        except Exception as e:
+            logger.exception(e)
+            notifier.send_error(
+                task_name="帳務資料抓取",
+                error_message=str(e),
+                error_traceback=traceback.format_exc()
+            )
+            failed = {}
+
+        # 各帳戶分別發送錯誤通知
+        for (user_name, broker_name), (error, error_traceback) in failed.items():
+            notifier.send_error(
+                task_name="帳務資料抓取",
+                error_message=str(error),
+                user_name=user_name,
+                broker_name=broker_name,
+                error_traceback=error_traceback
+            )
+    else:
+        try:
+            scheduler = Scheduler(
+                user_name=args.user_name,
+                broker_name=args.broker_name,
+                config_path = os.path.join(root_dir, "config.yaml"),
+                base_log_directory = os.path.join(root_dir, "logs")
+            )
+            scheduler.run()
+        except Exception as e:
+            logger.exception(e)
+
+            # 發送錯誤通知
+            notifier.send_error(
+                task_name="帳務資料抓取",
+                error_message=str(e),
+                user_name=args.user_name,
+                broker_name=args.broker_name,
+                error_traceback=traceback.format_exc()
+            )
 
     # python -m jobs.scheduler --user_name junting --broker_name fugle
     # python -m jobs.scheduler --user_name junting --broker_name shioaji
+    # python -m jobs.scheduler --all-accounts
         
\ No newline at end of file
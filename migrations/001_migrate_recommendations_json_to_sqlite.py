@@ -71,35 +71,17 @@ class RecommendationMigration:
         else:
             raise ValueError(f"Cannot infer frequency from filename: {json_path}")
     
-    def migrate_json_file(self, json_path: str) -> int:
+    def _iter_records(self, dao: RecommendationDAO, data: list):
         """
-        Migrate a single JSON file to database
+        Yield RecommendationRecord to be written, applying the merge strategy
         
         Args:
-            json_path: Path to JSON file
-            
-        Returns:
-            Number of records migrated
+            dao: Frequency-specific RecommendationDAO
+            data: Items loaded from the JSON file
         """
-        if not os.path.exists(json_path):
-            logger.warning(f"JSON file not found: {json_path}")
-            return 0
-        
-        # Infer frequency from filename
-        frequency = self._infer_frequency(json_path)
-        logger.info(f"Processing: {json_path} (frequency={frequency})")
-        
-        # Create DAO with frequency filter
-        dao = RecommendationDAO(db_path=self.db_path, frequency=frequency)
-        
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to read JSON file {json_path}: {e}")
-            return 0
-        
-        records_migrated = 0
+        # Records already yielded in this file (not yet visible via get_by_date
+        # until add_records flushes the chunk)
+        pending = {}
         
         for item in data:
             try:
@@ -122,7 +104,7 @@ class RecommendationMigration:
                         continue
                 
                 # Check if record already exists
-                existing_record = dao.get_by_date(date)
+                existing_record = pending.get(date) or dao.get_by_date(date)
                 if existing_record:
                     if self.merge_strategy == "skip":
                         logger.info(f"Record for {date} already exists, skipping")
@@ -139,19 +121,52 @@ class RecommendationMigration:
                         self.migration_stats['merged_records'] += 1
                         logger.info(f"  Added {len(new_stocks)} new stocks, total: {len(stocks)}")
                 
-                # Create and save record
                 record = RecommendationRecord(date=date, stocks=stocks)
-                dao.add_record(record)
-                
-                records_migrated += 1
-                self.migration_stats['total_stocks'] += len(stocks)
-                
-                logger.info(f"✓ Migrated {date}: {len(stocks)} stocks")
                 
             except Exception as e:
                 logger.error(f"Failed to migrate record: {item.get('date', 'UNKNOWN')}, error: {e}")
                 self.migration_stats['skipped_records'] += 1
                 continue
+            
+            pending[date] = record
+            self.migration_stats['total_stocks'] += len(stocks)
+            logger.info(f"✓ Migrated {date}: {len(stocks)} stocks")
+            yield record
+    
+    def migrate_json_file(self, json_path: str) -> int:
+        """
+        Migrate a single JSON file to database
+        
+        Args:
+            json_path: Path to JSON file
+            
+        Returns:
+            Number of records migrated
+        """
+        if not os.path.exists(json_path):
+            logger.warning(f"JSON file not found: {json_path}")
+            return 0
+        
+        # Infer frequency from filename
+        frequency = self._infer_frequency(json_path)
+        logger.info(f"Processing: {json_path} (frequency={frequency})")
+        
+        # Create DAO with frequency filter
+        dao = RecommendationDAO(db_path=self.db_path, frequency=frequency)
+        
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read JSON file {json_path}: {e}")
+            return 0
+        
+        try:
+            # Stream records into a single transaction, written in executemany batches
+            records_migrated = dao.add_records(self._iter_records(dao, data))
+        except Exception as e:
+            logger.error(f"Failed to write records from {json_path}, transaction rolled back: {e}")
+            return 0
         
         self.migration_stats['total_records'] += records_migrated
         self.migration_stats['files_processed'] += 1
@@ -0,0 +1,96 @@
+"""
+Migration Script: assets/ backtest reports → report_catalog
+Date: 2026-10-18
+Description: Register backtest HTML reports saved before report_catalog existed
+
+This script:
+1. Scans assets/<strategy>/<YYYY-MM-DD_HH-MM-SS>.html (or .html.gz when stored compressed)
+2. Inserts strategy, timestamp, path and size into report_catalog
+   (headline metrics are only available for reports saved by BacktestExecutor)
+3. Validates that every scanned report is cataloged
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dao.report_catalog_dao import ReportCatalogDAO
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+REPORT_FILENAME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+
+def iter_reports(assets_dir):
+    """
+    Yield (strategy_name, report_timestamp, relative_path, size_bytes) for every report
+
+    Args:
+        assets_dir: Root directory of saved reports
+    """
+    for strategy_name in sorted(os.listdir(assets_dir)):
+        strategy_dir = os.path.join(assets_dir, strategy_name)
+        if not os.path.isdir(strategy_dir):
+            continue
+
+        for filename in sorted(os.listdir(strategy_dir)):
+            # Compressed reports are cataloged under their .html name (served by /reports/)
+            report_name = filename[:-len(".gz")] if filename.endswith(".html.gz") else filename
+            if not report_name.endswith(".html"):
+                continue
+            try:
+                report_timestamp = datetime.strptime(report_name[:-len(".html")], REPORT_FILENAME_FORMAT)
+            except ValueError:
+                logger.warning(f"Skipping file with unexpected name: {strategy_name}/{filename}")
+                continue
+
+            path = os.path.join(strategy_dir, filename)
+            yield strategy_name, report_timestamp, f"{strategy_name}/{report_name}", os.path.getsize(path)
+
+
+def main():
+    """Main migration function"""
+    logger.info("="*60)
+    logger.info("REPORT CATALOG BACKFILL: assets/ → SQLite")
+    logger.info(f"Timestamp: {datetime.now(ZoneInfo('Asia/Taipei')).isoformat()}")
+    logger.info("="*60)
+
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assets_dir = os.path.join(root_dir, "assets")
+    if not os.path.isdir(assets_dir):
+        logger.warning(f"Assets directory not found: {assets_dir}")
+        return 0
+
+    dao = ReportCatalogDAO(db_path=os.path.join(root_dir, "data_prod.db"))
+
+    count = 0
+    for strategy_name, report_timestamp, path, size_bytes in iter_reports(assets_dir):
+        # Existing metrics are kept (upsert only fills missing values)
+        dao.upsert_report(strategy_name, report_timestamp, path, size_bytes)
+        count += 1
+
+    # Validate migration
+    _, cataloged = dao.get_reports_page(page_size=1)
+    logger.info(f"Reports scanned:    {count}")
+    logger.info(f"Reports cataloged:  {cataloged}")
+
+    if cataloged < count:
+        logger.error("\n❌ Some reports are missing from report_catalog")
+        return 1
+
+    logger.info("\n✅ Backfill completed successfully!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
 from dao.account_dao import AccountDAO
+from service.result_cache import versioned_cache
 
 class AccountService:
     def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
         self.account_dao = AccountDAO(db_path=db_path)
 
     
+    @versioned_cache("account")
     def get_all_accounts(self):
         accounts = self.account_dao.get_all_accounts()
         return accounts
@@ -1,11 +1,14 @@
 from dao.balance_dao import BalanceDAO
+from service.result_cache import versioned_cache
 import datetime
 from zoneinfo import ZoneInfo
 
 class BalanceService:
-    def __init__(self):
-        self.balance_dao = BalanceDAO()
+    def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
+        self.balance_dao = BalanceDAO(db_path=db_path)
     
+    @versioned_cache("balance_history")
     def get_balance_history(self, account_id, start_date, end_date):
         """
         獲取指定日期範圍內的餘額歷史
@@ -20,6 +23,7 @@ class BalanceService:
         """
         return self.balance_dao.get_balance_history(account_id, start_date, end_date)
     
+    @versioned_cache("balance_history")
     def get_latest_balance(self, account_id):
         """
         獲取帳戶最新的餘額記錄
@@ -32,6 +36,7 @@ class BalanceService:
         """
         return self.balance_dao.get_latest_balance(account_id)
     
+    @versioned_cache("balance_history")
     def get_balance_trend_data(self, account_id, start_date, end_date):
         """
         獲取資金水位趨勢圖所需數據
@@ -72,13 +77,16 @@ class BalanceService:
         Returns:
             tuple: (熱力圖數據列表, 年份列表, 最大回報率, 最小回報率)
         """
-        # 設置默認年份範圍
+        # 默認年份在快取外決定，跨年後不會沿用以舊年份計算的結果
         current_year = datetime.datetime.now(ZoneInfo("Asia/Taipei")).year
         if start_year is None:
             start_year = current_year - 3
         if end_year is None:
             end_year = current_year
-        
+        return self._get_monthly_return_data(account_id, int(start_year), int(end_year))
+
+    @versioned_cache("balance_history")
+    def _get_monthly_return_data(self, account_id, start_year, end_year):
         # 獲取每月首日和末日的餘額數據
         monthly_data = self.balance_dao.get_monthly_balance_data(account_id, start_year, end_year)
         
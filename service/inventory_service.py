@@ -1,9 +1,13 @@
 from dao.inventory_dao import InventoryDAO
+from dao.paging import normalize_page, page_count
+from service.result_cache import versioned_cache
 
 class InventoryService:
-    def __init__(self):
-        self.inventory_dao = InventoryDAO()
+    def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
+        self.inventory_dao = InventoryDAO(db_path=db_path)
 
+    @versioned_cache("inventory_history")
     def get_inventories_by_account_and_date(self, account_id, query_date):
         raw_inventories = self.inventory_dao.get_inventories_by_account_and_date(account_id, query_date)
         filtered_inventories = []
@@ -15,4 +19,21 @@ class InventoryService:
                 "last_price": inventory.get("last_price"),
                 "pnl": inventory.get("pnl")
             })
-        return filtered_inventories
\ No newline at end of file
+        return filtered_inventories
+
+    @versioned_cache("inventory_history")
+    def get_inventories_page(self, account_id, query_date, page_current=0, page_size=10, sort_by=(), filter_query=None):
+        """
+        取得庫存表格的一頁資料，只包含當天最後一次擷取的庫存
+        
+        Args:
+            sort_by (tuple): ((欄位, 'asc' | 'desc'), ...)
+        
+        Returns:
+            dict: {'data': 當頁資料, 'page_count': 總頁數, 'total': 總筆數}
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        inventories, total = self.inventory_dao.get_latest_inventories_page(
+            account_id, query_date, page_current, page_size, sort_by, filter_query
+        )
+        return {'data': inventories, 'page_count': page_count(total, page_size), 'total': total}
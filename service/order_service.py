@@ -1,10 +1,14 @@
 import datetime
 from dao.order_dao import OrderDAO
+from dao.paging import normalize_page, page_count
+from service.result_cache import versioned_cache
 
 class OrderService:
     def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
         self.order_dao = OrderDAO(db_path=db_path)
 
+    @versioned_cache("order_history")
     def get_orders_by_account_and_date(self, account_id, query_date):
         raw_orders = self.order_dao.get_orders_by_account_and_date(account_id, query_date)
         filtered_orders = []
@@ -22,16 +26,36 @@ class OrderService:
             })
         return filtered_orders
     
+    @versioned_cache("order_history")
+    def get_orders_page(self, account_id, query_date, page_current=0, page_size=10, sort_by=(), filter_query=None):
+        """
+        取得訂單表格的一頁資料 (DataTable page_action/sort_action/filter_action='custom')
+        
+        Args:
+            sort_by (tuple): ((欄位, 'asc' | 'desc'), ...)
+        
+        Returns:
+            dict: {'data': 當頁資料, 'page_count': 總頁數, 'total': 總筆數}
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        orders, total = self.order_dao.get_orders_page(
+            account_id, query_date, page_current, page_size, sort_by, filter_query
+        )
+        return {'data': orders, 'page_count': page_count(total, page_size), 'total': total}
+    
+    @versioned_cache("order_history")
     def get_available_years(self, account_id):
         """取得可用年份並轉成下拉選單格式"""
         years = self.order_dao.get_available_years(account_id)
         return [{'label': year, 'value': year} for year in years]
     
+    @versioned_cache("order_history")
     def get_available_months(self, account_id, year):
         """取得可用月份並轉成下拉選單格式"""
         months = self.order_dao.get_available_months(account_id, year)
         return [{'label': month, 'value': month} for month in months]
     
+    @versioned_cache("order_history")
     def get_available_days(self, account_id, year, month):
         """取得可用日期並轉成下拉選單格式"""
         days = self.order_dao.get_available_days(account_id, year, month)
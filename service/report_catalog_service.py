@@ -0,0 +1,35 @@
+from dao.paging import normalize_page, page_count
+from dao.report_catalog_dao import ReportCatalogDAO
+from service.result_cache import versioned_cache
+
+
+class ReportCatalogService:
+    def __init__(self, db_path="data_prod.db"):
+        self.db_path = db_path
+        self.report_catalog_dao = ReportCatalogDAO(db_path=db_path)
+
+    @versioned_cache("report_catalog")
+    def get_reports_page(self, page_current=0, page_size=20, sort_by=(), filter_query=None, strategy_name=None):
+        """
+        取得報告列表的一頁資料 (DataTable page_action/sort_action/filter_action='custom')
+        
+        Args:
+            sort_by (tuple): ((欄位, 'asc' | 'desc'), ...)
+            strategy_name (str, optional): 策略下拉選單選擇的策略
+        
+        Returns:
+            dict: {'data': 當頁資料, 'page_count': 總頁數, 'total': 總筆數}
+        """
+        page_current, page_size = normalize_page(page_current, page_size)
+        reports, total = self.report_catalog_dao.get_reports_page(
+            page_current, page_size, sort_by, filter_query, strategy_name
+        )
+        for report in reports:
+            # /reports/ 會優先傳送壓縮儲存的 .html.gz (見 utils/report_store.py)
+            report['link'] = f"[開啟](/reports/{report['path']})"
+        return {'data': reports, 'page_count': page_count(total, page_size), 'total': total}
+
+    @versioned_cache("report_catalog")
+    def get_strategy_options(self):
+        """取得策略下拉選單選項"""
+        return [{'label': name, 'value': name} for name in self.report_catalog_dao.get_strategy_names()]
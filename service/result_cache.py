@@ -0,0 +1,127 @@
+"""
+Service 層查詢結果快取
+Dash callback 每次切換分頁或日期都會查詢 SQLite，但資料只在 fetch / order 等工作寫入時才會變動。
+以 (方法, 參數, 資料表版本) 為 key 快取結果:
+
+- 資料表版本存放於 SQLite 的 data_versions (見 dao/data_version.py)，DAO 寫入時遞增，
+  gunicorn 多個 worker 各自有獨立快取，但都以資料庫中的版本判斷是否過期
+- 每個行程最多保留 maxsize 筆 (LRU)，以 lock 保護，可在多 thread worker 中使用
+- 回傳結果的深拷貝，呼叫端修改結果不會影響快取
+
+使用方式:
+    class BalanceService:
+        def __init__(self, db_path="data_prod.db"):
+            self.db_path = db_path
+
+        @versioned_cache("balance_history")
+        def get_latest_balance(self, account_id):
+            ...
+"""
+import copy
+import functools
+import logging
+import threading
+from collections import OrderedDict
+
+from dao.connection import get_connection
+from dao.data_version import ensure_data_versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 256
+
+
+class VersionedLRUCache:
+    """以資料表版本作為 key 一部分的 LRU 快取 (單一行程內共用)"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_result_cache = VersionedLRUCache()
+
+
+def get_table_versions(db_path, tables):
+    """一次查詢多個資料表的版本號，回傳與 tables 順序相同的 tuple (從未寫入過為 0)"""
+    ensure_data_versions(db_path)
+    placeholders = ", ".join("?" for _ in tables)
+    rows = get_connection(db_path).execute(
+        f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})",
+        tuple(tables)
+    ).fetchall()
+    versions = {row[0]: row[1] for row in rows}
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def versioned_cache(*tables, cache=None):
+    """
+    Service 方法的快取 decorator
+
+    Args:
+        *tables: 方法結果所依賴的資料表，任一資料表版本改變時快取失效
+        cache: VersionedLRUCache，預設為模組共用的快取
+
+    方法所屬物件需有 db_path 屬性；參數無法 hash 時不使用快取。
+    """
+    def decorator(method):
+        name = method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            target = cache if cache is not None else _result_cache
+            try:
+                key = (
+                    name,
+                    self.db_path,
+                    args,
+                    tuple(sorted(kwargs.items())),
+                    get_table_versions(self.db_path, tables),
+                )
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            try:
+                return copy.deepcopy(target.get(key))
+            except KeyError:
+                pass
+
+            result = method(self, *args, **kwargs)
+            target.put(key, result)
+            return copy.deepcopy(result)
+
+        return wrapper
+
+    return decorator
+
+
+def clear_result_cache():
+    """清除模組共用的快取 (測試或手動修改資料庫後使用)"""
+    _result_cache.clear()
@@ -2,6 +2,7 @@ from finlab import data
 from finlab.markets.tw import TWMarket
 from finlab.backtest import sim
 from .taiwan_kd import taiwan_kd_fast
+from .chip_flow import ChipFlowFeatures
 
 class AdjustTWMarketInfo(TWMarket):
     def get_trading_price(self, name, adj=True):
@@ -33,72 +34,21 @@ class AlanTWStrategy2:
             # 基本面數據
             self.operating_margin = data.get('fundamental_features:營業利益率')
 
+        # 籌碼面特徵 (比例、累積比例與排名只計算一次，不同 top_n 共用)
+        self.chip_flow = ChipFlowFeatures(
+            foreign_net_buy_shares=self.foreign_net_buy_shares,
+            investment_trust_net_buy_shares=self.investment_trust_net_buy_shares,
+            dealer_self_net_buy_shares=self.dealer_self_net_buy_shares,
+            top15_buy_shares=self.top15_buy_shares,
+            top15_sell_shares=self.top15_sell_shares,
+            shares_outstanding=self.shares_outstanding,
+            min_periods=None,
+        )
+
     def build_chip_buy_condition(self, top_n):
         """籌碼面買入條件 - 完全採用model2.py的邏輯"""
-        
-        # 計算外資、投信、自營商的買賣超佔發行量比例 (股數)
-        foreign_net_buy_ratio = self.foreign_net_buy_shares / self.shares_outstanding
-        investment_trust_net_buy_ratio = self.investment_trust_net_buy_shares / self.shares_outstanding
-        dealer_self_net_buy_ratio = self.dealer_self_net_buy_shares / self.shares_outstanding
-
-        # 計算外資、投信、自營商的2天、3天累積買超比例
-        foreign_net_buy_ratio_2d_sum = foreign_net_buy_ratio.rolling(2).sum()
-        foreign_net_buy_ratio_3d_sum = foreign_net_buy_ratio.rolling(3).sum()
-
-        investment_trust_net_buy_ratio_2d_sum = investment_trust_net_buy_ratio.rolling(2).sum()
-        investment_trust_net_buy_ratio_3d_sum = investment_trust_net_buy_ratio.rolling(3).sum()
-
-        dealer_self_net_buy_ratio_2d_sum = dealer_self_net_buy_ratio.rolling(2).sum()
-        dealer_self_net_buy_ratio_3d_sum = dealer_self_net_buy_ratio.rolling(3).sum()
-
-        # 外資：取當天、前2天、前3天累積買超比例前幾
-        foreign_top_1d_ratio = foreign_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        foreign_top_2d_ratio = foreign_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        foreign_top_3d_ratio = foreign_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        foreign_buy_condition = foreign_top_1d_ratio | foreign_top_2d_ratio | foreign_top_3d_ratio
-
-        # 投信：取當天、前2天、前3天累積買超比例前幾
-        investment_trust_top_1d_ratio = investment_trust_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        investment_trust_top_2d_ratio = investment_trust_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        investment_trust_top_3d_ratio = investment_trust_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        investment_trust_buy_condition = investment_trust_top_1d_ratio | investment_trust_top_2d_ratio | investment_trust_top_3d_ratio
-
-        # 自營商：取當天、前2天、前3天累積買超比例前幾
-        dealer_self_top_1d_ratio = dealer_self_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        dealer_self_top_2d_ratio = dealer_self_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        dealer_self_top_3d_ratio = dealer_self_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        dealer_self_buy_condition = dealer_self_top_1d_ratio | dealer_self_top_2d_ratio | dealer_self_top_3d_ratio
+        return self.chip_flow.conditions(top_n)
 
-        # 計算買賣超差額股數
-        net_buy_shares = (self.top15_buy_shares - self.top15_sell_shares) * 1000
-
-        # 買賣超差額股數佔發行股數的比例
-        net_buy_ratio = net_buy_shares / self.shares_outstanding
-
-        # 計算2天、3天買賣超差額股數佔發行股數的比
-        net_buy_ratio_2d_sum = net_buy_ratio.rolling(2).sum()
-        net_buy_ratio_3d_sum = net_buy_ratio.rolling(3).sum()
-
-        # 主力籌碼條件
-        main_force_top_1d_buy = net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        main_force_top_2d_buy = net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        main_force_top_3d_buy = net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        main_force_condition_1d = net_buy_ratio > 0.0008
-        main_force_condition_2d = net_buy_ratio_2d_sum > 0.0015
-        main_force_condition_3d = net_buy_ratio_3d_sum > 0.0025
-
-        main_force_buy_condition = ( main_force_top_1d_buy & main_force_condition_1d ) | ( main_force_top_2d_buy & main_force_condition_2d ) | ( main_force_top_3d_buy & main_force_condition_3d )
-
-        chip_buy_condition = foreign_buy_condition | dealer_self_buy_condition | main_force_buy_condition
-
-        return {
-            'chip_buy_condition': chip_buy_condition,
-            'foreign_buy_condition': foreign_buy_condition,
-            'investment_trust_buy_condition': investment_trust_buy_condition,
-            'dealer_self_buy_condition': dealer_self_buy_condition,
-            'main_force_buy_condition': main_force_buy_condition
-        }
-    
     def build_technical_buy_condition(self):
         """技術面買入條件 - 完全採用model2.py的邏輯，包含taiwan_kd"""
         
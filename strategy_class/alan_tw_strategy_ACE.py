@@ -19,6 +19,11 @@ from finlab.backtest import sim
 import pandas as pd
 import numpy as np
 from .taiwan_kd import taiwan_kd_fast
+from .chip_flow import ChipFlowFeatures
+from .indicator_cache import IndicatorCache
+from .live_window import live_start_date, slice_recent, uncovered_columns
+from .compact import downcast_float32
+from .prescreen import LiquidityPrescreen
 
 
 class AdjustTWMarketInfo(TWMarket):
@@ -38,24 +43,73 @@ class AlanTWStrategyACE:
         sell_signal: 賣出訊號
     """
 
-    def __init__(self):
+    def __init__(self, live=False, compact=False):
         """
         初始化策略參數
 
         注意：所有參數都在此處硬編碼，若需調整請直接修改此處數值
+
+        Args:
+            live: 下單用的 live 模式，只計算最近的資料視窗 (warm-up + 評估區間)
+            compact: 省記憶體模式，數值寬表使用 float32、快取的布林條件以位元壓縮
         """
         # 回測參數
         self.start_date = '2017-12-31'
         self.slippage = 0.0
         self.position_limit = 0.25
 
+        # Live 模式參數
+        # warm-up 取最長回看天數 (策略 E 的 480 日新高，涵蓋 MA240)
+        self.live = live
+        self.live_warmup_days = 480
+        self.live_eval_days = 240
+        self.live_buffer_days = 20
+        self.live_start = None
+        self.live_eval_start = None
+
+        # Compact 模式參數
+        self.compact = compact
+
+        # 流動性預篩 (技術指標只計算回測區間內曾經符合價格、成交量、成交金額條件的股票)
+        # 設為 None 則對所有股票計算
+        self.prescreen = LiquidityPrescreen(min_price=12, min_volume=500 * 1000, min_amount=30000000)
+        self.prescreen_columns = None
+
         self.report = None
         self.position = None
         self.buy_signal = None
         self.sell_signal = None
 
+        # 指標快取 (A、C、E 共用相同的均線、乖離率、DMI、KD、MACD)
+        self.indicator_cache_max_bytes = 2 * 1024 ** 3
+        self.indicators = IndicatorCache(max_bytes=self.indicator_cache_max_bytes, compact=compact)
+
         # 載入數據
         self._load_data()
+        self._prepare_data()
+
+    def _prepare_data(self):
+        """依 live / compact / 預篩設定整理載入的數據，並建立共用特徵"""
+        if self.live:
+            self._apply_live_window()
+        if self.compact:
+            self._apply_compact_dtypes()
+        if self.prescreen is not None:
+            self._apply_prescreen()
+        self._build_features()
+
+    def _build_features(self):
+        """建立跨子策略共用的特徵物件"""
+        # 籌碼面特徵 (比例、累積比例與排名只計算一次，不同 top_n 共用)
+        self.chip_flow = ChipFlowFeatures(
+            foreign_net_buy_shares=self.foreign_net_buy_shares,
+            investment_trust_net_buy_shares=self.investment_trust_net_buy_shares,
+            dealer_self_net_buy_shares=self.dealer_self_net_buy_shares,
+            top15_buy_shares=self.top15_buy_shares,
+            top15_sell_shares=self.top15_sell_shares,
+            shares_outstanding=self.shares_outstanding,
+            min_periods=1,
+        )
 
     def _load_data(self):
         """載入所需數據"""
@@ -65,6 +119,8 @@ class AlanTWStrategyACE:
             self.investment_trust_net_buy_shares = data.get('institutional_investors_trading_summary:投信買賣超股數')
             self.dealer_self_net_buy_shares = data.get('institutional_investors_trading_summary:自營商買賣超股數(自行買賣)')
             self.shares_outstanding = data.get('internal_equity_changes:發行股數')
+            self.top15_buy_shares = data.get('etl:broker_transactions:top15_buy')
+            self.top15_sell_shares = data.get('etl:broker_transactions:top15_sell')
 
             # 價格與技術指標數據
             self.close = data.get("price:收盤價")
@@ -77,79 +133,115 @@ class AlanTWStrategyACE:
             # 基本面數據
             self.operating_margin = data.get('fundamental_features:營業利益率')
 
+    def _apply_live_window(self):
+        """Live 模式: 將日頻資料裁切到 warm-up + 評估區間 (基本面為季資料，不裁切)"""
+        total_rows = self.live_warmup_days + self.live_buffer_days + self.live_eval_days
+        index = self.adj_close.index
+        self.live_start = live_start_date(index, total_rows)
+        eval_position = min(index.searchsorted(self.live_start) + self.live_warmup_days + self.live_buffer_days,
+                            len(index) - 1)
+        self.live_eval_start = index[eval_position]
+
+        for name in ('foreign_net_buy_shares', 'investment_trust_net_buy_shares', 'dealer_self_net_buy_shares',
+                     'shares_outstanding', 'top15_buy_shares', 'top15_sell_shares',
+                     'close', 'adj_close', 'adj_open', 'adj_high', 'adj_low', 'volume'):
+            setattr(self, name, slice_recent(getattr(self, name), self.live_start))
+
+        print(f"⚡ Live 模式: 資料視窗 {self.live_start:%Y-%m-%d} 起，評估區間 {self.live_eval_start:%Y-%m-%d} 起")
+
+    def _apply_compact_dtypes(self):
+        """Compact 模式: 日頻數值寬表轉為 float32"""
+        for name in ('foreign_net_buy_shares', 'investment_trust_net_buy_shares', 'dealer_self_net_buy_shares',
+                     'shares_outstanding', 'top15_buy_shares', 'top15_sell_shares',
+                     'close', 'adj_close', 'adj_open', 'adj_high', 'adj_low', 'volume', 'operating_margin'):
+            setattr(self, name, downcast_float32(getattr(self, name)))
+
+    def _apply_prescreen(self):
+        """技術面使用的價格與成交量只保留曾經符合流動性條件的股票 (籌碼面排名仍使用完整股票池)"""
+        start_date = self.live_eval_start if self.live else self.start_date
+        self.prescreen_columns = self.prescreen.eligible_columns(self.close, self.volume, start_date)
+
+        total_columns = len(self.adj_close.columns)
+        for name in ('close', 'adj_close', 'adj_open', 'adj_high', 'adj_low', 'volume'):
+            setattr(self, name, self.prescreen.select(getattr(self, name), self.prescreen_columns))
+
+        print(f"🔎 流動性預篩: 技術指標計算 {len(self.adj_close.columns)}/{total_columns} 檔股票")
+
+    def _reload_full_history(self):
+        """Live 模式無法保證正確時，改回完整歷史資料"""
+        self.live = False
+        self.live_start = None
+        self.live_eval_start = None
+        self.indicators.clear()
+        self._load_data()
+        self._prepare_data()
+
+    def _prepare_indicator(self, df):
+        """data.indicator 的結果依 live / compact / 預篩設定裁切或轉型"""
+        if self.live:
+            df = slice_recent(df, self.live_start)
+        if self.prescreen_columns is not None:
+            df = self.prescreen.select(df, self.prescreen_columns)
+        if self.compact:
+            df = downcast_float32(df)
+        return df
+
     def _build_chip_buy_condition(self, top_n):
         """建立籌碼面條件"""
-        # 計算外資、投信、自營商的買賣超佔發行量比例
-        foreign_net_buy_ratio = self.foreign_net_buy_shares / self.shares_outstanding
-        investment_trust_net_buy_ratio = self.investment_trust_net_buy_shares / self.shares_outstanding
-        dealer_self_net_buy_ratio = self.dealer_self_net_buy_shares / self.shares_outstanding
-
-        # 計算累積買超比例
-        foreign_net_buy_ratio_2d_sum = foreign_net_buy_ratio.rolling(2, min_periods=1).sum()
-        foreign_net_buy_ratio_3d_sum = foreign_net_buy_ratio.rolling(3, min_periods=1).sum()
-        investment_trust_net_buy_ratio_2d_sum = investment_trust_net_buy_ratio.rolling(2, min_periods=1).sum()
-        investment_trust_net_buy_ratio_3d_sum = investment_trust_net_buy_ratio.rolling(3, min_periods=1).sum()
-        dealer_self_net_buy_ratio_2d_sum = dealer_self_net_buy_ratio.rolling(2, min_periods=1).sum()
-        dealer_self_net_buy_ratio_3d_sum = dealer_self_net_buy_ratio.rolling(3, min_periods=1).sum()
-
-        # 外資條件
-        foreign_top_1d_ratio = foreign_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        foreign_top_2d_ratio = foreign_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        foreign_top_3d_ratio = foreign_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        foreign_buy_condition = foreign_top_1d_ratio | foreign_top_2d_ratio | foreign_top_3d_ratio
-
-        # 投信條件
-        investment_trust_top_1d_ratio = investment_trust_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        investment_trust_top_2d_ratio = investment_trust_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        investment_trust_top_3d_ratio = investment_trust_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        investment_trust_buy_condition = investment_trust_top_1d_ratio | investment_trust_top_2d_ratio | investment_trust_top_3d_ratio
-
-        # 自營商條件
-        dealer_self_top_1d_ratio = dealer_self_net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        dealer_self_top_2d_ratio = dealer_self_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        dealer_self_top_3d_ratio = dealer_self_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        dealer_self_buy_condition = dealer_self_top_1d_ratio | dealer_self_top_2d_ratio | dealer_self_top_3d_ratio
-
-        # 主力籌碼數據
-        with data.universe(market='TSE_OTC'):
-            top15_buy_shares = data.get('etl:broker_transactions:top15_buy')
-            top15_sell_shares = data.get('etl:broker_transactions:top15_sell')
-
-        net_buy_shares = (top15_buy_shares - top15_sell_shares) * 1000
-        net_buy_ratio = net_buy_shares / self.shares_outstanding
-        net_buy_ratio_2d_sum = net_buy_ratio.rolling(2, min_periods=1).sum()
-        net_buy_ratio_3d_sum = net_buy_ratio.rolling(3, min_periods=1).sum()
-
-        # 主力籌碼條件
-        main_force_top_1d_buy = net_buy_ratio.rank(axis=1, ascending=False) <= top_n
-        main_force_top_2d_buy = net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= top_n
-        main_force_top_3d_buy = net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= top_n
-        main_force_condition_1d = net_buy_ratio > 0.0008
-        main_force_condition_2d = net_buy_ratio_2d_sum > 0.0015
-        main_force_condition_3d = net_buy_ratio_3d_sum > 0.0025
-
-        main_force_buy_condition = (
-            (main_force_top_1d_buy & main_force_condition_1d) |
-            (main_force_top_2d_buy & main_force_condition_2d) |
-            (main_force_top_3d_buy & main_force_condition_3d)
-        )
-
-        chip_buy_condition = foreign_buy_condition | dealer_self_buy_condition | main_force_buy_condition
-
-        return chip_buy_condition
-
-    def _build_technical_buy_condition(self, bias_5_range, bias_10_range, bias_20_range,
-                                       bias_60_range, bias_120_range, bias_240_range,
-                                       new_high_days=120):
-        """建立技術面條件"""
-        # 計算均線 (使用 finlab API)
-        ma3 = self.adj_close.average(3)
-        ma5 = self.adj_close.average(5)
-        ma10 = self.adj_close.average(10)
-        ma20 = self.adj_close.average(20)
-        ma60 = self.adj_close.average(60)
-        ma120 = self.adj_close.average(120)
-        ma240 = self.adj_close.average(240)
+        return self.chip_flow.buy_condition(top_n)
+
+    def _cached(self, kind, params, source, compute):
+        """透過指標快取取得計算結果 (同一次執行中相同指標只計算一次)"""
+        return self.indicators.get_or_compute(kind, params, source, compute)
+
+    def _ma(self, period):
+        return self._cached('ma', (period,), 'etl:adj_close', lambda: self.adj_close.average(period))
+
+    def _bias(self, period):
+        def compute():
+            ma = self._ma(period)
+            return (self.adj_close - ma) / ma
+        return self._cached('bias', (period,), 'etl:adj_close', compute)
+
+    def _bias_condition(self, period, bias_range):
+        def compute():
+            bias = self._bias(period)
+            return (bias >= bias_range[0]) & (bias <= bias_range[1])
+        return self._cached('bias_condition', (period, tuple(bias_range)), 'etl:adj_close', compute)
+
+    def _macd(self):
+        def compute():
+            with data.universe(market='TSE_OTC'):
+                dif, macd, hist = data.indicator('MACD', fastperiod=12, slowperiod=26, signalperiod=9, adjust_price=True)
+            return self._prepare_indicator(dif), self._prepare_indicator(macd), self._prepare_indicator(hist)
+        return self._cached('macd', (12, 26, 9), 'indicator:adjust_price', compute)
+
+    def _dmi(self):
+        def compute():
+            with data.universe(market='TSE_OTC'):
+                plus_di = data.indicator('PLUS_DI', timeperiod=14, adjust_price=True)
+                minus_di = data.indicator('MINUS_DI', timeperiod=14, adjust_price=True)
+            return self._prepare_indicator(plus_di), self._prepare_indicator(minus_di)
+        return self._cached('dmi', (14,), 'indicator:adjust_price', compute)
+
+    def _kd(self):
+        def compute():
+            return taiwan_kd_fast(
+                high_df=self.adj_high,
+                low_df=self.adj_low,
+                close_df=self.adj_close,
+                fastk_period=9,
+                alpha=1/3,
+                dtype=np.float32 if self.compact else np.float64
+            )
+        return self._cached('kd', (9, 1/3), 'etl:adj_high,etl:adj_low,etl:adj_close', compute)
+
+    def _build_common_technical_condition(self):
+        """建立與子策略參數無關的技術面條件 (A、C、E 共用)"""
+        ma5 = self._ma(5)
+        ma10 = self._ma(10)
+        ma20 = self._ma(20)
+        ma60 = self._ma(60)
 
         # 均線上升
         ma_up_buy_condition = (
@@ -163,26 +255,6 @@ class AlanTWStrategyACE:
             (self.adj_close > ma20) & (self.adj_close > ma60)
         )
 
-        # 計算乖離率
-        bias_5 = (self.adj_close - ma5) / ma5
-        bias_10 = (self.adj_close - ma10) / ma10
-        bias_20 = (self.adj_close - ma20) / ma20
-        bias_60 = (self.adj_close - ma60) / ma60
-        bias_120 = (self.adj_close - ma120) / ma120
-        bias_240 = (self.adj_close - ma240) / ma240
-
-        bias_5_condition = (bias_5 >= bias_5_range[0]) & (bias_5 <= bias_5_range[1])
-        bias_10_condition = (bias_10 >= bias_10_range[0]) & (bias_10 <= bias_10_range[1])
-        bias_20_condition = (bias_20 >= bias_20_range[0]) & (bias_20 <= bias_20_range[1])
-        bias_60_condition = (bias_60 >= bias_60_range[0]) & (bias_60 <= bias_60_range[1])
-        bias_120_condition = (bias_120 >= bias_120_range[0]) & (bias_120 <= bias_120_range[1])
-        bias_240_condition = (bias_240 >= bias_240_range[0]) & (bias_240 <= bias_240_range[1])
-
-        bias_buy_condition = (
-            bias_5_condition & bias_10_condition & bias_20_condition &
-            bias_60_condition & bias_120_condition & bias_240_condition
-        )
-
         # 價格與成交量條件
         price_above_12_condition = self.close > 12
         volume_doubled_condition = self.volume > (self.volume.shift(1) * 2)
@@ -190,47 +262,62 @@ class AlanTWStrategyACE:
         amount_condition = (self.close * self.volume) > 30000000
 
         # DMI指標
-        with data.universe(market='TSE_OTC'):
-            plus_di = data.indicator('PLUS_DI', timeperiod=14, adjust_price=True)
-            minus_di = data.indicator('MINUS_DI', timeperiod=14, adjust_price=True)
-
+        plus_di, minus_di = self._dmi()
         dmi_buy_condition = (plus_di > 24) & (minus_di < 21)
 
         # KD指標
-        k, d = taiwan_kd_fast(
-            high_df=self.adj_high,
-            low_df=self.adj_low,
-            close_df=self.adj_close,
-            fastk_period=9,
-            alpha=1/3
-        )
-
+        k, d = self._kd()
         k_up_condition = k > k.shift(1)
         d_up_condition = d > d.shift(1)
         kd_buy_condition = k_up_condition & d_up_condition
 
         # MACD指標
-        with data.universe(market='TSE_OTC'):
-            dif, macd, _ = data.indicator('MACD', fastperiod=12, slowperiod=26, signalperiod=9, adjust_price=True)
-
+        dif, macd, _ = self._macd()
         macd_dif_buy_condition = dif > dif.shift(1)
 
-        # 創新高
-        high_n = self.adj_close.rolling(window=new_high_days, min_periods=1).max()
-        new_high_condition = self.adj_close >= high_n
-
-        # 技術面綜合條件
-        technical_buy_condition = (
+        return (
             ma_up_buy_condition &
             price_above_ma_buy_condition &
-            bias_buy_condition &
             volume_doubled_condition &
             volume_above_500_condition &
             price_above_12_condition &
             amount_condition &
             dmi_buy_condition &
             kd_buy_condition &
-            macd_dif_buy_condition &
+            macd_dif_buy_condition
+        )
+
+    def _build_new_high_condition(self, new_high_days):
+        def compute():
+            high_n = self.adj_close.rolling(window=new_high_days, min_periods=1).max()
+            return self.adj_close >= high_n
+        return self._cached('new_high', (new_high_days,), 'etl:adj_close', compute)
+
+    def _build_technical_buy_condition(self, bias_5_range, bias_10_range, bias_20_range,
+                                       bias_60_range, bias_120_range, bias_240_range,
+                                       new_high_days=120):
+        """建立技術面條件"""
+        common_technical_condition = self._cached(
+            'technical_common', (), 'etl:adj_close', self._build_common_technical_condition
+        )
+
+        # 乖離率條件
+        bias_buy_condition = (
+            self._bias_condition(5, bias_5_range) &
+            self._bias_condition(10, bias_10_range) &
+            self._bias_condition(20, bias_20_range) &
+            self._bias_condition(60, bias_60_range) &
+            self._bias_condition(120, bias_120_range) &
+            self._bias_condition(240, bias_240_range)
+        )
+
+        # 創新高
+        new_high_condition = self._build_new_high_condition(new_high_days)
+
+        # 技術面綜合條件
+        technical_buy_condition = (
+            common_technical_condition &
+            bias_buy_condition &
             new_high_condition
         )
 
@@ -246,10 +333,8 @@ class AlanTWStrategyACE:
 
     def _build_sell_condition(self):
         """建立賣出條件"""
-        ma3 = self.adj_close.average(3)
-
-        with data.universe(market='TSE_OTC'):
-            dif, macd, _ = data.indicator('MACD', fastperiod=12, slowperiod=26, signalperiod=9, adjust_price=True)
+        ma3 = self._ma(3)
+        dif, macd, _ = self._macd()
 
         # 短線出場
         sell_condition = (ma3 < ma3.shift(1)) & (dif < dif.shift(1))
@@ -263,7 +348,9 @@ class AlanTWStrategyACE:
         Returns:
             report: 回測報告物件
         """
-        print("🚀 開始運行策略 ACE (A|C|E 組合)...")
+        modes = [mode for mode, enabled in (('live', self.live), ('compact', self.compact)) if enabled]
+        print(f"🚀 開始運行策略 ACE (A|C|E 組合){''.join(f' [{mode}]' for mode in modes)}...")
+        self.indicators.clear()
 
         # 策略 A: top_n=20, 營益率 0.1%, BIAS: 3~13, 5~16, 8~19, 8~20, 5~26, 8~26
         print("📊 計算策略 A 條件...")
@@ -329,16 +416,32 @@ class AlanTWStrategyACE:
         print("📊 組合 A|C|E 策略...")
         self.buy_signal = buy_signal_A | buy_signal_C | buy_signal_E
 
-        # 設定起始日期
-        self.buy_signal = self.buy_signal.loc[self.start_date:]
+        # 設定起始日期 (live 模式從評估區間開始)
+        start_date = self.start_date
+        if self.live:
+            start_date = max(pd.Timestamp(self.start_date), self.live_eval_start)
 
         # 建立賣出條件
         print("📊 計算賣出條件...")
         self.sell_signal = self._build_sell_condition()
 
+        # Live 模式: warm-up 區間內買入、且評估區間內沒有重置訊號的股票，持倉可能來自更早的買入
+        if self.live:
+            uncovered = uncovered_columns(self.buy_signal, self.sell_signal, self.live_eval_start)
+            if uncovered:
+                print(f"⚠️ Live 模式有 {len(uncovered)} 檔股票的持倉可能來自評估區間之前的買入 (例如 {uncovered[:5]})，改用完整歷史重新計算")
+                self._reload_full_history()
+                return self.run_strategy()
+
+        self.buy_signal = self.buy_signal.loc[start_date:]
+
         # 建立持倉訊號
         self.position = self.buy_signal.hold_until(self.sell_signal)
 
+        # 釋放指標快取
+        print(f"🧮 指標快取統計: {self.indicators.stats()}")
+        self.indicators.clear()
+
         # 執行回測
         print("🔄 執行回測...")
         fee_ratio = 0.001425
@@ -382,6 +485,8 @@ class AlanTWStrategyACE:
         print(f"滑價成本: {self.slippage:.2%}")
         if self.position_limit:
             print(f"單檔持股上限: {self.position_limit:.1%}")
+        if self.live:
+            print(f"Live 模式: 僅回測 {self.live_eval_start:%Y-%m-%d} 之後的評估區間")
         print("=" * 50)
         print("策略組合: A | C | E")
         print("  - 策略 A: top_n=20, 營益率 0.1%, 創120天新高")
@@ -14,6 +14,7 @@ from finlab.backtest import sim
 import pandas as pd
 import numpy as np
 from .taiwan_kd import taiwan_kd_fast
+from .chip_flow import ChipFlowFeatures
 
 
 class AdjustTWMarketInfo(TWMarket):
@@ -66,6 +67,17 @@ class AlanTWStrategyC:
         # 載入數據
         self._load_data()
 
+        # 籌碼面特徵 (比例、累積比例與排名只計算一次，不同 top_n 共用)
+        self.chip_flow = ChipFlowFeatures(
+            foreign_net_buy_shares=self.foreign_net_buy_shares,
+            investment_trust_net_buy_shares=self.investment_trust_net_buy_shares,
+            dealer_self_net_buy_shares=self.dealer_self_net_buy_shares,
+            top15_buy_shares=self.top15_buy_shares,
+            top15_sell_shares=self.top15_sell_shares,
+            shares_outstanding=self.shares_outstanding,
+            min_periods=None,
+        )
+
     def _load_data(self):
         """載入所需數據"""
         with data.universe(market='TSE_OTC'):
@@ -74,6 +86,8 @@ class AlanTWStrategyC:
             self.investment_trust_net_buy_shares = data.get('institutional_investors_trading_summary:投信買賣超股數')
             self.dealer_self_net_buy_shares = data.get('institutional_investors_trading_summary:自營商買賣超股數(自行買賣)')
             self.shares_outstanding = data.get('internal_equity_changes:發行股數')
+            self.top15_buy_shares = data.get('etl:broker_transactions:top15_buy')
+            self.top15_sell_shares = data.get('etl:broker_transactions:top15_sell')
 
             # 價格與技術指標數據
             self.close = data.get("price:收盤價")
@@ -88,64 +102,7 @@ class AlanTWStrategyC:
 
     def _build_chip_buy_condition(self):
         """建立籌碼面條件"""
-        # 計算外資、投信、自營商的買賣超佔發行量比例
-        foreign_net_buy_ratio = self.foreign_net_buy_shares / self.shares_outstanding
-        investment_trust_net_buy_ratio = self.investment_trust_net_buy_shares / self.shares_outstanding
-        dealer_self_net_buy_ratio = self.dealer_self_net_buy_shares / self.shares_outstanding
-
-        # 計算累積買超比例
-        foreign_net_buy_ratio_2d_sum = foreign_net_buy_ratio.rolling(2).sum()
-        foreign_net_buy_ratio_3d_sum = foreign_net_buy_ratio.rolling(3).sum()
-        investment_trust_net_buy_ratio_2d_sum = investment_trust_net_buy_ratio.rolling(2).sum()
-        investment_trust_net_buy_ratio_3d_sum = investment_trust_net_buy_ratio.rolling(3).sum()
-        dealer_self_net_buy_ratio_2d_sum = dealer_self_net_buy_ratio.rolling(2).sum()
-        dealer_self_net_buy_ratio_3d_sum = dealer_self_net_buy_ratio.rolling(3).sum()
-
-        # 外資條件
-        foreign_top_1d_ratio = foreign_net_buy_ratio.rank(axis=1, ascending=False) <= self.top_n
-        foreign_top_2d_ratio = foreign_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= self.top_n
-        foreign_top_3d_ratio = foreign_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= self.top_n
-        foreign_buy_condition = foreign_top_1d_ratio | foreign_top_2d_ratio | foreign_top_3d_ratio
-
-        # 投信條件
-        investment_trust_top_1d_ratio = investment_trust_net_buy_ratio.rank(axis=1, ascending=False) <= self.top_n
-        investment_trust_top_2d_ratio = investment_trust_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= self.top_n
-        investment_trust_top_3d_ratio = investment_trust_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= self.top_n
-        investment_trust_buy_condition = investment_trust_top_1d_ratio | investment_trust_top_2d_ratio | investment_trust_top_3d_ratio
-
-        # 自營商條件
-        dealer_self_top_1d_ratio = dealer_self_net_buy_ratio.rank(axis=1, ascending=False) <= self.top_n
-        dealer_self_top_2d_ratio = dealer_self_net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= self.top_n
-        dealer_self_top_3d_ratio = dealer_self_net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= self.top_n
-        dealer_self_buy_condition = dealer_self_top_1d_ratio | dealer_self_top_2d_ratio | dealer_self_top_3d_ratio
-
-        # 主力籌碼數據
-        with data.universe(market='TSE_OTC'):
-            top15_buy_shares = data.get('etl:broker_transactions:top15_buy')
-            top15_sell_shares = data.get('etl:broker_transactions:top15_sell')
-
-        net_buy_shares = (top15_buy_shares - top15_sell_shares) * 1000
-        net_buy_ratio = net_buy_shares / self.shares_outstanding
-        net_buy_ratio_2d_sum = net_buy_ratio.rolling(2).sum()
-        net_buy_ratio_3d_sum = net_buy_ratio.rolling(3).sum()
-
-        # 主力籌碼條件
-        main_force_top_1d_buy = net_buy_ratio.rank(axis=1, ascending=False) <= self.top_n
-        main_force_top_2d_buy = net_buy_ratio_2d_sum.rank(axis=1, ascending=False) <= self.top_n
-        main_force_top_3d_buy = net_buy_ratio_3d_sum.rank(axis=1, ascending=False) <= self.top_n
-        main_force_condition_1d = net_buy_ratio > 0.0008
-        main_force_condition_2d = net_buy_ratio_2d_sum > 0.0015
-        main_force_condition_3d = net_buy_ratio_3d_sum > 0.0025
-
-        main_force_buy_condition = (
-            (main_force_top_1d_buy & main_force_condition_1d) |
-            (main_force_top_2d_buy & main_force_condition_2d) |
-            (main_force_top_3d_buy & main_force_condition_3d)
-        )
-
-        chip_buy_condition = foreign_buy_condition | dealer_self_buy_condition | main_force_buy_condition
-
-        return chip_buy_condition
+        return self.chip_flow.buy_condition(self.top_n)
 
     def _build_technical_buy_condition(self):
         """建立技術面條件"""
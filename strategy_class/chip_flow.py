@@ -0,0 +1,122 @@
+"""
+籌碼面特徵模組
+將外資、投信、自營商與主力 (前15大券商) 的買賣超佔發行股數比例、2/3 日累積比例
+以及橫斷面排名集中計算一次，供不同 top_n 的籌碼條件共用。
+
+原本每次呼叫 _build_chip_buy_condition(top_n) 都會重新計算 4 組比例、8 次 rolling
+與 12 次 rank(axis=1)；改用此模組後，比例只算一次，前 top_n 名遮罩以
+ranking.top_n_mask (np.partition) 取得，不需要完整排序。
+
+使用方式:
+    chip_flow = ChipFlowFeatures(
+        foreign_net_buy_shares, investment_trust_net_buy_shares, dealer_self_net_buy_shares,
+        top15_buy_shares, top15_sell_shares, shares_outstanding,
+    )
+    chip_buy_condition = chip_flow.buy_condition(top_n=20)
+"""
+
+from .ranking import top_n_mask
+
+# 主力買超比例門檻 (1/2/3 日)
+MAIN_FORCE_THRESHOLDS = {1: 0.0008, 2: 0.0015, 3: 0.0025}
+
+GROUPS = ('foreign', 'investment_trust', 'dealer_self', 'main_force')
+WINDOWS = (1, 2, 3)
+
+
+class ChipFlowFeatures:
+    """
+    籌碼面特徵 (比例、累積比例、前 top_n 名遮罩) 的一次性計算與快取
+
+    Args:
+        min_periods: 2/3 日累積的 rolling min_periods；
+                     1 表示前幾天資料不足時仍加總 (ACE、NotStart A/B)，
+                     None 表示使用 pandas 預設 (需滿窗口，C、E、NotStart、1、2)
+    """
+
+    def __init__(self, foreign_net_buy_shares, investment_trust_net_buy_shares,
+                 dealer_self_net_buy_shares, top15_buy_shares, top15_sell_shares,
+                 shares_outstanding, min_periods=1):
+        self._net_buy_shares = {
+            'foreign': lambda: foreign_net_buy_shares,
+            'investment_trust': lambda: investment_trust_net_buy_shares,
+            'dealer_self': lambda: dealer_self_net_buy_shares,
+            'main_force': lambda: (top15_buy_shares - top15_sell_shares) * 1000,
+        }
+        self.shares_outstanding = shares_outstanding
+        self.min_periods = min_periods
+
+        self._ratios = {}
+        self._top_masks = {}
+        self._main_force_conditions = {}
+
+    def ratio(self, group, days=1):
+        """買賣超佔發行股數比例 (days > 1 時為累積比例)"""
+        key = (group, days)
+        if key not in self._ratios:
+            if days == 1:
+                self._ratios[key] = self._net_buy_shares[group]() / self.shares_outstanding
+            else:
+                rolling = self.ratio(group, 1).rolling(days, min_periods=self.min_periods)
+                self._ratios[key] = rolling.sum()
+        return self._ratios[key]
+
+    def top_mask(self, group, days, top_n):
+        """買超比例排名前 top_n 的布林矩陣 (等同 rank(axis=1, ascending=False) <= top_n)"""
+        key = (group, days, top_n)
+        if key not in self._top_masks:
+            self._top_masks[key] = top_n_mask(self.ratio(group, days), top_n)
+        return self._top_masks[key]
+
+    def _main_force_condition(self, days):
+        if days not in self._main_force_conditions:
+            self._main_force_conditions[days] = self.ratio('main_force', days) > MAIN_FORCE_THRESHOLDS[days]
+        return self._main_force_conditions[days]
+
+    def group_condition(self, group, top_n):
+        """
+        單一族群的籌碼條件: 當天、2 日、3 日累積買超比例任一進入前 top_n
+        主力另需買超比例超過 MAIN_FORCE_THRESHOLDS
+        """
+        if group == 'main_force':
+            return (
+                (self.top_mask(group, 1, top_n) & self._main_force_condition(1)) |
+                (self.top_mask(group, 2, top_n) & self._main_force_condition(2)) |
+                (self.top_mask(group, 3, top_n) & self._main_force_condition(3))
+            )
+        return (
+            self.top_mask(group, 1, top_n) |
+            self.top_mask(group, 2, top_n) |
+            self.top_mask(group, 3, top_n)
+        )
+
+    def conditions(self, top_n):
+        """回傳各族群條件與組合後的籌碼條件"""
+        foreign_buy_condition = self.group_condition('foreign', top_n)
+        investment_trust_buy_condition = self.group_condition('investment_trust', top_n)
+        dealer_self_buy_condition = self.group_condition('dealer_self', top_n)
+        main_force_buy_condition = self.group_condition('main_force', top_n)
+
+        chip_buy_condition = foreign_buy_condition | dealer_self_buy_condition | main_force_buy_condition
+
+        return {
+            'chip_buy_condition': chip_buy_condition,
+            'foreign_buy_condition': foreign_buy_condition,
+            'investment_trust_buy_condition': investment_trust_buy_condition,
+            'dealer_self_buy_condition': dealer_self_buy_condition,
+            'main_force_buy_condition': main_force_buy_condition
+        }
+
+    def buy_condition(self, top_n):
+        """標準籌碼條件: 外資 | 自營商 | 主力 (投信不納入)"""
+        return (
+            self.group_condition('foreign', top_n) |
+            self.group_condition('dealer_self', top_n) |
+            self.group_condition('main_force', top_n)
+        )
+
+    def clear(self):
+        """釋放已計算的比例與排名遮罩"""
+        self._ratios.clear()
+        self._top_masks.clear()
+        self._main_force_conditions.clear()
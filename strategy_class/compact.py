@@ -0,0 +1,78 @@
+"""
+Compact 模式記憶體工具
+FinLab 載入的寬表 (交易日 x 股票) 預設為 float64，中間的布林條件每格也佔 1 byte。
+Compact 模式下:
+
+- 價格、成交量、籌碼等數值寬表轉為 float32 (記憶體減半)
+- 快取中的布林條件以 np.packbits 壓縮成位元 (記憶體為 bool 的 1/8)，取出時才還原
+
+float32 約有 7 位有效數字，價格、乖離率門檻比較在邊界值附近可能與 float64 有
+極少數差異，因此 compact 模式為選用 (夜間批次回測)，下單仍使用完整精度。
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def downcast_float32(df):
+    """將 float64 欄位轉為 float32 (保留 FinlabDataFrame 型別)；非 float64 的資料原樣回傳"""
+    if not isinstance(df, pd.DataFrame):
+        return df
+    dtypes = df.dtypes
+    if len(dtypes) == 0 or not (dtypes == np.float64).all():
+        return df
+    return df.astype(np.float32)
+
+
+def is_bool_frame(value):
+    """是否為所有欄位皆為 bool 的 DataFrame"""
+    return isinstance(value, pd.DataFrame) and len(value.columns) > 0 and (value.dtypes == bool).all()
+
+
+class PackedMask:
+    """
+    以位元壓縮保存的布林寬表
+
+    Attributes:
+        index: 原本的 index
+        columns: 原本的 columns
+        frame_type: 原本的 DataFrame 類別 (例如 FinlabDataFrame)，還原時沿用
+    """
+
+    __slots__ = ('bits', 'shape', 'index', 'columns', 'frame_type')
+
+    def __init__(self, df):
+        values = df.to_numpy(dtype=bool)
+        self.bits = np.packbits(values, axis=None)
+        self.shape = values.shape
+        self.index = df.index
+        self.columns = df.columns
+        self.frame_type = type(df)
+
+    @property
+    def nbytes(self):
+        return int(self.bits.nbytes)
+
+    def unpack(self):
+        """還原為布林 DataFrame"""
+        count = self.shape[0] * self.shape[1]
+        values = np.unpackbits(self.bits, count=count).astype(bool).reshape(self.shape)
+        return self.frame_type(values, index=self.index, columns=self.columns)
+
+
+def pack(value):
+    """壓縮布林寬表 (tuple 逐一處理)，其他資料原樣回傳"""
+    if isinstance(value, tuple):
+        return tuple(pack(v) for v in value)
+    if is_bool_frame(value):
+        return PackedMask(value)
+    return value
+
+
+def unpack(value):
+    """還原 pack() 的結果"""
+    if isinstance(value, tuple):
+        return tuple(unpack(v) for v in value)
+    if isinstance(value, PackedMask):
+        return value.unpack()
+    return value
@@ -0,0 +1,113 @@
+"""
+策略指標快取模組
+同一次回測中，多個子策略 (例如 ACE 的 A、C、E) 會重複計算相同的均線、乖離率、
+DMI、MACD、KD 等寬表指標。此模組以 (指標種類, 參數, 來源資料) 為 key 快取計算結果，
+並依記憶體用量做 LRU 淘汰，讓相同的中間結果在一次執行中只計算一次。
+
+使用方式:
+    cache = IndicatorCache(max_bytes=2 * 1024 ** 3)
+    ma20 = cache.get_or_compute('ma', (20,), 'etl:adj_close', lambda: adj_close.average(20))
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .compact import PackedMask, pack, unpack
+
+
+def estimate_nbytes(value):
+    """估算快取值佔用的記憶體 (支援 DataFrame / Series / ndarray 及其 tuple)"""
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, (np.ndarray, PackedMask)):
+        return int(value.nbytes)
+    return 0
+
+
+class IndicatorCache:
+    """
+    以記憶體上限做 LRU 淘汰的指標快取
+
+    Attributes:
+        max_bytes: 快取可使用的記憶體上限，超過時淘汰最久未使用的項目
+        compact: 是否以位元壓縮保存布林寬表 (取出時還原)
+        hits: 命中次數
+        misses: 未命中 (實際計算) 次數
+    """
+
+    def __init__(self, max_bytes=2 * 1024 ** 3, compact=False):
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(kind, params=(), source=None):
+        """建立快取 key，params 需為可 hash 的值 (list 會轉成 tuple)"""
+        if isinstance(params, list):
+            params = tuple(params)
+        return (kind, params, source)
+
+    def get_or_compute(self, kind, params, source, compute):
+        """
+        取得快取中的指標，不存在時呼叫 compute() 計算並存入
+
+        Args:
+            kind: 指標種類，例如 'ma'、'bias'、'macd'
+            params: 指標參數 (tuple)
+            source: 來源資料名稱，例如 'etl:adj_close'
+            compute: 無參數的計算函式
+        """
+        key = self.make_key(kind, params, source)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key][0]
+            return unpack(value) if self.compact else value
+
+        self.misses += 1
+        value = compute()
+        stored = pack(value) if self.compact else value
+        nbytes = estimate_nbytes(stored)
+
+        # 單一項目就超過上限時不快取，直接回傳
+        if nbytes > self.max_bytes:
+            return value
+
+        self._entries[key] = (stored, nbytes)
+        self.current_bytes += nbytes
+        self._evict()
+        return value
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+
+    def clear(self):
+        """清空快取並釋放記憶體"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """回傳快取統計資訊"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
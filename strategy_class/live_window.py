@@ -0,0 +1,63 @@
+"""
+Live 模式資料視窗工具
+下單時只需要最後幾天的 buy_signal / sell_signal / position，因此可以只保留
+「最長指標回看天數 (warm-up) + 評估區間」的資料，避免從 2017 年開始計算全部指標。
+
+- warm-up 區間: 讓 MA240、480 日新高等指標在評估區間內與完整歷史計算結果相同
+- 評估區間: hold_until 的持倉狀態只要在此區間內出現過單獨的買入或賣出訊號就會重置，
+  之後的持倉即與完整歷史相同；只有評估區間之前最後一個訊號是買入 (可能帶著持倉進入評估區間)、
+  且評估區間內沒有任何重置訊號的股票，live 模式無法保證正確，應退回完整歷史計算
+"""
+import numpy as np
+import pandas as pd
+
+
+def live_start_date(index: pd.Index, total_rows: int):
+    """回傳保留最後 total_rows 個交易日時的起始日期 (資料不足時回傳第一天)"""
+    if len(index) <= total_rows:
+        return index[0]
+    return index[-total_rows]
+
+
+def slice_recent(df, start_date):
+    """
+    保留 start_date 之後的資料，並多保留 start_date 之前的最後一筆
+
+    多保留一筆是為了讓不規則更新的資料 (例如發行股數) 在視窗起點仍有前值可以 ffill。
+    """
+    position = df.index.searchsorted(pd.Timestamp(start_date))
+    return df.iloc[max(position - 1, 0):]
+
+
+def _last_true_position(values):
+    """每欄最後一個 True 的列位置，沒有 True 時為 -1"""
+    rows = len(values)
+    if rows == 0:
+        return np.full(values.shape[1], -1)
+    last = rows - 1 - values[::-1].argmax(axis=0)
+    return np.where(values.any(axis=0), last, -1)
+
+
+def uncovered_columns(buy_signal, sell_signal, eval_start):
+    """
+    找出持倉可能來自評估區間之前買入、且評估區間內無法重置的股票
+
+    buy_signal 需包含 warm-up 區間 (尚未依評估區間切齊)。一檔股票只有同時符合下列條件才會回傳:
+    - 評估區間之前最後一個買入訊號晚於 (或同日於) 最後一個賣出訊號，完整歷史在評估起點可能持有
+    - 評估區間內沒有出現單獨的買入或賣出訊號 (任一個都會讓持倉狀態與完整歷史一致)
+
+    指標歷史不足 (訊號全為 NaN / False) 的股票，例如新上市股票，不會被回傳。
+    """
+    buy = buy_signal.fillna(False).astype(bool)
+    sell = sell_signal.reindex(index=buy.index, columns=buy.columns).fillna(False).astype(bool)
+    buy_values = buy.to_numpy()
+    sell_values = sell.to_numpy()
+
+    split = buy.index.searchsorted(pd.Timestamp(eval_start))
+    last_buy = _last_true_position(buy_values[:split])
+    last_sell = _last_true_position(sell_values[:split])
+    may_hold = (last_buy >= 0) & (last_buy >= last_sell)
+
+    # 同一天同時有買入與賣出時，結果依 hold_until 的實作可能取決於先前狀態，不視為重置
+    resets = (buy_values[split:] ^ sell_values[split:]).any(axis=0)
+    return list(buy.columns[may_hold & ~resets])
@@ -0,0 +1,52 @@
+"""
+流動性預篩模組
+ACE 的技術面條件最終都要求 收盤價 > 12、成交量 > 500 張、成交金額 > 3000 萬，
+但 KD、DMI、MACD 與 6 條均線原本對上市櫃所有股票計算。此模組先以便宜的流動性
+條件找出「回測區間內曾經符合條件」的股票，昂貴的技術指標只對這些股票計算。
+
+技術指標皆為逐檔股票獨立計算 (rolling / ewm 不跨欄)，且從未符合流動性條件的股票
+技術面條件必為 False，因此預篩不會改變買入訊號。
+籌碼面的橫斷面排名需要完整的股票池，不可套用預篩。
+
+使用方式:
+    prescreen = LiquidityPrescreen(min_price=12, min_volume=500 * 1000, min_amount=30000000)
+    columns = prescreen.eligible_columns(close, volume, start_date='2017-12-31')
+    adj_close = prescreen.select(adj_close, columns)
+"""
+
+
+class LiquidityPrescreen:
+    """
+    以流動性條件預先縮小股票池
+
+    Attributes:
+        min_price: 收盤價下限 (不含)
+        min_volume: 成交股數下限 (不含)
+        min_amount: 成交金額 (收盤價 x 成交股數) 下限 (不含)
+    """
+
+    def __init__(self, min_price=12, min_volume=500 * 1000, min_amount=30000000):
+        self.min_price = min_price
+        self.min_volume = min_volume
+        self.min_amount = min_amount
+
+    def condition(self, close, volume):
+        """每日流動性條件 (與策略技術面條件中的寫法相同)"""
+        return (
+            (close > self.min_price) &
+            (volume > self.min_volume) &
+            ((close * volume) > self.min_amount)
+        )
+
+    def eligible_columns(self, close, volume, start_date=None):
+        """start_date 之後曾經符合流動性條件的股票"""
+        condition = self.condition(close, volume)
+        if start_date is not None:
+            condition = condition.loc[start_date:]
+        ever_eligible = condition.any()
+        return ever_eligible.index[ever_eligible.astype(bool).to_numpy()]
+
+    @staticmethod
+    def select(df, columns):
+        """只保留預篩後的股票欄位 (不存在的欄位略過)"""
+        return df.loc[:, df.columns.intersection(columns, sort=False)]
@@ -0,0 +1,72 @@
+"""
+橫斷面排名工具
+以 numpy partition 取代 df.rank(axis=1, ascending=False) <= top_n
+
+rank(axis=1) 需要對每一列做完整排序 (O(N log N))，但籌碼條件只需要知道
+「是否在前 top_n 名」。這裡改為每列用 np.partition 找出第 top_n 大的值 (O(N))，
+再處理同值 (tie) 的情況，結果與 pandas 預設的 average rank 完全一致:
+
+- NaN 不參與排名，結果為 False (與 na_option='keep' 時 NaN <= n 為 False 相同)
+- 同值者的 average rank = 比它大的個數 G + (同值個數 E + 1) / 2，
+  只有 G + (E + 1) / 2 <= top_n 時整組同值都入選
+"""
+
+import numpy as np
+
+
+def top_n_mask_values(values, top_n):
+    """
+    對二維陣列逐列取前 top_n 大的布林遮罩
+
+    Args:
+        values: 二維 numpy 陣列 (rows x stocks)
+        top_n: 名次門檻，等同 rank(axis=1, ascending=False) <= top_n
+
+    Returns:
+        np.ndarray: 與 values 相同形狀的布林陣列
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_rows, n_cols = values.shape
+    mask = np.zeros((n_rows, n_cols), dtype=bool)
+
+    k = int(np.floor(top_n))
+    if k < 1 or n_cols == 0:
+        return mask
+
+    valid = ~np.isnan(values)
+    valid_counts = valid.sum(axis=1)
+
+    # 有效值不超過 top_n 的列，所有有效值的名次都 <= top_n
+    small_rows = valid_counts <= top_n
+    mask[small_rows] = valid[small_rows]
+
+    rows = np.flatnonzero(~small_rows)
+    if len(rows) == 0:
+        return mask
+
+    subset = values[rows]
+
+    # NaN 以 -inf 填補後，第 k 大的值必定來自有效值 (有效值個數 > top_n >= k)
+    filled = np.where(np.isnan(subset), -np.inf, subset)
+    threshold = np.partition(filled, n_cols - k, axis=1)[:, n_cols - k][:, None]
+
+    # 與 NaN 比較皆為 False，因此 NaN 不會被計入
+    above = subset > threshold
+    ties = subset == threshold
+    greater_counts = above.sum(axis=1)
+    tie_counts = ties.sum(axis=1)
+    include_ties = (greater_counts + (tie_counts + 1) / 2) <= top_n
+
+    mask[rows] = above | (ties & include_ties[:, None])
+    return mask
+
+
+def top_n_mask(df, top_n):
+    """
+    DataFrame 版本: 等同 df.rank(axis=1, ascending=False) <= top_n
+
+    Returns:
+        與 df 同型別 (例如 FinlabDataFrame) 的布林 DataFrame
+    """
+    mask = top_n_mask_values(df.to_numpy(dtype=np.float64, na_value=np.nan), top_n)
+    return df._constructor(mask, index=df.index, columns=df.columns)
@@ -13,33 +13,16 @@ class RogerTWStrategyBase:
     def _create_position_df(self, universe):
         """
         讀取推薦 DAO 並轉換為 Finlab 可用的 Position DataFrame
-        支援 stocks 為物件列表，從 stock.id 取代號
+        以 load_frame() 一次取得 (date, stock_id) 資料表，不逐日讀取推薦紀錄
         """  
         dao = RecommendationDAO(frequency=self.task_name)
-        recommendation_records = dao.load()
+        df = dao.load_frame()[['date', 'stock_id']]
+        df = df[df['stock_id'].notna() & (df['stock_id'] != '')]
 
-        records = []
-        for record in recommendation_records:
-            date = record.date
-            stocks = record.stocks
-            if not date or not stocks:
-                continue
-
-            dt = pd.to_datetime(date)
-            for stock in stocks:
-                stock_id = getattr(stock, 'id', None)
-                if not stock_id:
-                    continue
-                records.append({
-                    'date': dt,
-                    'stock_id': str(stock_id),
-                    'signal': 1
-                })
-
-        if not records:
+        if df.empty:
             return None
 
-        df = pd.DataFrame(records)
+        df = df.assign(signal=1)
         df = df.drop_duplicates(subset=['date', 'stock_id'])
         
         position = df.pivot(index='date', columns='stock_id', values='signal')
@@ -1,24 +1,92 @@
 """
 台灣標準 KD 指標計算模組
 完全匹配台灣看盤軟體（XQ、Yahoo Finance、券商軟體）的 KD 計算
+
+計算方式:
+- RSV = (收盤 - N日最低) / (N日最高 - N日最低) * 100，最高=最低時 RSV=50
+- K = EMA(RSV, alpha)，D = EMA(K, alpha)，alpha 預設 1/3
+
+若有安裝 numba，會以編譯後的核心逐檔股票一次算完 RSV、K、D (多核心平行)，
+不需要建立 rolling max/min、RSV 等中間寬表；否則退回 pandas 向量化版本。
+兩者結果與 pandas rolling(min_periods=N) + ewm(adjust=False) 完全一致 (含缺值)。
 """
 
 import pandas as pd
 import numpy as np
 
-def taiwan_kd_fast(high_df, low_df, close_df, fastk_period=9, alpha=1/3):
-    """
-    快速版台灣標準KD計算 - 完全向量化
-    """
-    print(f"⚡ 開始計算台灣標準KD指標 ({len(close_df.columns)} 檔股票)...")
-    
-    import time
-    start_time = time.time()
-    
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, inline='always')
+    def _ewm_step(weighted, old_wt, value, alpha):
+        """
+        ewm(adjust=False, ignore_na=False) 的單步更新 (對應 pandas 的實作)
+
+        缺值時舊權重持續衰減，下一個有效值進來時以 (舊權重, alpha) 加權平均
+        """
+        if weighted != weighted:
+            if value == value:
+                return value, 1.0
+            return weighted, old_wt
+        old_wt *= (1.0 - alpha)
+        if value == value:
+            if weighted != value:
+                weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+            old_wt = 1.0
+        return weighted, old_wt
+
+    @njit(parallel=True, cache=True)
+    def _taiwan_kd_kernel(high, low, close, fastk_period, alpha, k_out, d_out):
+        """逐檔股票 (欄) 單次掃描計算 RSV、K、D，結果寫入 k_out、d_out"""
+        n_rows, n_cols = close.shape
+        for j in prange(n_cols):
+            k_value = np.nan
+            k_wt = 1.0
+            d_value = np.nan
+            d_wt = 1.0
+            for i in range(n_rows):
+                rsv = np.nan
+                if i >= fastk_period - 1:
+                    highest = -np.inf
+                    lowest = np.inf
+                    complete = True
+                    for w in range(i - fastk_period + 1, i + 1):
+                        h = high[w, j]
+                        l = low[w, j]
+                        if h != h or l != l:
+                            complete = False
+                            break
+                        if h > highest:
+                            highest = h
+                        if l < lowest:
+                            lowest = l
+                    if complete:
+                        denominator = highest - lowest
+                        if denominator != 0:
+                            rsv = ((close[i, j] - lowest) / denominator) * 100
+                        else:
+                            rsv = 50.0
+                    else:
+                        # 視窗內有缺值時 rolling 為 NaN，NaN != 0 因此 RSV 也是 NaN
+                        rsv = np.nan
+
+                k_value, k_wt = _ewm_step(k_value, k_wt, rsv, alpha)
+                d_value, d_wt = _ewm_step(d_value, d_wt, k_value, alpha)
+                k_out[i, j] = k_value
+                d_out[i, j] = d_value
+
+
+def _taiwan_kd_pandas(high_df, low_df, close_df, fastk_period, alpha):
+    """pandas 向量化版本 (未安裝 numba 時使用)"""
     # 1. 向量化計算 RSV
     rolling_high = high_df.rolling(window=fastk_period, min_periods=fastk_period).max()
     rolling_low = low_df.rolling(window=fastk_period, min_periods=fastk_period).min()
-    
+
     # 避免除零錯誤
     denominator = rolling_high - rolling_low
     # 當最高價=最低價時，設定RSV為50（中性值）
@@ -28,16 +96,63 @@ def taiwan_kd_fast(high_df, low_df, close_df, fastk_period=9, alpha=1/3):
         50
     )
     rsv = pd.DataFrame(rsv, index=close_df.index, columns=close_df.columns)
-    
+
     # 2. 計算 K 值 (EMA 平滑 RSV)
     k_df = rsv.ewm(alpha=alpha, adjust=False).mean()
-    
+
     # 3. 計算 D 值 (EMA 平滑 K 值)
     d_df = k_df.ewm(alpha=alpha, adjust=False).mean()
-    
+
+    return k_df, d_df
+
+
+def _taiwan_kd_numba(high_df, low_df, close_df, fastk_period, alpha, dtype):
+    """numba 版本: 依欄平行，單次掃描同時產生 K、D"""
+    high_df = high_df.reindex(index=close_df.index, columns=close_df.columns)
+    low_df = low_df.reindex(index=close_df.index, columns=close_df.columns)
+
+    # 以欄為主 (Fortran order) 排列，逐檔股票掃描時記憶體連續
+    high = np.asfortranarray(high_df.to_numpy(dtype=np.float64, na_value=np.nan))
+    low = np.asfortranarray(low_df.to_numpy(dtype=np.float64, na_value=np.nan))
+    close = np.asfortranarray(close_df.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    # pandas ewm 會先把 alpha 換算成 com 再換回來，這裡照做以確保數值逐位元一致
+    com = (1.0 - alpha) / alpha
+    ewm_alpha = 1.0 / (1.0 + com)
+
+    k_out = np.empty(close.shape, dtype=dtype, order='F')
+    d_out = np.empty(close.shape, dtype=dtype, order='F')
+    _taiwan_kd_kernel(high, low, close, fastk_period, ewm_alpha, k_out, d_out)
+
+    k_df = pd.DataFrame(k_out, index=close_df.index, columns=close_df.columns)
+    d_df = pd.DataFrame(d_out, index=close_df.index, columns=close_df.columns)
+    return k_df, d_df
+
+
+def taiwan_kd_fast(high_df, low_df, close_df, fastk_period=9, alpha=1/3, dtype=np.float64, use_numba=True):
+    """
+    快速版台灣標準KD計算
+
+    Args:
+        dtype: 輸出資料型別，np.float32 可減少一半記憶體 (內部仍以 float64 計算)
+        use_numba: 有安裝 numba 時是否使用編譯核心
+    """
+    print(f"⚡ 開始計算台灣標準KD指標 ({len(close_df.columns)} 檔股票)...")
+
+    import time
+    start_time = time.time()
+
+    if use_numba and NUMBA_AVAILABLE:
+        k_df, d_df = _taiwan_kd_numba(high_df, low_df, close_df, fastk_period, alpha, dtype)
+    else:
+        k_df, d_df = _taiwan_kd_pandas(high_df, low_df, close_df, fastk_period, alpha)
+        if dtype != np.float64:
+            k_df = k_df.astype(dtype)
+            d_df = d_df.astype(dtype)
+
     calc_time = time.time() - start_time
     print(f"✅ KD計算完成！耗時: {calc_time:.2f} 秒")
     print(f"📊 K值有效數據: {k_df.count().sum()} 個")
     print(f"📊 D值有效數據: {d_df.count().sum()} 個")
-    
-    return k_df, d_df
\ No newline at end of file
+
+    return k_df, d_df
@@ -1,4 +1,4 @@
-from dash import dcc, html, dash_table, Input, Output, callback
+from dash import dcc, html, dash_table, Input, Output, callback, ctx
 import datetime
 
 class InventoryHistoryTab:
@@ -28,7 +28,16 @@ class InventoryHistoryTab:
                         {'name': '損益', 'id': 'pnl'},
                     ],
                     data=[],
+                    page_current=0,
                     page_size=10,
+                    page_count=1,
+                    # 分頁 / 排序 / 篩選由伺服器端 SQL 處理，只傳送目前頁面的資料
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
                     style_table={'overflowX': 'auto'},
                 )
             ], style={'margin': '20px'})
@@ -40,12 +49,22 @@ class InventoryHistoryTab:
         # 更新庫存歷史表格
         @app.callback(
             Output('inventory-history-table', 'data'),
+            Output('inventory-history-table', 'page_count'),
+            Output('inventory-history-table', 'page_current'),
             Input('account-dropdown', 'value'),
-            Input('inventory-date-picker', 'date')
+            Input('inventory-date-picker', 'date'),
+            Input('inventory-history-table', 'page_current'),
+            Input('inventory-history-table', 'page_size'),
+            Input('inventory-history-table', 'sort_by'),
+            Input('inventory-history-table', 'filter_query'),
         )
-        def update_inventory_history(selected_account, selected_date):
+        def update_inventory_history(selected_account, selected_date, page_current, page_size, sort_by, filter_query):
+            # 換頁以外的變動 (帳戶、日期、排序、篩選) 都回到第一頁
+            if 'inventory-history-table.page_current' not in ctx.triggered_prop_ids:
+                page_current = 0
+
             if not selected_account or not selected_date:
-                return []
+                return [], 1, 0
 
             try:
                 query_date = datetime.datetime.strptime(selected_date, "%Y-%m-%d").date()
@@ -55,9 +74,17 @@ class InventoryHistoryTab:
                     try:
                         query_date = datetime.datetime.fromisoformat(selected_date).date()
                     except:
-                        return []
+                        return [], 1, 0
                 else:
-                    return []
+                    return [], 1, 0
 
-            inventories = self.inventory_service.get_inventories_by_account_and_date(selected_account, query_date)
-            return inventories
\ No newline at end of file
+            try:
+                page = self.inventory_service.get_inventories_page(
+                    selected_account, query_date, page_current, page_size,
+                    sort_by=tuple((item['column_id'], item['direction']) for item in sort_by or []),
+                    filter_query=filter_query,
+                )
+            except ValueError:
+                # 無法解析的篩選條件
+                return [], 1, 0
+            return page['data'], page['page_count'], page_current
\ No newline at end of file
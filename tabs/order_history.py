@@ -1,4 +1,4 @@
-from dash import dcc, html, dash_table, Input, Output, callback
+from dash import dcc, html, dash_table, Input, Output, callback, ctx
 import datetime
 
 class OrderHistoryTab:
@@ -50,7 +50,16 @@ class OrderHistoryTab:
                         {'name': '模擬', 'id': 'view_only'},
                     ],
                     data=[],
+                    page_current=0,
                     page_size=10,
+                    page_count=1,
+                    # 分頁 / 排序 / 篩選由伺服器端 SQL 處理，只傳送目前頁面的資料
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
                     style_table={'overflowX': 'auto'},
                 )
             ], style={'margin': '20px'})
@@ -107,20 +116,39 @@ class OrderHistoryTab:
         # 4. 更新訂單歷史表格
         @app.callback(
             Output('order-history-table', 'data'),
+            Output('order-history-table', 'page_count'),
+            Output('order-history-table', 'page_current'),
             Input('account-dropdown', 'value'),
             Input('order-year-dropdown', 'value'),
             Input('order-month-dropdown', 'value'),
             Input('order-day-dropdown', 'value'),
+            Input('order-history-table', 'page_current'),
+            Input('order-history-table', 'page_size'),
+            Input('order-history-table', 'sort_by'),
+            Input('order-history-table', 'filter_query'),
         )
-        def update_order_history(selected_account, selected_year, selected_month, selected_day):
+        def update_order_history(selected_account, selected_year, selected_month, selected_day,
+                                 page_current, page_size, sort_by, filter_query):
+            # 換頁以外的變動 (帳戶、日期、排序、篩選) 都回到第一頁
+            if 'order-history-table.page_current' not in ctx.triggered_prop_ids:
+                page_current = 0
+
             if not selected_account or not selected_year or not selected_month or not selected_day:
-                return []
+                return [], 1, 0
 
             try:
                 date_str = f"{selected_year}-{selected_month}-{selected_day}"
                 query_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
             except Exception as e:
-                return []
+                return [], 1, 0
 
-            orders = self.order_service.get_orders_by_account_and_date(selected_account, query_date)
-            return orders
\ No newline at end of file
+            try:
+                page = self.order_service.get_orders_page(
+                    selected_account, query_date, page_current, page_size,
+                    sort_by=tuple((item['column_id'], item['direction']) for item in sort_by or []),
+                    filter_query=filter_query,
+                )
+            except ValueError:
+                # 無法解析的篩選條件
+                return [], 1, 0
+            return page['data'], page['page_count'], page_current
\ No newline at end of file
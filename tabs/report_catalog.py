@@ -0,0 +1,80 @@
+from dash import dcc, html, dash_table, Input, Output, callback, ctx
+from dash.dash_table import FormatTemplate
+
+class ReportCatalogTab:
+    def __init__(self, report_catalog_service):
+        self.report_catalog_service = report_catalog_service
+
+    def get_layout(self):
+        """返回回測報告標籤的版面配置"""
+        percentage = FormatTemplate.percentage(2)
+        return html.Div([
+            html.Div([
+                html.Label("策略："),
+                dcc.Dropdown(
+                    id='report-strategy-dropdown',
+                    options=self.report_catalog_service.get_strategy_options(),
+                    value=None,
+                    placeholder="全部策略"
+                )
+            ], style={'width': '30%', 'margin': '10px'}),
+
+            html.Div([
+                dash_table.DataTable(
+                    id='report-catalog-table',
+                    columns=[
+                        {'name': '策略', 'id': 'strategy_name'},
+                        {'name': '回測時間', 'id': 'report_timestamp'},
+                        {'name': '年化報酬率', 'id': 'annual_return', 'type': 'numeric', 'format': percentage},
+                        {'name': '最大回檔', 'id': 'max_drawdown', 'type': 'numeric', 'format': percentage},
+                        {'name': 'Sharpe', 'id': 'sharpe_ratio', 'type': 'numeric'},
+                        {'name': '勝率', 'id': 'win_rate', 'type': 'numeric', 'format': percentage},
+                        {'name': '檔案大小(bytes)', 'id': 'size_bytes', 'type': 'numeric'},
+                        {'name': '報告', 'id': 'link', 'presentation': 'markdown', 'sortable': False},
+                    ],
+                    data=[],
+                    page_current=0,
+                    page_size=20,
+                    page_count=1,
+                    # 分頁 / 排序 / 篩選由 report_catalog 資料表處理，不掃描 assets/ 目錄
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
+                    markdown_options={'link_target': '_blank'},
+                    style_table={'overflowX': 'auto'},
+                )
+            ], style={'margin': '20px'})
+        ])
+
+    def register_callbacks(self, app):
+        """註冊該標籤所需的回調函數"""
+
+        @app.callback(
+            Output('report-catalog-table', 'data'),
+            Output('report-catalog-table', 'page_count'),
+            Output('report-catalog-table', 'page_current'),
+            Input('report-strategy-dropdown', 'value'),
+            Input('report-catalog-table', 'page_current'),
+            Input('report-catalog-table', 'page_size'),
+            Input('report-catalog-table', 'sort_by'),
+            Input('report-catalog-table', 'filter_query'),
+        )
+        def update_report_catalog(selected_strategy, page_current, page_size, sort_by, filter_query):
+            # 換頁以外的變動 (策略、排序、篩選) 都回到第一頁
+            if 'report-catalog-table.page_current' not in ctx.triggered_prop_ids:
+                page_current = 0
+
+            try:
+                page = self.report_catalog_service.get_reports_page(
+                    page_current, page_size,
+                    sort_by=tuple((item['column_id'], item['direction']) for item in sort_by or []),
+                    filter_query=filter_query,
+                    strategy_name=selected_strategy or None,
+                )
+            except ValueError:
+                # 無法解析的篩選條件
+                return [], 1, 0
+            return page['data'], page['page_count'], page_current
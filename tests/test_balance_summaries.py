@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import random
+import datetime
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dao.connection import get_connection, close_connections
+from dao.schema import _backfill_balance_summaries
+from dao.balance_dao import BalanceDAO
+
+
+def legacy_monthly_balance_data(conn, account_id, start_year, end_year):
+    """改用 monthly_returns 之前的計算方式: 每次查詢都以 window function 掃描 balance_history"""
+    rows = conn.execute("""
+        WITH monthly_data AS (
+            SELECT
+                substr(fetch_month, 1, 4) as year,
+                substr(fetch_month, 6, 2) as month,
+                total_assets,
+                ROW_NUMBER() OVER (PARTITION BY fetch_month ORDER BY fetch_timestamp ASC) as month_start_rank,
+                ROW_NUMBER() OVER (PARTITION BY fetch_month ORDER BY fetch_timestamp DESC) as month_end_rank
+            FROM balance_history
+            WHERE account_id = ? AND fetch_timestamp >= ? AND fetch_timestamp < ?
+        )
+        SELECT year, month, total_assets,
+            CASE WHEN month_start_rank = 1 THEN 'start' WHEN month_end_rank = 1 THEN 'end' END as position
+        FROM monthly_data
+        WHERE month_start_rank = 1 OR month_end_rank = 1
+    """, (account_id, f"{int(start_year)}-01-01", f"{int(end_year) + 1}-01-01")).fetchall()
+
+    monthly_data = {}
+    for row in rows:
+        monthly_data.setdefault(row['year'], {}).setdefault(row['month'], {})[row['position']] = row['total_assets']
+    return monthly_data
+
+
+class TestMonthlyReturns(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'test.db')
+        self.dao = BalanceDAO(self.db_path)
+
+        # 兩個帳戶、跨年度、寫入順序打亂 (補抓舊資料)
+        rng = random.Random(3)
+        start = datetime.datetime(2023, 11, 1, 9, 0)
+        timestamps = [start + datetime.timedelta(hours=7 * i) for i in range(400)]
+        rng.shuffle(timestamps)
+
+        self.account_ids = [
+            self.dao.get_account_id('junting_fugle', 'fugle', 'junting'),
+            self.dao.get_account_id('alan_shioaji', 'shioaji', 'alan'),
+        ]
+        for i, fetch_timestamp in enumerate(timestamps):
+            account_id = self.account_ids[i % 2]
+            total_assets = round(rng.uniform(9e5, 1.1e6), 2)
+            self.dao.insert_balance(account_id, {
+                'bank_balance': total_assets, 'settlements': 0, 'adjusted_bank_balance': total_assets,
+                'market_value': 0, 'total_assets': total_assets,
+            }, fetch_timestamp)
+        # 2024-06 只有一筆
+        self.dao.insert_balance(self.account_ids[0], {
+            'bank_balance': 1e6, 'settlements': 0, 'adjusted_bank_balance': 1e6,
+            'market_value': 0, 'total_assets': 1e6,
+        }, datetime.datetime(2024, 6, 14, 13, 30))
+
+    def tearDown(self):
+        close_connections()
+        self.directory.cleanup()
+
+    def assert_matches_legacy(self):
+        conn = get_connection(self.db_path)
+        for account_id in self.account_ids:
+            for start_year, end_year in ((2023, 2024), (2024, 2024), (2023, 2025)):
+                self.assertEqual(
+                    self.dao.get_monthly_balance_data(account_id, start_year, end_year),
+                    legacy_monthly_balance_data(conn, account_id, start_year, end_year),
+                )
+
+    def test_incremental_summary_matches_legacy_query(self):
+        self.assert_matches_legacy()
+        monthly_data = self.dao.get_monthly_balance_data(self.account_ids[0], 2024, 2024)
+        self.assertEqual(monthly_data['2024']['06'], {'start': 1e6})
+
+    def test_backfill_matches_legacy_query(self):
+        # migration 由既有 balance_history 重建彙總表，結果應與逐筆維護相同
+        conn = get_connection(self.db_path)
+        with conn:
+            _backfill_balance_summaries(conn)
+        self.assert_matches_legacy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import socket
+import stat
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.broker_gateway import (
+    BrokerGatewayClient, BrokerGatewayServer, BrokerSessionPool, FakeBrokerAccount, GatewayError, RemoteObject
+)
+
+
+class FakeApi:
+    """模擬不可 pickle 的券商 SDK 物件 (持有 lock)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stock_account = {'account_id': 'A001'}
+
+    def list_positions(self, account, unit=None):
+        return [{'account': account['account_id'], 'unit': unit}]
+
+
+class FakeSinopacAccount(FakeBrokerAccount):
+    def __init__(self):
+        super().__init__(cash=500, settlement=-100)
+        self.api = FakeApi()
+
+
+class TestBrokerGateway(unittest.TestCase):
+    def setUp(self):
+        self.logins = []
+
+        def login(user_name, broker_name):
+            self.logins.append((user_name, broker_name))
+            return FakeSinopacAccount()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'gateway.sock')
+        self.server = BrokerGatewayServer(self.socket_path, BrokerSessionPool(login))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_session_is_reused_across_clients(self):
+        for _ in range(3):
+            client = BrokerGatewayClient(self.socket_path)
+            account = client.session('junting', 'shioaji')
+            self.assertEqual(account.get_total_balance(), 400)
+            client.close()
+        self.assertEqual(self.logins, [('junting', 'shioaji')])
+
+    def test_sdk_objects_stay_remote(self):
+        client = BrokerGatewayClient(self.socket_path)
+        account = client.session('junting', 'shioaji')
+        self.assertIsInstance(account.api, RemoteObject)
+        positions = account.api.list_positions(account.api.stock_account, unit='Share')
+        self.assertEqual(positions, [{'account': 'A001', 'unit': 'Share'}])
+
+        order_id = account.create_order('BUY', '2330', 1000, price=600)
+        self.assertEqual(account.get_orders()[order_id]['stock_id'], '2330')
+        client.close()
+
+    def test_remote_exception_is_raised(self):
+        client = BrokerGatewayClient(self.socket_path)
+        account = client.session('junting', 'shioaji')
+        with self.assertRaises(AttributeError):
+            account.not_exist
+        self.assertFalse(hasattr(account, 'not_exist'))
+        client.close()
+
+    def test_remote_objects_are_released(self):
+        client = BrokerGatewayClient(self.socket_path)
+        account = client.session('junting', 'shioaji')
+        api = account.api
+        baseline = client.stats()
+        for _ in range(200):
+            self.assertEqual(account.get_total_balance(), 400)
+            self.assertEqual(account.api.stock_account, {'account_id': 'A001'})
+        # 長時間保持連線的用戶端，gateway 保留的代理物件數不會隨呼叫次數增加
+        self.assertLessEqual(client.stats(), baseline + 2)
+        # 重複取得同一個屬性共用編號，釋放其他代理後仍持有的代理可繼續使用
+        self.assertEqual(api.list_positions(api.stock_account), [{'account': 'A001', 'unit': None}])
+        del api
+        self.assertLess(client.stats(), baseline)
+        client.close()
+
+    def test_socket_is_owner_only(self):
+        mode = stat.S_IMODE(os.stat(self.socket_path).st_mode)
+        self.assertEqual(mode, 0o600)
+
+
+@unittest.skipUnless(hasattr(socket, 'SO_PEERCRED'), "SO_PEERCRED not supported")
+class TestBrokerGatewayPeerCheck(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'gateway.sock')
+        # 只允許其他 uid: 目前使用者的連線應被拒絕
+        pool = BrokerSessionPool(lambda user_name, broker_name: FakeSinopacAccount())
+        self.server = BrokerGatewayServer(self.socket_path, pool, allowed_uids={os.getuid() + 1})
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_other_user_is_rejected(self):
+        client = BrokerGatewayClient(self.socket_path, call_timeout=3)
+        with self.assertRaises((GatewayError, OSError)):
+            client.session('junting', 'shioaji')
+        client.close()
+        self.assertEqual(len(self.server.pool), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy_class.compact import PackedMask, downcast_float32
+from strategy_class.indicator_cache import IndicatorCache
+
+
+class TestCompact(unittest.TestCase):
+    def test_packed_mask_round_trip(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2024-01-01', periods=37, freq='B')
+        df = pd.DataFrame(rng.random((37, 13)) > 0.5, index=index, columns=[f"{i:04d}" for i in range(13)])
+        packed = PackedMask(df)
+        self.assertLess(packed.nbytes, df.to_numpy().nbytes)
+        pd.testing.assert_frame_equal(packed.unpack(), df)
+
+    def test_downcast_only_float64(self):
+        df = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, np.nan]})
+        self.assertTrue((downcast_float32(df).dtypes == np.float32).all())
+        mixed = pd.DataFrame({'a': [1.0, 2.0], 'b': [True, False]})
+        self.assertIs(downcast_float32(mixed), mixed)
+
+    def test_compact_cache_returns_same_condition(self):
+        df = pd.DataFrame(np.arange(20).reshape(4, 5) % 3 == 0)
+        cache = IndicatorCache(compact=True)
+        first = cache.get_or_compute('condition', (), 'test', lambda: df)
+        second = cache.get_or_compute('condition', (), 'test', lambda: None)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertLess(cache.stats()['bytes'], df.to_numpy().nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
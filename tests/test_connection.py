@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dao.connection import get_connection, close_connections, bulk_insert
+
+
+class TestConnection(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'test.db')
+
+    def tearDown(self):
+        close_connections()
+        self.directory.cleanup()
+
+    def test_same_thread_reuses_connection(self):
+        conn = get_connection(self.db_path)
+        self.assertIs(get_connection(self.db_path), conn)
+        # 相對路徑與絕對路徑視為同一個資料庫
+        relative_path = os.path.relpath(self.db_path)
+        self.assertIs(get_connection(relative_path), conn)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_each_thread_has_own_connection(self):
+        main_conn = get_connection(self.db_path)
+        with main_conn:
+            main_conn.execute('CREATE TABLE item (value INTEGER)')
+
+        results = {}
+        barrier = threading.Barrier(2)
+
+        def worker(name):
+            conn = get_connection(self.db_path)
+            barrier.wait()
+            with conn:
+                bulk_insert(conn, 'INSERT INTO item (value) VALUES (?)', ((i,) for i in range(100)))
+            results[name] = (conn, conn is get_connection(self.db_path))
+            close_connections()
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in ('a', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(results['a'][1] and results['b'][1])
+        self.assertEqual(len({id(results['a'][0]), id(results['b'][0]), id(main_conn)}), 3)
+        self.assertEqual(main_conn.execute('SELECT COUNT(*) FROM item').fetchone()[0], 200)
+
+    def test_close_connections_only_affects_current_thread(self):
+        main_conn = get_connection(self.db_path)
+        thread = threading.Thread(target=lambda: (get_connection(self.db_path), close_connections()))
+        thread.start()
+        thread.join()
+        # 其他 thread 關閉自己的連線後，目前 thread 的連線仍可使用
+        self.assertEqual(main_conn.execute('SELECT 1').fetchone()[0], 1)
+        close_connections()
+        self.assertIsNot(get_connection(self.db_path), main_conn)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.data_cache import FinLabDataCache, DATA_FILENAME, expected_trading_date
+
+
+def make_frame(days, columns, start='2025-01-01', seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=days, freq='D', name='date')
+    return pd.DataFrame(rng.random((days, len(columns))), index=index, columns=columns)
+
+
+class TestFinLabDataCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = FinLabDataCache(cache_directory=self.directory.name)
+        # 測試不連線 finlab: 下載與 universe 皆以假資料取代
+        mock.patch.object(self.cache, '_universe_stocks', return_value=set()).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def refresh_with(self, df, dataset='price:收盤價'):
+        with mock.patch.object(self.cache, '_fetch', return_value=df):
+            return self.cache.refresh(dataset)
+
+    def test_round_trip_reads_from_disk(self):
+        df = make_frame(30, ['2330', '1101', '0050'])
+        df['0050'] = df['0050'].where(df['0050'] > 0.5)
+
+        with mock.patch.object(self.cache, '_fetch', return_value=df) as fetch:
+            self.cache.get('price:收盤價')
+            cached = self.cache.get('price:收盤價')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(self.cache.is_fresh('price:收盤價'))
+        self.assertEqual(self.cache.last_date('price:收盤價'), '2025-01-30')
+        pd.testing.assert_frame_equal(cached, df, check_freq=False, check_index_type=False, check_column_type=False)
+
+    def test_unchanged_history_appends_rows(self):
+        self.refresh_with(make_frame(30, ['2330', '1101']))
+        self.refresh_with(make_frame(32, ['2330', '1101']))
+
+        meta = self.cache.read_meta('price:收盤價')
+        self.assertEqual(meta['refresh_mode'], 'append')
+        self.assertEqual(meta['rows'], 32)
+        self.assertEqual(os.listdir(self.cache._dataset_directory('price:收盤價')).count(DATA_FILENAME), 1)
+        pd.testing.assert_frame_equal(
+            self.cache._read('price:收盤價'), make_frame(32, ['2330', '1101']),
+            check_freq=False, check_index_type=False, check_column_type=False,
+        )
+
+    def test_revised_history_rewrites(self):
+        self.refresh_with(make_frame(30, ['2330', '1101']))
+        revised = make_frame(32, ['2330', '1101'])
+        # 除權息後重新計算的還原股價: 除權息日之前的價格全部調整
+        revised.iloc[:31, 0] *= 0.9
+        self.refresh_with(revised)
+
+        self.assertEqual(self.cache.read_meta('price:收盤價')['refresh_mode'], 'rewrite')
+        self.assertEqual(self.cache.read_meta('price:收盤價')['segments'], [DATA_FILENAME])
+        self.assertAlmostEqual(self.cache._read('price:收盤價').iloc[3, 0], revised.iloc[3, 0])
+
+    def test_append_keeps_existing_files_unchanged(self):
+        self.refresh_with(make_frame(30, ['2330', '1101']))
+        data_path = self.cache._data_path('price:收盤價')
+        with open(data_path, 'rb') as f:
+            before = f.read()
+
+        self.refresh_with(make_frame(31, ['2330', '1101']))
+        segment_path = os.path.join(self.cache._dataset_directory('price:收盤價'), 'segment_00001.arrow')
+        with open(segment_path, 'rb') as f:
+            segment_before = f.read()
+        self.refresh_with(make_frame(33, ['2330', '1101']))
+
+        # 沒有修正歷史: 既有檔案內容不變，只新增 segment
+        with open(data_path, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        with open(segment_path, 'rb') as f:
+            self.assertEqual(f.read(), segment_before)
+        meta = self.cache.read_meta('price:收盤價')
+        self.assertEqual(meta['segments'], [DATA_FILENAME, 'segment_00001.arrow', 'segment_00002.arrow'])
+        self.assertEqual(meta['rows'], 33)
+        pd.testing.assert_frame_equal(
+            self.cache._read('price:收盤價'), make_frame(33, ['2330', '1101']),
+            check_freq=False, check_index_type=False, check_column_type=False,
+        )
+
+    def test_segments_are_compacted(self):
+        self.cache.max_segments = 2
+        for days in range(30, 35):
+            self.refresh_with(make_frame(days, ['2330', '1101']))
+
+        meta = self.cache.read_meta('price:收盤價')
+        self.assertEqual(meta['refresh_mode'], 'append')
+        self.assertEqual(meta['segments'], [DATA_FILENAME, 'segment_00001.arrow'])
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.cache._dataset_directory('price:收盤價')) if name.endswith('.arrow')),
+            [DATA_FILENAME, 'segment_00001.arrow'],
+        )
+        pd.testing.assert_frame_equal(
+            self.cache._read('price:收盤價'), make_frame(34, ['2330', '1101']),
+            check_freq=False, check_index_type=False, check_column_type=False,
+        )
+
+    def test_new_column_keeps_order_and_dtypes(self):
+        stored = make_frame(30, ['2330', '1101'])
+        self.refresh_with(stored)
+
+        # 新上市的 1234 依 finlab 的欄位順序插在中間，舊日期沒有值
+        updated = make_frame(32, ['2330', '1101'])
+        updated.insert(1, '1234', np.nan)
+        updated.iloc[-2:, 1] = 10.0
+        result = self.refresh_with(updated)
+
+        cached = self.cache._read('price:收盤價')
+        self.assertEqual(self.cache.read_meta('price:收盤價')['refresh_mode'], 'append')
+        self.assertEqual(list(cached.columns), ['2330', '1101', '1234'])
+        self.assertEqual(list(result.columns), ['2330', '1101', '1234'])
+        self.assertTrue((cached.dtypes == 'float64').all())
+        self.assertEqual(cached['1234'].notna().sum(), 2)
+
+    def test_memory_cache_returns_independent_copies(self):
+        df = make_frame(10, ['2330', '1101'])
+        self.cache.enable_memory()
+        with mock.patch.object(self.cache, '_fetch', return_value=df):
+            first = self.cache.get('price:收盤價')
+        # 前一個策略就地修改，不影響下一個策略
+        first.iloc[0, 0] = -1.0
+        second = self.cache.get('price:收盤價')
+        self.assertNotEqual(second.iloc[0, 0], -1.0)
+
+        self.cache.clear_memory()
+        self.assertFalse(self.cache.keep_in_memory)
+        self.cache.get('price:收盤價')
+        self.assertEqual(self.cache._memory, {})
+
+
+    def test_cache_behind_latest_trading_day_is_stale(self):
+        taipei = ZoneInfo("Asia/Taipei")
+        # 週四 21:45 data_refresher 寫入到週四的資料
+        with mock.patch.object(self.cache, '_now', return_value=datetime(2025, 3, 6, 21, 45, tzinfo=taipei)):
+            self.refresh_with(make_frame(30, ['2330'], start='2025-02-05'))
+        self.assertEqual(self.cache.last_date('price:收盤價'), '2025-03-06')
+
+        def fresh_at(*args):
+            with mock.patch.object(self.cache, '_now', return_value=datetime(*args, tzinfo=taipei)):
+                return self.cache.is_fresh('price:收盤價')
+
+        # 週五 08:00 下單: 週五收盤資料尚未更新
+        self.assertTrue(fresh_at(2025, 3, 7, 8, 0))
+        # 週五 20:30 (data_refresher 之前): 快取缺少週五的資料
+        self.assertFalse(fresh_at(2025, 3, 7, 20, 30))
+
+    def test_download_after_data_ready_time_is_fresh(self):
+        taipei = ZoneInfo("Asia/Taipei")
+        # 假日 (週五休市) 21:45 重新下載，資料來源最後仍是週四
+        with mock.patch.object(self.cache, '_now', return_value=datetime(2025, 3, 7, 21, 45, tzinfo=taipei)):
+            self.refresh_with(make_frame(30, ['2330'], start='2025-02-05'))
+        with mock.patch.object(self.cache, '_now', return_value=datetime(2025, 3, 7, 22, 30, tzinfo=taipei)):
+            self.assertTrue(self.cache.is_fresh('price:收盤價'))
+
+    def test_expected_trading_date(self):
+        taipei = ZoneInfo("Asia/Taipei")
+        self.assertEqual(expected_trading_date(datetime(2025, 3, 7, 16, 59, tzinfo=taipei)).day, 6)
+        self.assertEqual(expected_trading_date(datetime(2025, 3, 7, 17, 0, tzinfo=taipei)).day, 7)
+        # 週一早上: 最新交易日為上週五
+        self.assertEqual(expected_trading_date(datetime(2025, 3, 10, 8, 0, tzinfo=taipei)).day, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy_class.live_window import live_start_date, uncovered_columns
+
+
+def hold_until(buy_signal, sell_signal):
+    """與 FinlabDataFrame.hold_until 相同的持倉規則: 未持有時遇買入訊號進場，持有時遇賣出訊號出場"""
+    buy = buy_signal.fillna(False).astype(bool).to_numpy()
+    sell = sell_signal.reindex_like(buy_signal).fillna(False).astype(bool).to_numpy()
+    holding = np.zeros(buy.shape[1], dtype=bool)
+    position = np.zeros(buy.shape, dtype=bool)
+    for row in range(len(buy)):
+        holding = np.where(holding, ~sell[row], buy[row])
+        position[row] = holding
+    return pd.DataFrame(position, index=buy_signal.index, columns=buy_signal.columns)
+
+
+class TestLiveWindowParity(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        index = pd.date_range('2017-01-02', periods=900, freq='B')
+        columns = [str(1000 + i) for i in range(200)]
+        self.buy = pd.DataFrame(rng.random((900, 200)) < 0.01, index=index, columns=columns)
+        self.sell = pd.DataFrame(rng.random((900, 200)) < 0.05, index=index, columns=columns)
+
+        # 9001: 新上市，評估區間之前沒有指標 (NaN)，評估區間內也沒有訊號
+        self.buy['9001'] = np.nan
+        self.sell['9001'] = np.nan
+        # 9002: warm-up 區間買入後一直沒有訊號，持倉來自評估區間之前
+        self.buy['9002'] = False
+        self.sell['9002'] = False
+        self.buy.loc[index[500], '9002'] = True
+
+        self.eval_start = live_start_date(index, 240)
+
+    def test_live_positions_match_full_history(self):
+        uncovered = uncovered_columns(self.buy, self.sell, self.eval_start)
+        self.assertIn('9002', uncovered)
+        self.assertNotIn('9001', uncovered)
+
+        full = hold_until(self.buy, self.sell)
+        live = hold_until(self.buy.loc[self.eval_start:], self.sell)
+        covered = [column for column in self.buy.columns if column not in uncovered]
+        pd.testing.assert_series_equal(live.iloc[-1][covered], full.iloc[-1][covered])
+        # 被回傳的股票確實可能與完整歷史不同
+        self.assertNotEqual(live.iloc[-1]['9002'], full.iloc[-1]['9002'])
+
+    def test_only_sparse_columns_are_uncovered(self):
+        uncovered = uncovered_columns(self.buy, self.sell, self.eval_start)
+        # 有正常賣出訊號的股票在 240 天內幾乎一定會重置，不應觸發完整歷史重算
+        self.assertLess(len(uncovered), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.order_capture import OrderCapture, OrderRecord, AlertingStockRecord, FINLAB_ORDER_LOGGER
+from utils.finlab_patcher import redirect_print, _print_target
+
+
+class TestOrderCapture(unittest.TestCase):
+    def test_captures_orders_and_alerting_stocks(self):
+        finlab_logger = logging.getLogger(FINLAB_ORDER_LOGGER)
+        with OrderCapture() as capture:
+            finlab_logger.info("買入 8101 0.429 張 - 總價約         2672.67")
+            finlab_logger.info("BUY 2330 X 1.0 @ 500.0 with extra bid 1.0% ROD")
+            finlab_logger.info("SELL 0050 X 0.5 @ 150.5 ROD")
+            finlab_logger.info("其他訊息")
+        # 離開 with 後不再擷取
+        finlab_logger.info("BUY 2317 X 1.0 @ 100.0 ROD")
+
+        self.assertEqual(capture.alerting_stocks, [AlertingStockRecord('買入', '8101', 0.429, 2672.67)])
+        self.assertEqual(capture.orders, [
+            OrderRecord('BUY', '2330', 1.0, 500.0, 0.01, 'ROD'),
+            OrderRecord('SELL', '0050', 0.5, 150.5, 0.0, 'ROD'),
+        ])
+
+    def test_two_threads_capture_only_their_own_orders(self):
+        """兩個 thread 同時擷取，各自只取得自己記錄的下單訊息"""
+        finlab_logger = logging.getLogger(FINLAB_ORDER_LOGGER)
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def run(stock_id):
+            with OrderCapture() as capture:
+                barrier.wait()
+                for _ in range(20):
+                    finlab_logger.info(f"SELL {stock_id} X 2.0 @ 20.0 ROD")
+                barrier.wait()
+            results[stock_id] = capture.orders
+
+        threads = [threading.Thread(target=run, args=(stock_id,)) for stock_id in ("2330", "1101")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for stock_id in ("2330", "1101"):
+            self.assertEqual(results[stock_id], [OrderRecord('SELL', stock_id, 2.0, 20.0, 0.0, 'ROD')] * 20)
+
+    def test_concurrent_captures_are_isolated(self):
+        """每個 thread 的 print 導向與擷取互不影響"""
+        finlab_logger = logging.getLogger(FINLAB_ORDER_LOGGER)
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def run(stock_id):
+            with OrderCapture() as capture, redirect_print(lambda message: finlab_logger.info(message)):
+                barrier.wait()
+                for _ in range(50):
+                    print(f"BUY {stock_id} X 1.0 @ 10.0 ROD")
+                barrier.wait()
+            results[stock_id] = [order.stock_id for order in capture.orders]
+
+        threads = [threading.Thread(target=run, args=(stock_id,)) for stock_id in ("1101", "2330", "2317", "0050")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for stock_id, captured in results.items():
+            self.assertEqual(captured, [stock_id] * 50)
+
+
+    def test_threads_started_inside_capture_inherit_context(self):
+        """finlab 在 execute_orders 內另外啟動 thread 時，訊息仍導向目前的擷取"""
+        finlab_logger = logging.getLogger(FINLAB_ORDER_LOGGER)
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+
+        with OrderCapture() as capture, redirect_print(lambda message: finlab_logger.info(message)):
+            thread = threading.Thread(target=print, args=("BUY 2330 X 1.0 @ 500.0 ROD",))
+            thread.start()
+            thread.join()
+            pool.submit(print, "SELL 1101 X 1.0 @ 40.0 ROD").result()
+
+        self.assertEqual([order.stock_id for order in capture.orders], ['2330', '1101'])
+        # worker thread 在區塊內建立，區塊結束後提交的工作不沿用過期的導向
+        self.assertIsNone(pool.submit(_print_target.get).result())
+
+
+if __name__ == '__main__':
+    unittest.main()
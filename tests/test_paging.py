@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import datetime
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dao.connection import close_connections
+from dao.paging import build_where, build_order_by
+from service.order_service import OrderService
+from service.report_catalog_service import ReportCatalogService
+
+
+class TestPaging(unittest.TestCase):
+    def test_filter_query_uses_parameters_and_whitelist(self):
+        columns = {'stock_id': 'stock_id', 'quantity': 'quantity'}
+        clauses, params = build_where('{stock_id} contains "2_3" && {quantity} >= 2', columns)
+        self.assertEqual(clauses, ["stock_id LIKE ? ESCAPE '\\'", "quantity >= ?"])
+        self.assertEqual(params, ['%2\\_3%', 2])
+
+        with self.assertRaises(ValueError):
+            build_where('{raw_data} = 1', columns)
+        with self.assertRaises(ValueError):
+            build_order_by([('quantity; DROP TABLE order_history', 'asc')], columns, default='id ASC')
+
+    def test_orders_page(self):
+        with tempfile.TemporaryDirectory() as directory:
+            service = OrderService(db_path=os.path.join(directory, 'test.db'))
+            timestamp = datetime.datetime(2025, 3, 5, 9, 0)
+            service.order_dao.insert_order_logs(
+                [{'action': 'BUY' if i % 2 == 0 else 'SELL', 'stock_id': str(2300 + i), 'quantity': i}
+                 for i in range(25)],
+                1, timestamp
+            )
+
+            page = service.get_orders_page(1, timestamp.date(), page_current=1, page_size=10,
+                                           sort_by=(('quantity', 'desc'),), filter_query='{action} = BUY')
+            self.assertEqual(page['total'], 13)
+            self.assertEqual(page['page_count'], 2)
+            self.assertEqual([order['quantity'] for order in page['data']], [4, 2, 0])
+            close_connections()
+
+    def test_reports_page_binds_strategy_name(self):
+        with tempfile.TemporaryDirectory() as directory:
+            service = ReportCatalogService(db_path=os.path.join(directory, 'test.db'))
+            # 策略名稱含引號與 filter_query 語法時仍只比對名稱本身
+            strategy_names = ['Alan"TW && {path} contains "x', 'AlanTW']
+            for i in range(6):
+                strategy_name = strategy_names[i % 2]
+                service.report_catalog_dao.upsert_report(
+                    strategy_name, datetime.datetime(2025, 3, i + 1, 20, 0), f"{i}/{i}.html",
+                    metrics={'annual_return': i / 100}
+                )
+
+            page = service.get_reports_page(strategy_name=strategy_names[0])
+            self.assertEqual(page['total'], 3)
+            self.assertEqual({report['strategy_name'] for report in page['data']}, {strategy_names[0]})
+
+            page = service.get_reports_page(filter_query='{annual_return} >= 0.02', strategy_name='AlanTW')
+            self.assertEqual(sorted(report['path'] for report in page['data']), ['3/3.html', '5/5.html'])
+            self.assertEqual(service.get_reports_page()['total'], 6)
+            close_connections()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
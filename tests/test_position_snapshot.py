@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import tempfile
+import importlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.position_snapshot import PositionSnapshotStore, strategy_fingerprint
+
+
+class TestPositionSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = PositionSnapshotStore(directory=self.directory.name, keep=2)
+        self.report = {'position': {'2330': 0.5, '1101': 0.5}}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_matching_snapshot(self):
+        self.store.save('AlanTWStrategyACE', '2025-03-05', self.report, 'abc')
+        self.assertEqual(self.store.load('AlanTWStrategyACE', '2025-03-05', 'abc'), self.report)
+
+    def test_reject_stale_date_and_changed_fingerprint(self):
+        self.store.save('AlanTWStrategyACE', '2025-03-05', self.report, 'abc')
+        # 資料已更新到下一個交易日
+        self.assertIsNone(self.store.load('AlanTWStrategyACE', '2025-03-06', 'abc'))
+        # 策略程式或建構參數不同
+        self.assertIsNone(self.store.load('AlanTWStrategyACE', '2025-03-05', 'def'))
+
+    def test_prune_keeps_latest_dates(self):
+        for data_date in ('2025-03-03', '2025-03-04', '2025-03-05'):
+            self.store.save('AlanTWStrategyACE', data_date, self.report, 'abc')
+        files = sorted(os.listdir(os.path.join(self.directory.name, 'AlanTWStrategyACE')))
+        self.assertEqual(files, ['2025-03-04.json', '2025-03-04.pkl', '2025-03-05.json', '2025-03-05.pkl'])
+        self.assertIsNone(self.store.load('AlanTWStrategyACE', '2025-03-03', 'abc'))
+
+
+class TestStrategyFingerprint(unittest.TestCase):
+    def setUp(self):
+        # 暫存 package: 策略模組 + 共用模組
+        self.directory = tempfile.TemporaryDirectory()
+        package_directory = os.path.join(self.directory.name, 'fingerprint_strategies')
+        os.makedirs(package_directory)
+        with open(os.path.join(package_directory, '__init__.py'), 'w') as f:
+            f.write('')
+        with open(os.path.join(package_directory, 'strategy.py'), 'w') as f:
+            f.write('from .helper import THRESHOLD\n\nclass Strategy:\n    pass\n')
+        self.helper_path = os.path.join(package_directory, 'helper.py')
+        with open(self.helper_path, 'w') as f:
+            f.write('THRESHOLD = 1\n')
+
+        sys.path.insert(0, self.directory.name)
+        self.strategy_class = importlib.import_module('fingerprint_strategies.strategy').Strategy
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        for name in [name for name in sys.modules if name.startswith('fingerprint_strategies')]:
+            del sys.modules[name]
+        self.directory.cleanup()
+
+    def test_dependent_module_change_invalidates(self):
+        before = strategy_fingerprint(self.strategy_class)
+        with open(self.helper_path, 'w') as f:
+            f.write('THRESHOLD = 2\n')
+        self.assertNotEqual(strategy_fingerprint(self.strategy_class), before)
+
+    def test_constructor_flags_change_fingerprint(self):
+        self.assertEqual(strategy_fingerprint(self.strategy_class), strategy_fingerprint(self.strategy_class))
+        self.assertNotEqual(
+            strategy_fingerprint(self.strategy_class),
+            strategy_fingerprint(self.strategy_class, compact=True),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
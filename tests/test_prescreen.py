@@ -0,0 +1,34 @@
+import unittest
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy_class.prescreen import LiquidityPrescreen
+
+
+class TestLiquidityPrescreen(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range('2024-01-01', periods=4, freq='B')
+        # A: 一直符合; B: 只在 start_date 之前符合; C: 價格太低; D: 成交金額不足
+        self.close = pd.DataFrame({'A': [50, 50, 50, 50], 'B': [50, 50, 5, 5],
+                                   'C': [10, 10, 10, 10], 'D': [20, 20, 20, 20]}, index=index, dtype=float)
+        self.volume = pd.DataFrame({'A': [1e6] * 4, 'B': [1e6] * 4,
+                                    'C': [1e7] * 4, 'D': [6e5] * 4}, index=index)
+        self.prescreen = LiquidityPrescreen(min_price=12, min_volume=500 * 1000, min_amount=30000000)
+
+    def test_eligible_columns(self):
+        columns = self.prescreen.eligible_columns(self.close, self.volume)
+        self.assertEqual(list(columns), ['A', 'B'])
+        columns = self.prescreen.eligible_columns(self.close, self.volume, start_date='2024-01-03')
+        self.assertEqual(list(columns), ['A'])
+
+    def test_select_keeps_order_and_skips_missing(self):
+        selected = LiquidityPrescreen.select(self.close, ['D', 'A', 'Z'])
+        self.assertEqual(list(selected.columns), ['A', 'D'])
+
+
+if __name__ == '__main__':
+    unittest.main()
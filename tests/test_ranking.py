@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy_class.ranking import top_n_mask
+
+
+class TestTopNMask(unittest.TestCase):
+    def assert_matches_rank(self, df, top_n):
+        expected = df.rank(axis=1, ascending=False) <= top_n
+        result = top_n_mask(df, top_n)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_random_values_with_nan(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(200, 300))
+        values[rng.random(values.shape) < 0.2] = np.nan
+        df = pd.DataFrame(values)
+        for top_n in (1, 5, 20, 40, 299, 300, 500):
+            self.assert_matches_rank(df, top_n)
+
+    def test_ties_follow_average_rank(self):
+        # 整數值產生大量同值，驗證同值組是否整組入選與 pandas 一致
+        rng = np.random.default_rng(1)
+        values = rng.integers(0, 6, size=(300, 40)).astype(float)
+        values[rng.random(values.shape) < 0.1] = np.nan
+        df = pd.DataFrame(values)
+        for top_n in (1, 2, 3, 7, 10, 25):
+            self.assert_matches_rank(df, top_n)
+
+    def test_edge_rows(self):
+        df = pd.DataFrame([
+            [np.nan, np.nan, np.nan],
+            [1.0, 1.0, 1.0],
+            [np.inf, -np.inf, np.nan],
+            [-np.inf, -np.inf, 2.0],
+        ])
+        for top_n in (0, 1, 2, 3):
+            self.assert_matches_rank(df, top_n)
+
+
+if __name__ == '__main__':
+    unittest.main()
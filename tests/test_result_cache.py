@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import datetime
+import tempfile
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dao.connection import close_connections
+from service.balance_service import BalanceService
+from service.order_service import OrderService
+from service.result_cache import VersionedLRUCache, versioned_cache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'test.db')
+        self.order_service = OrderService(db_path=self.db_path)
+        self.timestamp = datetime.datetime(2025, 3, 5, 20, 30)
+
+    def tearDown(self):
+        close_connections()
+        self.directory.cleanup()
+
+    def test_write_invalidates_cached_result(self):
+        query_date = self.timestamp.date()
+        self.assertEqual(self.order_service.get_orders_by_account_and_date(1, query_date), [])
+
+        self.order_service.order_dao.insert_order_logs(
+            [{'action': 'BUY', 'stock_id': '2330', 'quantity': 1}], 1, self.timestamp
+        )
+        orders = self.order_service.get_orders_by_account_and_date(1, query_date)
+        self.assertEqual([order['stock_id'] for order in orders], ['2330'])
+
+        # 修改回傳結果不影響快取
+        orders.clear()
+        self.assertEqual(len(self.order_service.get_orders_by_account_and_date(1, query_date)), 1)
+
+    def test_lru_is_bounded(self):
+        cache = VersionedLRUCache(maxsize=2)
+        calls = []
+
+        class Service:
+            db_path = self.db_path
+
+            @versioned_cache("order_history", cache=cache)
+            def square(self, x):
+                calls.append(x)
+                return x * x
+
+        service = Service()
+        for x in (1, 2, 1, 3, 1, 2):
+            service.square(x)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+    def test_default_years_follow_current_date(self):
+        balance_service = BalanceService(db_path=self.db_path)
+        calls = []
+        original = balance_service.balance_dao.get_monthly_balance_data
+
+        def get_monthly_balance_data(account_id, start_year, end_year):
+            calls.append((start_year, end_year))
+            return original(account_id, start_year, end_year)
+
+        balance_service.balance_dao.get_monthly_balance_data = get_monthly_balance_data
+        with mock.patch('service.balance_service.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value = datetime.datetime(2024, 12, 31, 23, 0)
+            balance_service.get_monthly_return_data(1)
+            # 明確指定相同年份時命中同一筆快取
+            balance_service.get_monthly_return_data(1, 2021, 2024)
+            # 跨年後預設範圍隨之改變，不沿用舊年份的結果
+            mock_datetime.datetime.now.return_value = datetime.datetime(2025, 1, 1, 9, 0)
+            balance_service.get_monthly_return_data(1)
+        self.assertEqual(calls, [(2021, 2024), (2022, 2025)])
+
+
+if __name__ == '__main__':
+    unittest.main()
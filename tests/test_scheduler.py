@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from jobs import scheduler
+except ImportError:  # 券商 SDK (finlab / shioaji / keyring) 未安裝
+    scheduler = None
+
+
+@unittest.skipUnless(scheduler is not None, "broker SDK not installed")
+class TestMultiAccountScheduler(unittest.TestCase):
+    def setUp(self):
+        # 不執行 __init__ (會登入 finlab)，只測試帳戶的分派與錯誤隔離
+        self.scheduler = scheduler.MultiAccountScheduler.__new__(scheduler.MultiAccountScheduler)
+        self.scheduler.accounts = [('junting', 'fugle'), ('alan', 'shioaji'), ('peter', 'fugle')]
+        self.scheduler.max_workers = 3
+        self.scheduler.fetch_timestamp = None
+
+        self.inventory_fetcher = mock.patch.object(scheduler, 'InventoryFetcher').start()
+        self.balance_fetcher = mock.patch.object(scheduler, 'BalanceFetcherBase').start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_failed_account_does_not_stop_others(self):
+        def login(user_name, broker_name):
+            if user_name == 'alan':
+                raise RuntimeError('login failed')
+            return f'{user_name}-account'
+
+        with mock.patch.object(self.scheduler, 'login', side_effect=login):
+            failed = self.scheduler.run()
+
+        self.assertEqual(list(failed), [('alan', 'shioaji')])
+        error, error_traceback = failed[('alan', 'shioaji')]
+        self.assertIsInstance(error, RuntimeError)
+        self.assertIn('login failed', error_traceback)
+
+        fetched = sorted(call.args[:2] for call in self.balance_fetcher.call_args_list)
+        self.assertEqual(fetched, [('junting', 'fugle'), ('peter', 'fugle')])
+
+    def test_all_accounts_succeed(self):
+        with mock.patch.object(self.scheduler, 'login', return_value='account'):
+            self.assertEqual(self.scheduler.run(), {})
+        self.assertEqual(self.inventory_fetcher.create.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dao.connection import get_connection, close_connections
+from dao.schema import MIGRATIONS, apply_migrations
+from dao.balance_dao import BalanceDAO
+from dao.inventory_dao import InventoryDAO
+from dao.order_dao import OrderDAO
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'test.db')
+
+    def tearDown(self):
+        close_connections()
+        self.directory.cleanup()
+
+    def test_new_database_applies_every_migration_once(self):
+        OrderDAO(self.db_path)
+        InventoryDAO(self.db_path)
+        BalanceDAO(self.db_path)
+        conn = get_connection(self.db_path)
+
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+        self.assertEqual(versions, [migration[0] for migration in MIGRATIONS])
+        self.assertIn('order_date', column_names(conn, 'order_history'))
+        self.assertIn('fetch_date', column_names(conn, 'inventory_history'))
+        self.assertTrue({'fetch_date', 'fetch_month'} <= column_names(conn, 'balance_history'))
+        self.assertTrue({
+            'idx_order_history_account_timestamp', 'idx_order_history_account_date',
+            'idx_inventory_history_account_timestamp', 'idx_balance_history_account_timestamp',
+        } <= index_names(conn))
+
+        # 再次套用 (例如另一個行程啟動) 不會重複執行
+        with conn:
+            for table in ('order_history', 'inventory_history', 'balance_history'):
+                self.assertEqual(apply_migrations(conn, table), [])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0], len(MIGRATIONS))
+
+    def test_existing_database_is_upgraded_in_place(self):
+        # 建立 migration 之前的 order_history (沒有 order_date 欄位與索引) 並寫入資料
+        legacy = sqlite3.connect(self.db_path)
+        legacy.execute("""
+            CREATE TABLE order_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id INTEGER,
+                order_timestamp TEXT,
+                create_timestamp TEXT DEFAULT (datetime('now','localtime')),
+                action TEXT,
+                stock_id TEXT,
+                stock_name TEXT,
+                quantity REAL,
+                limit_price REAL,
+                extra_bid_pct REAL,
+                order_condition TEXT,
+                view_only INTEGER DEFAULT 0
+            )
+        """)
+        legacy.execute(
+            "INSERT INTO order_history (account_id, action, stock_id, order_timestamp) VALUES (1, 'BUY', '2330', '2025-03-05 13:00:00')"
+        )
+        legacy.commit()
+        legacy.close()
+
+        OrderDAO(self.db_path)
+        conn = get_connection(self.db_path)
+        self.assertEqual(conn.execute("SELECT order_date FROM order_history").fetchone()[0], '2025-03-05')
+        self.assertIn('idx_order_history_account_date', index_names(conn))
+
+        with conn:
+            self.assertEqual(apply_migrations(conn, 'order_history'), [])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM order_history").fetchone()[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import multiprocessing
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.data_cache import FinLabDataCache
+from utils.shared_frames import SharedFrameStore, attach_frame, is_shareable
+
+
+def make_frame(days=50, columns=('2330', '1101', '0050')):
+    index = pd.date_range('2025-01-01', periods=days, freq='D', name='date')
+    values = np.arange(days * len(columns), dtype='float64').reshape(days, len(columns))
+    return pd.DataFrame(values, index=index, columns=list(columns))
+
+
+def sum_in_child(spec):
+    """子行程: 以 shared memory 重建 DataFrame 並回傳總和"""
+    df, segment = attach_frame(spec)
+    total = float(df.to_numpy().sum())
+    del df
+    segment.close()
+    return total
+
+
+class TestSharedFrames(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedFrameStore()
+        self.addCleanup(self.store.close)
+
+    def test_child_process_reads_shared_values(self):
+        df = make_frame()
+        spec = self.store.publish('price:收盤價', df)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            self.assertEqual(pool.apply(sum_in_child, (spec,)), float(df.to_numpy().sum()))
+
+    def test_attached_frame_is_zero_copy_and_protected(self):
+        df = make_frame()
+        spec = self.store.publish('price:收盤價', df)
+        shared, segment = attach_frame(spec)
+        self.addCleanup(segment.close)
+        pd.testing.assert_frame_equal(shared, df)
+        buffer = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=segment.buf)
+        self.assertTrue(np.shares_memory(shared['2330'].to_numpy(), buffer))
+
+        # 策略就地修改取得的複本，不影響共用的資料
+        cache = FinLabDataCache()
+        cache._shared['price:收盤價'] = shared
+        with mock.patch.object(cache, '_universe_stocks', return_value=set()):
+            result = cache.get('price:收盤價')
+        result.iloc[0, 0] = -1.0
+        result[result > 10] = 0.0
+        self.assertEqual(buffer[0, 0], 0.0)
+        self.assertEqual(buffer[-1, -1], df.iloc[-1, -1])
+        del shared, result, buffer
+
+    def test_mixed_dtypes_are_not_shared(self):
+        df = make_frame()
+        df['0050'] = df['0050'] > 10
+        self.assertFalse(is_shareable(df))
+        self.assertIsNone(self.store.publish('price:收盤價', df))
+        self.assertEqual(self.store.nbytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import io
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from strategy_class import taiwan_kd
+from strategy_class.taiwan_kd import taiwan_kd_fast
+
+
+def make_prices(rows=300, cols=40, nan_ratio=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, (rows, cols)), axis=0))
+    high = close * (1 + rng.random((rows, cols)) * 0.02)
+    low = close * (1 - rng.random((rows, cols)) * 0.02)
+
+    # 停牌區間 (最高=最低=收盤) 與缺值
+    high[50:70, 0] = low[50:70, 0] = close[50:70, 0] = 10.0
+    for values in (high, low, close):
+        values[rng.random((rows, cols)) < nan_ratio] = np.nan
+    close[:30, 1] = high[:30, 1] = low[:30, 1] = np.nan
+
+    index = pd.date_range('2020-01-01', periods=rows, freq='B')
+    columns = [f"{i:04d}" for i in range(cols)]
+    return tuple(pd.DataFrame(v, index=index, columns=columns) for v in (high, low, close))
+
+
+class TestTaiwanKD(unittest.TestCase):
+    def run_kd(self, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return taiwan_kd_fast(*args, **kwargs)
+
+    @unittest.skipUnless(taiwan_kd.NUMBA_AVAILABLE, "numba not installed")
+    def test_numba_matches_pandas(self):
+        high, low, close = make_prices()
+        expected_k, expected_d = self.run_kd(high, low, close, use_numba=False)
+        k, d = self.run_kd(high, low, close)
+        pd.testing.assert_frame_equal(k, expected_k, check_exact=True)
+        pd.testing.assert_frame_equal(d, expected_d, check_exact=True)
+
+    def test_float32_output(self):
+        high, low, close = make_prices(rows=120, cols=10)
+        expected_k, _ = self.run_kd(high, low, close, use_numba=False)
+        k, d = self.run_kd(high, low, close, dtype=np.float32)
+        self.assertTrue((k.dtypes == np.float32).all())
+        self.assertTrue((d.dtypes == np.float32).all())
+        np.testing.assert_allclose(k.to_numpy(), expected_k.to_numpy(), rtol=1e-6, equal_nan=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
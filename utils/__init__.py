@@ -1,10 +1,21 @@
 # utils/__init__.py
-from .authentication import Authenticator
-from .config_loader import ConfigLoader
-from .logger_manager import LoggerManager
+import importlib
 
 __all__ = [
     'Authenticator',
     'ConfigLoader',
     'LoggerManager'
-]
\ No newline at end of file
+]
+
+# 延遲載入: 匯入 utils.xxx 子模組時不必一併載入券商 SDK (authentication 需要 keyring / finlab)
+_EXPORTS = {
+    'Authenticator': '.authentication',
+    'ConfigLoader': '.config_loader',
+    'LoggerManager': '.logger_manager',
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,6 +2,7 @@ import os
 from os import path
 import sys
 import logging
+import threading
 import traceback
 import keyring
 import finlab
@@ -9,12 +10,31 @@ from finlab.online.fugle_account import FugleAccount
 from finlab.online.sinopac_account import SinopacAccount
 from fugle_trade.util import setup_keyring
 from utils.config_loader import ConfigLoader
+from utils.broker_gateway import GatewayError, create_broker_gateway_client
 
 logger = logging.getLogger(__name__)
 
+# 券商帳密經由 os.environ / keyring 傳給 SDK (行程共用)，多帳戶登入需依序進行
+_broker_login_lock = threading.Lock()
+
+
+def login_broker_for_user(config_path, user_name, broker_name, use_gateway=True):
+    """載入指定帳戶的設定並登入券商 (同一行程內依序執行，避免帳戶之間的環境變數互相覆蓋)"""
+    with _broker_login_lock:
+        config_loader = ConfigLoader(config_path)
+        config_loader.load_global_env_vars()
+        config_loader.load_user_config(user_name, broker_name)
+        return Authenticator(config_loader, use_gateway=use_gateway).login_broker(broker_name)
+
+
 class Authenticator:
-    def __init__(self, config_loader: ConfigLoader | None = None):
+    def __init__(self, config_loader: ConfigLoader | None = None, use_gateway=True):
+        """
+        Args:
+            use_gateway: config.yaml 啟用 broker_gateway 時，是否優先使用 gateway 中已登入的帳戶
+        """
         self.config_loader = config_loader
+        self.use_gateway = use_gateway
 
     def login_finlab(self):
         if not self.config_loader:
@@ -95,8 +115,37 @@ class Authenticator:
         logger.info("Successfully logged into Shioaji")
         return account
 
+    def _connect_broker_gateway(self, broker_name: str):
+        """取得 broker gateway 中已登入的帳戶，gateway 未啟用或無法連線時回傳 None"""
+        if not self.use_gateway or not self.config_loader:
+            return None
+        gateway_config = self.config_loader.config.get("broker_gateway") or {}
+        user_name = self.config_loader.user_name
+        if not gateway_config.get("enabled", False) or not user_name:
+            return None
+
+        client = create_broker_gateway_client(gateway_config)
+        try:
+            client.connect()
+        except OSError as e:
+            logger.warning(f"無法連線 broker gateway ({client.socket_path})，改為直接登入: {e}")
+            return None
+
+        try:
+            account = client.session(user_name, broker_name)
+        except GatewayError as e:
+            client.close()
+            logger.warning(f"broker gateway 連線中斷，改為直接登入: {e}")
+            return None
+        logger.info(f"Using broker gateway session for {user_name}/{broker_name}")
+        return account
+
     def login_broker(self, broker_name: str):
         broker_name = broker_name.lower()
+        account = self._connect_broker_gateway(broker_name)
+        if account is not None:
+            return account
+
         if broker_name == "fugle":
             return self._login_fugle()
         elif broker_name == "shioaji":
@@ -0,0 +1,541 @@
+"""
+券商連線 Gateway
+每個工作 (抓取帳務、下單) 原本都要自行登入券商: 富果會刪除並重建 keyring cryptfile，
+永豐需要完整的憑證登入，每次耗時數秒且券商會限制登入頻率。
+
+Gateway 為常駐行程，保持已登入的 FugleAccount / SinopacAccount，工作透過 Unix socket
+取得帳戶代理物件 (RemoteObject)，屬性存取與方法呼叫都轉送到 gateway 內的真實帳戶執行:
+
+- 可 pickle 的回傳值 (數字、字串、dict、DataFrame、委託資料等) 直接回傳
+- 不可 pickle 或可呼叫的物件 (例如 account.api、account.sdk、方法) 回傳代理物件
+- 代理物件可以作為參數傳回 gateway (例如 api.list_positions(api.stock_account))
+- 代理物件被回收時 (RemoteObject.__del__) 記錄其編號，下一次呼叫前送出 release，
+  gateway 依引用數釋放；重複取得同一個屬性 (例如每次 account.get_cash) 沿用同一個編號，
+  保持連線的用戶端不會讓 gateway 內的物件表無限增長
+
+訊息以 pickle 編碼，因此只接受同一個使用者的連線: socket 檔案建立時即為 0600，
+gateway 另以 SO_PEERCRED 檢查對端行程的 uid (Linux)，其他使用者的連線直接關閉。
+
+使用方式:
+    client = BrokerGatewayClient("/tmp/stock-analysis-broker-gateway.sock")
+    account = client.session("junting", "shioaji")
+    cash = account.get_cash()
+"""
+import collections
+import inspect
+import io
+import itertools
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!Q")
+
+# 直接以值回傳的基本型別 (其餘 session 根物件的屬性一律以代理物件回傳)
+_PRIMITIVE_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+class GatewayError(RuntimeError):
+    """Gateway 連線或協定錯誤"""
+
+
+class RemoteError(RuntimeError):
+    """Gateway 端執行失敗且例外無法傳回時使用，訊息包含遠端 traceback"""
+
+
+def send_message(sock, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    """讀取一則訊息，對方關閉連線時回傳 None"""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        raise GatewayError("連線在訊息傳送途中中斷")
+    return payload
+
+
+def peer_uid(sock):
+    """回傳 Unix socket 對端行程的 uid，平台不支援 SO_PEERCRED 時回傳 None"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    return uid
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class RemoteObject:
+    """Gateway 內物件的代理，屬性存取與呼叫都轉送到 gateway 執行"""
+
+    __slots__ = ("_client", "_ref", "_type_name", "_generation")
+
+    def __init__(self, client, ref, type_name, generation=0):
+        self._client = client
+        self._ref = ref
+        self._type_name = type_name
+        self._generation = generation
+
+    def __del__(self):
+        # 不在 __del__ 中使用 socket (可能正在其他呼叫中)，只記錄待釋放的編號
+        try:
+            self._client._release_later(self._ref, self._generation)
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return self._client.request("getattr", self._ref, name)
+
+    def __call__(self, *args, **kwargs):
+        return self._client.request("call", self._ref, args, kwargs)
+
+    def __repr__(self):
+        return f"<RemoteObject {self._type_name} #{self._ref}>"
+
+
+class _ClientPickler(pickle.Pickler):
+    """代理物件作為參數時，只傳送其編號，由 gateway 換回真實物件"""
+
+    def persistent_id(self, obj):
+        if isinstance(obj, RemoteObject):
+            return ("ref", obj._ref)
+        return None
+
+
+class BrokerGatewayClient:
+    """
+    Gateway 用戶端
+
+    Args:
+        socket_path: gateway 的 Unix socket 路徑
+        connect_timeout: 連線逾時秒數
+        call_timeout: 單次呼叫逾時秒數 (None 表示不限制)
+    """
+
+    def __init__(self, socket_path, connect_timeout=3.0, call_timeout=None):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self._sock = None
+        self._lock = threading.Lock()
+        # 代理物件編號只在同一條連線有效，重新連線後舊編號不再送出 release
+        self._generation = 0
+        self._released = collections.deque()
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(self.call_timeout)
+        self._sock = sock
+        self._generation += 1
+        self._released.clear()
+
+    def _release_later(self, ref, generation):
+        if generation == self._generation:
+            self._released.append(ref)
+
+    def _send_releases(self):
+        """送出已回收的代理物件編號 (呼叫端需持有 self._lock)"""
+        refs = []
+        while self._released:
+            refs.append(self._released.popleft())
+        if not refs:
+            return
+        send_message(self._sock, pickle.dumps(("release", refs), protocol=pickle.HIGHEST_PROTOCOL))
+        if recv_message(self._sock) is None:
+            raise GatewayError("gateway 已中斷連線")
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def request(self, *message):
+        buffer = io.BytesIO()
+        _ClientPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(message)
+
+        with self._lock:
+            if self._sock is None:
+                self.connect()
+            try:
+                self._send_releases()
+                send_message(self._sock, buffer.getvalue())
+                data = recv_message(self._sock)
+                if data is None:
+                    raise GatewayError("gateway 已中斷連線")
+            except GatewayError:
+                self._sock.close()
+                self._sock = None
+                raise
+            generation = self._generation
+
+        return self._decode(pickle.loads(data), generation)
+
+    def _decode(self, response, generation=0):
+        kind = response[0]
+        if kind == "value":
+            return response[1]
+        if kind == "ref":
+            return RemoteObject(self, response[1], response[2], generation)
+        if kind == "error":
+            _, exc_payload, message, remote_traceback = response
+            exc = None
+            if exc_payload is not None:
+                try:
+                    exc = pickle.loads(exc_payload)
+                except Exception:
+                    exc = None
+            if exc is None:
+                raise RemoteError(f"{message}\n{remote_traceback}")
+            raise exc from RemoteError(remote_traceback)
+        raise GatewayError(f"未知的回應類型: {kind}")
+
+    def ping(self):
+        return self.request("ping")
+
+    def session(self, user_name, broker_name):
+        """取得指定帳戶的代理物件 (gateway 尚未登入時會先登入)"""
+        return self.request("session", user_name, broker_name)
+
+    def invalidate(self, user_name, broker_name):
+        """捨棄 gateway 中的登入狀態，下次使用時重新登入"""
+        return self.request("invalidate", user_name, broker_name)
+
+    def stats(self):
+        """目前連線在 gateway 中保留的代理物件數 (診斷用)"""
+        return self.request("stats")
+
+
+def create_broker_gateway_client(gateway_config: dict) -> BrokerGatewayClient:
+    """依 config.yaml 的 broker_gateway 區塊建立用戶端"""
+    return BrokerGatewayClient(
+        socket_path=gateway_config.get("socket_path", "/tmp/stock-analysis-broker-gateway.sock"),
+        connect_timeout=gateway_config.get("connect_timeout", 3),
+        call_timeout=gateway_config.get("call_timeout"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class BrokerSessionPool:
+    """
+    保存已登入的券商帳戶
+
+    Args:
+        login: 登入函式 login(user_name, broker_name) -> account
+        max_age_seconds: 登入超過此秒數後重新登入 (None 表示不過期)
+    """
+
+    def __init__(self, login, max_age_seconds=None):
+        self._login = login
+        self.max_age_seconds = max_age_seconds
+        self._sessions = {}
+        self._locks = {}
+        self._pool_lock = threading.Lock()
+
+    def lock(self, key):
+        """同一個帳戶的登入與呼叫依序執行 (券商 SDK 不保證 thread-safe)"""
+        with self._pool_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.RLock()
+            return self._locks[key]
+
+    def _expired(self, logged_in_at):
+        return self.max_age_seconds is not None and time.monotonic() - logged_in_at > self.max_age_seconds
+
+    def get(self, user_name, broker_name):
+        key = (user_name, broker_name)
+        with self.lock(key):
+            session = self._sessions.get(key)
+            if session is None or self._expired(session[1]):
+                start_time = time.monotonic()
+                account = self._login(user_name, broker_name)
+                self._sessions[key] = (account, time.monotonic())
+                logger.info(f"已登入 {user_name}/{broker_name} (耗時 {time.monotonic() - start_time:.1f} 秒)")
+            return self._sessions[key][0]
+
+    def invalidate(self, user_name, broker_name):
+        key = (user_name, broker_name)
+        with self.lock(key):
+            self._sessions.pop(key, None)
+        logger.info(f"已捨棄 {user_name}/{broker_name} 的登入狀態")
+
+    def warm(self, accounts):
+        """
+        預先登入多個帳戶
+
+        Returns:
+            dict: {(user_name, broker_name): 例外}，全部成功時為空 dict
+        """
+        failed = {}
+        for user_name, broker_name in accounts:
+            try:
+                self.get(user_name, broker_name)
+            except Exception as e:
+                logger.exception(f"預先登入失敗: {user_name}/{broker_name}: {e}")
+                failed[(user_name, broker_name)] = e
+        return failed
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class _ServerUnpickler(pickle.Unpickler):
+    def __init__(self, file, objects):
+        super().__init__(file)
+        self._objects = objects
+
+    def persistent_load(self, pid):
+        kind, ref = pid
+        if kind != "ref" or ref not in self._objects:
+            raise pickle.UnpicklingError(f"未知的代理物件: {pid}")
+        return self._objects[ref].obj
+
+
+class _RemoteEntry:
+    """Gateway 內的代理物件: 物件、所屬帳戶 key、是否為帳戶本身、用戶端持有的代理數、來源屬性"""
+
+    __slots__ = ("obj", "key", "is_session", "count", "source")
+
+    def __init__(self, obj, key, is_session, source):
+        self.obj = obj
+        self.key = key
+        self.is_session = is_session
+        self.count = 1
+        self.source = source
+
+
+def _same_object(a, b):
+    # 每次 getattr 取得的 bound method 都是新物件，以 __self__ / __func__ 判斷是否相同
+    return a is b or (inspect.ismethod(a) and inspect.ismethod(b) and a == b)
+
+
+class _GatewayRequestHandler(socketserver.BaseRequestHandler):
+    """處理單一連線；連線期間產生的代理物件在斷線後釋放"""
+
+    def setup(self):
+        # ref -> _RemoteEntry
+        self._objects = {}
+        # (來源 ref, 屬性名稱) -> ref，重複取得同一個屬性時沿用
+        self._attributes = {}
+        self._ids = itertools.count(1)
+
+    def handle(self):
+        while True:
+            try:
+                data = recv_message(self.request)
+            except (OSError, GatewayError):
+                return
+            if data is None:
+                return
+            try:
+                send_message(self.request, self._dispatch(data))
+            except OSError:
+                return
+
+    def _register(self, obj, key, is_session=False, source=None):
+        ref = self._attributes.get(source) if source is not None else None
+        entry = self._objects.get(ref)
+        if entry is not None and _same_object(entry.obj, obj):
+            entry.count += 1
+        else:
+            ref = next(self._ids)
+            self._objects[ref] = _RemoteEntry(obj, key, is_session, source)
+            if source is not None:
+                self._attributes[source] = ref
+        return pickle.dumps(("ref", ref, type(obj).__name__), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _release(self, refs):
+        for ref in refs:
+            entry = self._objects.get(ref)
+            if entry is None:
+                continue
+            entry.count -= 1
+            if entry.count <= 0:
+                del self._objects[ref]
+                if entry.source is not None and self._attributes.get(entry.source) == ref:
+                    del self._attributes[entry.source]
+
+    def _encode(self, value, key, keep_remote, source=None):
+        if not keep_remote and not callable(value):
+            try:
+                return pickle.dumps(("value", value), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                pass
+        return self._register(value, key, source=source)
+
+    def _dispatch(self, data):
+        try:
+            message = _ServerUnpickler(io.BytesIO(data), self._objects).load()
+            return self._execute(*message)
+        except Exception as e:
+            try:
+                exc_payload = pickle.dumps(e, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                exc_payload = None
+            response = ("error", exc_payload, f"{type(e).__name__}: {e}", traceback.format_exc())
+            return pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _execute(self, op, *args):
+        pool = self.server.pool
+        if op == "ping":
+            return pickle.dumps(("value", "pong"))
+        if op == "session":
+            user_name, broker_name = args
+            account = pool.get(user_name, broker_name)
+            return self._register(account, (user_name, broker_name), is_session=True)
+        if op == "invalidate":
+            pool.invalidate(*args)
+            return pickle.dumps(("value", None))
+        if op == "release":
+            (refs,) = args
+            self._release(refs)
+            return pickle.dumps(("value", None))
+        if op == "stats":
+            return pickle.dumps(("value", len(self._objects)))
+        if op == "getattr":
+            ref, name = args
+            entry = self._objects[ref]
+            with pool.lock(entry.key):
+                value = getattr(entry.obj, name)
+            # 帳戶本身的屬性 (例如 api、sdk) 保留在 gateway，避免把連線物件複製到工作端
+            keep_remote = entry.is_session and not isinstance(value, _PRIMITIVE_TYPES)
+            return self._encode(value, entry.key, keep_remote, source=(ref, name))
+        if op == "call":
+            ref, call_args, call_kwargs = args
+            entry = self._objects[ref]
+            with pool.lock(entry.key):
+                value = entry.obj(*call_args, **call_kwargs)
+            return self._encode(value, entry.key, keep_remote=False)
+        raise GatewayError(f"未知的操作: {op}")
+
+
+class BrokerGatewayServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    以 Unix socket 提供 BrokerSessionPool 中的券商帳戶
+
+    Args:
+        socket_path: Unix socket 路徑
+        pool: BrokerSessionPool
+        allowed_uids: 允許連線的 uid (預設只有 gateway 行程本身的使用者)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, pool, allowed_uids=None):
+        self.pool = pool
+        self.allowed_uids = set(allowed_uids) if allowed_uids is not None else {os.getuid()}
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _GatewayRequestHandler)
+
+    def server_bind(self):
+        # bind 時即以 0600 建立 socket 檔，避免 bind 與 chmod 之間有其他使用者連線
+        old_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.server_address, 0o600)
+
+    def verify_request(self, request, client_address):
+        uid = peer_uid(request)
+        if uid is None:
+            # 不支援 SO_PEERCRED 的平台只靠 socket 檔案權限限制
+            return True
+        if uid not in self.allowed_uids:
+            logger.warning(f"拒絕 uid {uid} 的 gateway 連線")
+            return False
+        return True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+# ---------------------------------------------------------------------------
+# 假券商 (測試與本機開發用)
+# ---------------------------------------------------------------------------
+
+class FakeBrokerAccount:
+    """
+    不連線券商的假帳戶，提供 BalanceFetcherBase 與下單流程會用到的基本方法
+
+    Args:
+        cash: 銀行餘額
+        positions: {股票代號: 股數}
+    """
+
+    def __init__(self, cash=1_000_000, settlement=0, positions=None):
+        self.cash = cash
+        self.settlement = settlement
+        self.positions = dict(positions or {})
+        self.orders = {}
+        self._order_ids = itertools.count(1)
+
+    def get_cash(self):
+        return self.cash
+
+    def get_settlement(self):
+        return self.settlement
+
+    def get_total_balance(self):
+        return self.cash + self.settlement
+
+    def get_position(self):
+        return dict(self.positions)
+
+    def create_order(self, action, stock_id, quantity, price=None, **kwargs):
+        order_id = str(next(self._order_ids))
+        self.orders[order_id] = {
+            "action": action,
+            "stock_id": stock_id,
+            "quantity": quantity,
+            "price": price,
+            **kwargs,
+        }
+        return order_id
+
+    def get_orders(self):
+        return dict(self.orders)
+
+    def cancel_order(self, order_id):
+        self.orders.pop(order_id, None)
@@ -13,6 +13,8 @@ class ConfigLoader:
         # Resolve ${VAR} placeholders across the entire config tree up front
         self.config = self._resolve_tree(loaded_config)
         self.user_constants = {}
+        self.user_name = None
+        self.broker_name = None
 
     def _resolve_env_vars(self, value):
         """Resolve ${VAR_NAME} references to environment variables."""
@@ -57,6 +59,30 @@ class ConfigLoader:
             os.environ[key] = str(value)
         
         self.user_constants = broker_config.get("constant", {})
+        self.user_name = user
+        self.broker_name = broker
+
+    def get_all_accounts(self):
+        """
+        List every (user, broker) pair under users in config.yaml.
+        A broker block with enabled: false is skipped (default is enabled).
+        """
+        accounts = []
+        for user, user_config in (self.config.get("users") or {}).items():
+            for broker, broker_config in (user_config or {}).items():
+                if (broker_config or {}).get("enabled", True):
+                    accounts.append((user, broker))
+        return accounts
+
+    def get_user_constants(self, user: str, broker: str):
+        """
+        Return the constant block of a (user, broker) pair without touching os.environ
+        (safe to call while other accounts are logging in).
+        """
+        broker_config = ((self.config.get("users") or {}).get(user) or {}).get(broker)
+        if broker_config is None:
+            raise ValueError(f"Broker '{broker}' configuration for user '{user}' not found.")
+        return broker_config.get("constant", {})
 
     def get_user_constant(self, key):
         return self.user_constants.get(key)
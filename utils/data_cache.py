@@ -0,0 +1,560 @@
+"""
+FinLab 資料本地快取
+在 finlab.data.get 前面加一層本地欄式快取，避免每個排程重複下載與解析同一份寬表
+
+運作原理:
+1. 第一次讀取某個 dataset 時，呼叫原本的 data.get 取得完整資料 (不套用 universe)
+2. 將 DataFrame 存成 Arrow IPC (Feather v2, 不壓縮) 檔案，並寫入一份 meta.json 記錄新鮮度
+3. 之後的讀取直接以 memory map 開檔，不再經過網路與反序列化
+4. 若呼叫時處於 data.universe(...) 之中，讀出後再依 universe 過濾欄位，行為與 data.get 一致
+
+新鮮度 (is_fresh) 同時檢查:
+- 快取寫入時間未超過 max_age_hours
+- 最後一個交易日不落後於「目前應有的最新交易日」(expected_trading_date):
+  平日 data_ready_time (FinLab 收盤資料更新時間) 之後為當日，之前為前一個平日。
+  落後時只有在該交易日資料更新時間之後下載過 (例如國定假日、月營收等非每日資料) 才視為最新，
+  避免 21:45 data_refresher 之前執行的工作讀到缺少最新交易日的資料
+
+更新 (refresh):
+- finlab 的 data.get 沒有依日期區間下載的 API，refresh 一律下載完整 dataset；
+  省下的是寫檔與之後各排程的讀取，不是 refresh 本身的網路與解析時間
+- 日期索引的資料只比對快取最後 verify_rows 列與新資料的同一段日期 (只讀取最後的檔案並切片):
+  - 相同且沒有新資料時只更新 meta.json
+  - 相同時新的交易日寫成新的 segment 檔案，既有檔案不會重寫；新上市的欄位 (float64，
+    舊日期沒有值) 接在最後，讀取時舊檔缺少的欄位補 NaN，既有欄位的順序與 dtype 維持不變
+  - 有差異 (例如還原股價因除權息改變)、列數不符、欄位消失或 dtype 改變時，以新資料整份重寫
+- segment 超過 max_segments 個時，下一次更新整份重寫為單一 data.arrow (compact)
+- 讀取時各檔案以 memory map 開啟，在 Arrow 層合併後一次轉成 DataFrame
+
+行程內記憶體快取 (keep_in_memory，需 data_cache.enabled):
+- 批次回測在同一個行程執行多個策略時，已讀過的 dataset 保留在記憶體中，
+  之後的策略取得深層複本 (deep copy)，策略就地修改 DataFrame 不會影響下一個策略
+- clear_memory() 會同時關閉記憶體快取
+
+平行回測共用資料 (attach_shared):
+- 子行程使用父行程放進 shared memory 的 dataset (見 utils/shared_frames.py)，優先於本地檔案，
+  回傳淺層複本 (Copy-on-Write)，不複製資料
+
+快取目錄結構:
+    <cache_directory>/<dataset 安全名稱>/data.arrow            (最近一次整份寫入)
+    <cache_directory>/<dataset 安全名稱>/segment_00001.arrow   (之後附加的交易日)
+    <cache_directory>/<dataset 安全名稱>/meta.json             (segments 記錄檔案順序)
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 3
+DATA_FILENAME = "data.arrow"
+META_FILENAME = "meta.json"
+
+
+def expected_trading_date(now: datetime, data_ready_time: str = "17:00") -> datetime:
+    """
+    回傳 now 時應該已有資料的最新交易日 (當日 00:00，Asia/Taipei)
+
+    不考慮國定假日 (假日由 is_fresh 以下載時間判斷)。
+
+    Args:
+        now: 目前時間 (含時區)
+        data_ready_time: FinLab 當日收盤資料的更新時間 (HH:MM)
+    """
+    hour, minute = (int(part) for part in data_ready_time.split(":"))
+    now = now.astimezone(ZoneInfo("Asia/Taipei"))
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if (now.hour, now.minute) < (hour, minute):
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class FinLabDataCache:
+    """以 Arrow 檔案快取 finlab.data.get 的結果"""
+
+    def __init__(self, cache_directory="data_cache", max_age_hours=12, data_ready_time="17:00",
+                 verify_rows=20, max_segments=20):
+        self.cache_directory = cache_directory
+        self.max_age_hours = max_age_hours
+        self.data_ready_time = data_ready_time
+        self.verify_rows = verify_rows
+        self.max_segments = max_segments
+        self.keep_in_memory = False
+        self._memory = {}
+        self._shared = {}
+        self._shared_segments = []
+        self._original_get = None
+
+    # ==================== 路徑與 metadata ====================
+
+    def _dataset_directory(self, dataset: str) -> str:
+        """將 dataset 名稱轉成安全的資料夾名稱 (保留中文，附上短 hash 避免碰撞)"""
+        safe_name = re.sub(r'[^\w\-]', '_', dataset)
+        digest = hashlib.sha1(dataset.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.cache_directory, f"{safe_name}_{digest}")
+
+    def _meta_path(self, dataset: str) -> str:
+        return os.path.join(self._dataset_directory(dataset), META_FILENAME)
+
+    def _data_path(self, dataset: str) -> str:
+        return os.path.join(self._dataset_directory(dataset), DATA_FILENAME)
+
+    def read_meta(self, dataset: str) -> Optional[dict]:
+        """讀取 dataset 的 metadata，不存在或格式不符時回傳 None"""
+        meta_path = self._meta_path(dataset)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"無法讀取快取 metadata {meta_path}: {e}")
+            return None
+        if meta.get("format_version") != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    def _write_meta(self, dataset: str, meta: dict):
+        meta_path = self._meta_path(dataset)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(ZoneInfo("Asia/Taipei"))
+
+    def is_fresh(self, dataset: str) -> bool:
+        """檢查快取是否存在、未超過 max_age_hours，且沒有落後最新交易日"""
+        meta = self.read_meta(dataset)
+        if meta is None or not os.path.exists(self._data_path(dataset)):
+            return False
+        now = self._now()
+        fetched_at = datetime.fromisoformat(meta["fetched_at"])
+        if now - fetched_at >= timedelta(hours=self.max_age_hours):
+            return False
+
+        last_date = meta.get("last_date")
+        if last_date is None:
+            return True
+        expected = expected_trading_date(now, self.data_ready_time)
+        if datetime.fromisoformat(last_date).date() >= expected.date():
+            return True
+        # 在最新交易日的資料更新時間之後下載過，資料來源本身沒有更新的資料 (假日或非每日資料)
+        hour, minute = (int(part) for part in self.data_ready_time.split(":"))
+        if fetched_at >= expected.replace(hour=hour, minute=minute):
+            return True
+        logger.info(f"快取落後最新交易日 {expected:%Y-%m-%d} (快取至 {last_date}): {dataset}")
+        return False
+
+    def last_date(self, dataset: str) -> Optional[str]:
+        """回傳快取中最後一個交易日 (YYYY-MM-DD)，非日期索引的資料回傳 None"""
+        meta = self.read_meta(dataset)
+        return meta.get("last_date") if meta else None
+
+    def list_datasets(self) -> list:
+        """列出快取目錄中所有已儲存的 dataset 名稱"""
+        if not os.path.isdir(self.cache_directory):
+            return []
+        datasets = []
+        for name in sorted(os.listdir(self.cache_directory)):
+            meta_path = os.path.join(self.cache_directory, name, META_FILENAME)
+            if not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    datasets.append(json.load(f)["dataset"])
+            except (OSError, json.JSONDecodeError, KeyError):
+                continue
+        return datasets
+
+    # ==================== 讀寫 ====================
+
+    @staticmethod
+    def _write_arrow(path: str, df: pd.DataFrame):
+        """以 Arrow IPC 格式原子寫入單一檔案 (不壓縮才能直接 memory map，暫存檔名含 pid 避免多行程互相覆寫)"""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        table = pa.Table.from_pandas(pd.DataFrame(df), preserve_index=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _concat_tables(tables):
+        """合併多個 Arrow table (zero-copy)；較新的檔案可能多出新欄位，舊檔缺少的欄位補 null"""
+        import pyarrow as pa
+
+        if len(tables) == 1:
+            return tables[0]
+        table = pa.concat_tables(tables, promote_options="default")
+        # pandas metadata 以最後一個檔案 (包含全部欄位) 為準
+        return table.replace_schema_metadata(tables[-1].schema.metadata)
+
+    def _segment_paths(self, dataset: str, meta: dict) -> list:
+        directory = self._dataset_directory(dataset)
+        return [os.path.join(directory, name) for name in meta["segments"]]
+
+    def _read_table(self, dataset: str, meta: dict, tail_rows: Optional[int] = None):
+        """
+        以 memory map 讀取快取的所有檔案
+
+        Args:
+            tail_rows: 只取最後幾列 (從最後的檔案往前讀，不必讀取整段歷史)
+        """
+        import pyarrow.feather as feather
+
+        tables = []
+        remaining = tail_rows
+        for path in reversed(self._segment_paths(dataset, meta)):
+            table = feather.read_table(path, memory_map=True)
+            if remaining is not None:
+                take = min(remaining, table.num_rows)
+                table = table.slice(table.num_rows - take)
+                remaining -= take
+            tables.append(table)
+            if remaining == 0:
+                break
+        return self._concat_tables(tables[::-1])
+
+    @staticmethod
+    def _last_date_of(df: pd.DataFrame) -> Optional[str]:
+        if isinstance(df.index, pd.DatetimeIndex) and len(df.index) > 0:
+            return df.index.max().strftime("%Y-%m-%d")
+        return None
+
+    def _build_meta(self, dataset: str, df: pd.DataFrame, refresh_mode: str) -> dict:
+        return {
+            "format_version": CACHE_FORMAT_VERSION,
+            "dataset": dataset,
+            "fetched_at": self._now().isoformat(),
+            "last_date": self._last_date_of(df),
+            "rows": int(df.shape[0]),
+            "columns": int(df.shape[1]),
+            "refresh_mode": refresh_mode,
+            "finlab_frame": type(df).__name__ == "FinlabDataFrame",
+            "segments": [DATA_FILENAME],
+            "next_segment": 1,
+        }
+
+    def _write(self, dataset: str, df: pd.DataFrame, refresh_mode: str = "rewrite"):
+        """整份寫入 data.arrow 並移除其他檔案 (舊的 segment)"""
+        directory = self._dataset_directory(dataset)
+        os.makedirs(directory, exist_ok=True)
+
+        self._write_arrow(self._data_path(dataset), df)
+        self._write_meta(dataset, self._build_meta(dataset, df, refresh_mode))
+
+        for name in os.listdir(directory):
+            if name.endswith(".arrow") and name != DATA_FILENAME:
+                os.remove(os.path.join(directory, name))
+
+    def _append_segment(self, dataset: str, meta: dict, new_rows: pd.DataFrame):
+        """將新的交易日寫成新的 segment 檔案 (既有檔案不變)，寫完檔案後才更新 meta.json"""
+        name = f"segment_{meta['next_segment']:05d}.arrow"
+        self._write_arrow(os.path.join(self._dataset_directory(dataset), name), new_rows)
+        meta.update({
+            "fetched_at": self._now().isoformat(),
+            "last_date": self._last_date_of(new_rows),
+            "rows": meta["rows"] + int(new_rows.shape[0]),
+            "columns": int(new_rows.shape[1]),
+            "refresh_mode": "append",
+            "segments": meta["segments"] + [name],
+            "next_segment": meta["next_segment"] + 1,
+        })
+        self._write_meta(dataset, meta)
+
+    def _read(self, dataset: str) -> pd.DataFrame:
+        """以 memory map 讀取 data.arrow 與所有 segment，並還原成 FinlabDataFrame (若原本就是)"""
+        meta = self.read_meta(dataset)
+        df = self._read_table(dataset, meta).to_pandas()
+
+        if meta.get("finlab_frame"):
+            from finlab.dataframe import FinlabDataFrame
+            df = FinlabDataFrame(df)
+        return df
+
+    def _fetch(self, dataset: str, *args, **kwargs) -> pd.DataFrame:
+        """呼叫原本的 data.get 取得完整資料 (暫時關閉 universe 過濾)"""
+        from finlab import data
+
+        previous_stocks = data.universe_stocks
+        data.universe_stocks = set()
+        try:
+            return self._original_get(dataset, *args, **kwargs)
+        finally:
+            data.universe_stocks = previous_stocks
+
+    @staticmethod
+    def _new_rows(tail: pd.DataFrame, stored_rows: int, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        比對快取最後幾列與新資料的同一段日期；相同時回傳需要附加的新資料
+        (依既有欄位順序，新欄位接在最後)，有差異時回傳 None (需整份重寫)
+
+        Args:
+            tail: 快取最後 verify_rows 列
+            stored_rows: 快取的總列數
+            df: 新下載的完整資料
+        """
+        if not isinstance(tail.index, pd.DatetimeIndex) or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+        if len(tail) == 0 or not df.index.is_monotonic_increasing:
+            return None
+
+        # 新資料在快取最後一天 (含) 之前的列數需與快取相同
+        history_rows = int(df.index.searchsorted(tail.index[-1], side="right"))
+        if history_rows != stored_rows:
+            return None
+        window = df.iloc[history_rows - len(tail):history_rows]
+        if not window.index.equals(tail.index):
+            return None
+
+        # 欄位消失或 dtype 改變時無法維持既有 schema
+        if len(tail.columns.difference(df.columns)):
+            return None
+        current = window[tail.columns]
+        if not current.dtypes.reset_index(drop=True).equals(tail.dtypes.reset_index(drop=True)):
+            return None
+
+        # 新上市的欄位: 舊檔讀取時補 NaN，因此只接受 float64 且舊日期沒有值的欄位
+        new_columns = df.columns.difference(tail.columns, sort=False)
+        if len(new_columns):
+            added = df[new_columns]
+            if history_rows == len(df) or not (added.dtypes == "float64").all():
+                return None
+            if added.iloc[:history_rows].notna().any().any():
+                return None
+
+        # 重疊區間逐格比對 (NaN 視為相同)
+        stored_values = tail.set_axis(current.index, axis=0).set_axis(current.columns, axis=1)
+        if not stored_values.equals(current):
+            return None
+
+        return df.iloc[history_rows:][tail.columns.append(new_columns)]
+
+    def refresh(self, dataset: str, *args, **kwargs) -> pd.DataFrame:
+        """
+        重新下載 dataset 並更新快取
+
+        Returns:
+            pd.DataFrame: 最新的完整資料 (未套用 universe，欄位順序與讀取快取時相同)
+        """
+        df = self._fetch(dataset, *args, **kwargs)
+        meta = self.read_meta(dataset)
+
+        try:
+            new_rows = None
+            if meta is not None and meta.get("last_date") is not None and os.path.exists(self._data_path(dataset)):
+                tail = self._read_table(dataset, meta, tail_rows=self.verify_rows).to_pandas()
+                new_rows = self._new_rows(tail, meta["rows"], df)
+                if new_rows is None:
+                    logger.info(f"快取最後 {len(tail)} 列與新資料不同，整份重寫: {dataset}")
+
+            if new_rows is None:
+                self._write(dataset, df)
+                logger.info(f"已重寫本地快取: {dataset} ({df.shape[0]} x {df.shape[1]})")
+                return df
+
+            if not df.columns.equals(new_rows.columns):
+                df = df[new_rows.columns]
+            if new_rows.empty:
+                meta["fetched_at"] = self._now().isoformat()
+                meta["refresh_mode"] = "unchanged"
+                self._write_meta(dataset, meta)
+                logger.info(f"快取已是最新: {dataset}")
+            elif len(meta["segments"]) > self.max_segments:
+                self._write(dataset, df, refresh_mode="compact")
+                logger.info(f"合併 {len(meta['segments'])} 個快取檔案: {dataset}")
+            else:
+                self._append_segment(dataset, meta, new_rows)
+                logger.info(
+                    f"更新快取: {dataset} (+{new_rows.shape[0]} 列, "
+                    f"+{new_rows.shape[1] - tail.shape[1]} 欄)"
+                )
+        except Exception as e:
+            logger.warning(f"無法寫入快取 {dataset}: {e}")
+
+        return df
+
+    def warm(self, prefixes=()) -> list:
+        """
+        預先更新快取中已過期的 dataset (平行回測前由父行程執行，避免子行程同時重複下載)
+
+        Returns:
+            list: 本次更新的 dataset 名稱
+        """
+        refreshed = []
+        for dataset in self.list_datasets():
+            if prefixes and not dataset.startswith(tuple(prefixes)):
+                continue
+            if self.is_fresh(dataset):
+                continue
+            try:
+                self.refresh(dataset)
+                refreshed.append(dataset)
+            except Exception as e:
+                logger.warning(f"預先更新快取失敗 {dataset}: {e}")
+        return refreshed
+
+    @staticmethod
+    def _universe_stocks():
+        """目前 data.universe(...) 設定的股票 (未設定時為空集合)"""
+        from finlab import data
+        return data.universe_stocks
+
+    @staticmethod
+    def _apply_universe(df: pd.DataFrame, universe_stocks, deep=False) -> pd.DataFrame:
+        """
+        依 universe 過濾寬表欄位 (與 data.get 在 universe 中的行為一致)
+
+        Args:
+            deep: 為 True 時回傳不與 df 共用記憶體的複本 (df 為記憶體快取時使用)
+        """
+        if not universe_stocks:
+            return df.copy(deep=deep)
+        # 以欄位清單選取本身就會產生複本
+        return df[df.columns.intersection(universe_stocks)]
+
+    def _remember(self, dataset: str, df: pd.DataFrame) -> bool:
+        """記憶體快取開啟時保存 df，回傳是否已保存 (呼叫端需改回傳複本)"""
+        if self.keep_in_memory and isinstance(df.index, pd.DatetimeIndex):
+            self._memory[dataset] = df
+            return True
+        return False
+
+    def enable_memory(self):
+        """開啟行程內記憶體快取 (批次回測用)"""
+        self.keep_in_memory = True
+
+    def clear_memory(self):
+        """關閉並釋放行程內記憶體快取"""
+        self.keep_in_memory = False
+        self._memory.clear()
+
+    def attach_shared(self, specs):
+        """子行程: 改用父行程放進 shared memory 的 dataset (SharedFrameSpec 清單)"""
+        from utils.shared_frames import attach_frame
+
+        for spec in specs:
+            df, segment = attach_frame(spec)
+            self._shared[spec.dataset] = df
+            # SharedMemory 需與 DataFrame 同時保留
+            self._shared_segments.append(segment)
+
+    def get(self, dataset: str, *args, force_download=False, **kwargs) -> pd.DataFrame:
+        """
+        取代 data.get 的快取版本
+
+        Args:
+            dataset: FinLab dataset 名稱，例如 'price:收盤價'
+            force_download: 為 True 時略過快取並重新下載
+        """
+        universe_stocks = self._universe_stocks()
+
+        if not force_download and dataset in self._shared:
+            logger.debug(f"讀取共用記憶體: {dataset}")
+            return self._apply_universe(self._shared[dataset], universe_stocks)
+
+        if not force_download and self.keep_in_memory and dataset in self._memory:
+            logger.debug(f"讀取記憶體快取: {dataset}")
+            return self._apply_universe(self._memory[dataset], universe_stocks, deep=True)
+
+        if not force_download and self.is_fresh(dataset):
+            try:
+                df = self._read(dataset)
+                remembered = self._remember(dataset, df)
+                if universe_stocks and not isinstance(df.index, pd.DatetimeIndex):
+                    # 非日期寬表無法確定 universe 過濾方式，交回原本的 data.get
+                    return self._original_get(dataset, *args, **kwargs)
+                logger.debug(f"讀取本地快取: {dataset}")
+                return self._apply_universe(df, universe_stocks, deep=remembered)
+            except Exception as e:
+                logger.warning(f"讀取快取失敗，改為重新下載 {dataset}: {e}")
+
+        df = self.refresh(dataset, *args, force_download=force_download, **kwargs)
+        remembered = self._remember(dataset, df)
+
+        if universe_stocks and not isinstance(df.index, pd.DatetimeIndex):
+            return self._original_get(dataset, *args, **kwargs)
+        return self._apply_universe(df, universe_stocks, deep=remembered)
+
+    # ==================== 安裝 ====================
+
+    def install(self) -> bool:
+        """
+        將 finlab.data.get 替換為快取版本
+
+        Returns:
+            bool: 是否成功安裝
+        """
+        try:
+            from finlab import data
+        except ImportError as e:
+            logger.error(f"[ERROR] 無法導入 finlab.data: {e}")
+            return False
+
+        if not hasattr(data, "universe_stocks"):
+            logger.warning("[WARN] finlab.data 沒有 universe_stocks，無法安全快取，略過資料快取")
+            return False
+
+        if self._original_get is None:
+            self._original_get = data.get
+
+        def cached_get(dataset, *args, **kwargs):
+            return self.get(dataset, *args, **kwargs)
+
+        data.get = cached_get
+        logger.info(f"[OK] FinLab 資料快取已啟用: {os.path.abspath(self.cache_directory)}")
+        return True
+
+
+# ==================== 對外接口 ====================
+
+_cache_instance: Optional[FinLabDataCache] = None
+
+
+def apply_data_cache(cache_config: dict) -> Optional[FinLabDataCache]:
+    """
+    依 config.yaml 的 data_cache 區塊啟用資料快取
+
+    使用方式:
+        from utils.data_cache import apply_data_cache
+        apply_data_cache(config_loader.config.get('data_cache', {}))
+
+    Returns:
+        FinLabDataCache | None: 已啟用的快取實例，未啟用時回傳 None
+    """
+    global _cache_instance
+
+    if not cache_config.get("enabled", False):
+        return None
+
+    if _cache_instance is None:
+        cache = FinLabDataCache(
+            cache_directory=cache_config.get("directory", "data_cache"),
+            max_age_hours=cache_config.get("max_age_hours", 12),
+            data_ready_time=cache_config.get("data_ready_time", "17:00"),
+            verify_rows=cache_config.get("verify_rows", 20),
+            max_segments=cache_config.get("max_segments", 20),
+        )
+        if not cache.install():
+            return None
+        _cache_instance = cache
+
+    return _cache_instance
+
+
+def get_data_cache() -> Optional[FinLabDataCache]:
+    """取得目前啟用中的快取實例"""
+    return _cache_instance
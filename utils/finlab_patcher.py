@@ -7,13 +7,105 @@ FinLab Order Executor Patcher
 1. 在程式啟動時,導入 finlab 模組
 2. 用 Monkey Patch 替換掉 finlab 內部的函數
 3. 把函數內的 print() 輸出改成 logger.info()
+
+print 的導向以 contextvars 記錄在目前的 context (每個 thread 各自獨立):
+builtins.print 只在打補丁時換成一次 dispatcher，沒有導向時呼叫原本的 print，
+因此多個 thread 可以同時執行 execute_orders (例如 order_executor --all-accounts)，
+不會互相還原或搶走對方的 print。
+
+限制: 新 thread 預設不會繼承 contextvars。若 finlab 在 execute_orders / sync 內另外啟動
+thread 並在其中 print，該 thread 看不到導向。因此 inherit_context 區塊 (redirect_print 與
+OrderCapture 會自動進入) 內:
+- threading.Thread.start 啟動的 thread 在啟動當下的 context 副本中執行
+- ThreadPoolExecutor.submit 的工作一律在呼叫 submit 時的 context 副本中執行
+  (即使 worker thread 是在區塊內建立，之後提交的工作也不會沿用過期的導向)
 """
 import logging
 import builtins  # 直接導入 builtins,不用判斷 __builtins__ 的型別!
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# 打補丁前的 print
+_original_print = builtins.print
+# 目前 context 的 print 導向 (None 代表使用原本的 print)
+_print_target = contextvars.ContextVar('finlab_print_target', default=None)
+# 目前 context 啟動的 thread 是否沿用 context (見 inherit_context)
+_inherit_context = contextvars.ContextVar('finlab_inherit_context', default=False)
+
+_original_thread_start = threading.Thread.start
+_original_submit = ThreadPoolExecutor.submit
+_propagation_lock = threading.Lock()
+
+
+def _dispatching_print(*args, **kwargs):
+    """取代 builtins.print: 依目前 context 的導向輸出"""
+    target = _print_target.get()
+    if target is None:
+        return _original_print(*args, **kwargs)
+    return target(*args, **kwargs)
+
+
+def install_print_dispatcher():
+    """將 builtins.print 換成 dispatcher (只需執行一次，重複呼叫不影響)"""
+    if builtins.print is not _dispatching_print:
+        builtins.print = _dispatching_print
+
+
+def _context_thread_start(self):
+    """取代 threading.Thread.start: inherit_context 區塊內啟動的 thread 沿用目前的 context"""
+    if _inherit_context.get():
+        context = contextvars.copy_context()
+        run = self.run
+        self.run = lambda: context.run(run)
+    return _original_thread_start(self)
+
+
+def _context_submit(self, fn, /, *args, **kwargs):
+    """取代 ThreadPoolExecutor.submit: 工作在呼叫 submit 時的 context 副本中執行"""
+    return _original_submit(self, contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def install_context_propagation():
+    """替換 Thread.start 與 ThreadPoolExecutor.submit (只需執行一次，重複呼叫不影響)"""
+    with _propagation_lock:
+        if threading.Thread.start is not _context_thread_start:
+            threading.Thread.start = _context_thread_start
+        if ThreadPoolExecutor.submit is not _context_submit:
+            ThreadPoolExecutor.submit = _context_submit
+
+
+@contextmanager
+def inherit_context():
+    """with 區塊內啟動的 thread / 提交的工作沿用目前的 context (print 導向、下單擷取)"""
+    install_context_propagation()
+    token = _inherit_context.set(True)
+    try:
+        yield
+    finally:
+        _inherit_context.reset(token)
+
+
+@contextmanager
+def redirect_print(target):
+    """
+    在 with 區塊內 (目前的 context 與區塊內啟動的 thread) 將 print 導向 target
+
+    Args:
+        target: 與 print 相同簽名的函數
+    """
+    install_print_dispatcher()
+    token = _print_target.set(target)
+    try:
+        with inherit_context():
+            yield
+    finally:
+        _print_target.reset(token)
+
 
 class FinLabPatcher:
     """動態修改 finlab 套件行為"""
@@ -36,6 +128,8 @@ class FinLabPatcher:
                 # 為 order_executor 模組添加 logger
                 order_executor.logger = logging.getLogger('finlab.online.order_executor')
 
+            install_print_dispatcher()
+
             # Patch 1: 修改 execute_orders 函數
             self._patch_execute_orders(order_executor)
 
@@ -65,9 +159,6 @@ class FinLabPatcher:
 
         def patched_execute_orders(self, *args, **kwargs):
             """包裝後的 execute_orders"""
-            # 保存原始的 print 函數
-            original_print = builtins.print
-
             def logging_print(*print_args, **print_kwargs):
                 """替換後的 print 函數"""
                 message = ' '.join(str(arg) for arg in print_args)
@@ -77,19 +168,12 @@ class FinLabPatcher:
                     order_executor.logger.info(message)
                 else:
                     # 其他訊息還是用原本的 print
-                    original_print(*print_args, **print_kwargs)
-
-            # 暫時替換 print
-            builtins.print = logging_print
+                    _original_print(*print_args, **print_kwargs)
 
-            try:
+            # 只替換目前 context 的 print (其他 thread 不受影響)
+            with redirect_print(logging_print):
                 # 執行原始的 execute_orders (它內部的 print 會被我們的版本取代)
-                result = original_execute_orders(self, *args, **kwargs)
-            finally:
-                # 恢復 print (很重要!不然其他程式的 print 也會被影響)
-                builtins.print = original_print
-
-            return result
+                return original_execute_orders(self, *args, **kwargs)
 
         # 替換掉原始函數
         order_executor.OrderExecutor.execute_orders = patched_execute_orders
@@ -104,8 +188,6 @@ class FinLabPatcher:
 
         def patched_show_alerting_stocks(self, *args, **kwargs):
             """包裝後的 show_alerting_stocks"""
-            original_print = builtins.print
-
             def logging_print(*print_args, **print_kwargs):
                 message = ' '.join(str(arg) for arg in print_args)
 
@@ -113,16 +195,10 @@ class FinLabPatcher:
                 if any(keyword in message for keyword in ['買入', '賣出', '張', '總價約']):
                     order_executor.logger.info(message)
                 else:
-                    original_print(*print_args, **print_kwargs)
-
-            builtins.print = logging_print
-
-            try:
-                result = original_show_alerting_stocks(self, *args, **kwargs)
-            finally:
-                builtins.print = original_print
+                    _original_print(*print_args, **print_kwargs)
 
-            return result
+            with redirect_print(logging_print):
+                return original_show_alerting_stocks(self, *args, **kwargs)
 
         order_executor.OrderExecutor.show_alerting_stocks = patched_show_alerting_stocks
 
@@ -1,13 +1,17 @@
 import os
 import logging
-import re
+from utils.order_capture import parse_order_message, parse_alerting_stock_message
 
 class LoggerManager:
     def __init__(self, base_log_directory, current_datetime):
         self.base_log_directory = base_log_directory
         self.current_datetime = current_datetime
 
-    def setup_logging(self):
+    def setup_logging(self, mode='w'):
+        """
+        Args:
+            mode: 'w' 覆寫日誌檔；'a' 附加 (平行回測的子行程寫入同一個日誌檔)
+        """
         log_directory = self.base_log_directory
         if not os.path.exists(log_directory):
             os.makedirs(log_directory)
@@ -23,7 +27,7 @@ class LoggerManager:
 
         logger.setLevel(logging.INFO)
 
-        file_handler = logging.FileHandler(log_filepath, mode='w', encoding='utf-8')
+        file_handler = logging.FileHandler(log_filepath, mode=mode, encoding='utf-8')
         file_handler.setLevel(logging.INFO)
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
@@ -38,21 +42,13 @@ class LoggerManager:
         return log_filepath
     
     def extract_order_logs(self, log_filepath):
-        order_logs = []
-        pattern = re.compile(
-            r"(?P<action>BUY|SELL)\s+(?P<stock_id>\S+)\s+X\s+(?P<quantity>[\d\.]+)\s+@\s+(?P<limit_price>[\d\.]+)"
-            r"(?:\s+with extra bid\s+(?P<extra_bid_pct>[\d\.]+)%){0,1}\s+(?P<order_condition>\S+)"
-        )
+        """
+        從 log 檔案中提取下單資訊 (OrderExecutor 執行時改用 OrderCapture 即時擷取，
+        此方法供事後分析舊日誌檔使用)
+        """
         with open(log_filepath, "r", encoding="utf-8") as f:
-            for line in f:
-                match = pattern.search(line)
-                if match:
-                    d = match.groupdict()
-                    d["quantity"] = float(d["quantity"])
-                    d["limit_price"] = float(d["limit_price"])
-                    d["extra_bid_pct"] = float(d["extra_bid_pct"]) / 100 if d["extra_bid_pct"] is not None else 0.0
-                    order_logs.append(d)
-        return order_logs
+            records = (parse_order_message(line) for line in f)
+            return [record.to_dict() for record in records if record is not None]
 
     def extract_alerting_stocks(self, log_filepath):
         """
@@ -65,19 +61,9 @@ class LoggerManager:
         Returns:
             list: 警示股資訊列表，每個元素包含 action, stock_id, quantity, total_amount
         """
-        alerting_stocks = []
-        pattern = re.compile(
-            r"(?P<action>買入|賣出)\s+(?P<stock_id>\d{4,6})\s+(?P<quantity>[\d\.]+)\s+張\s+-\s+總價約\s+(?P<total_amount>[\d\.]+)"
-        )
         with open(log_filepath, "r", encoding="utf-8") as f:
-            for line in f:
-                match = pattern.search(line)
-                if match:
-                    d = match.groupdict()
-                    d["quantity"] = float(d["quantity"])
-                    d["total_amount"] = float(d["total_amount"])
-                    alerting_stocks.append(d)
-        return alerting_stocks
+            records = (parse_alerting_stock_message(line) for line in f)
+            return [record.to_dict() for record in records if record is not None]
 
 if __name__ == "__main__":
     from datetime import datetime
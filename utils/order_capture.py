@@ -0,0 +1,178 @@
+"""
+下單 / 警示股紀錄擷取
+finlab_patcher 把 finlab.online.order_executor 內的 print 轉為 'finlab.online.order_executor' logger，
+此模組在該 logger 上掛一個 logging.Handler，於 pm.sync / show_alerting_stocks 執行當下把訊息
+轉為 OrderRecord / AlertingStockRecord 保存在記憶體，OrderExecutor 直接寫入資料庫，
+不必在下單後重新開啟日誌檔逐行比對。
+
+使用方式:
+    with OrderCapture() as capture:
+        order_executor.show_alerting_stocks()
+        pm.sync(account, ...)
+    capture.orders            # list[OrderRecord]
+    capture.alerting_stocks   # list[AlertingStockRecord]
+
+logger 上只掛一個共用的 handler，依 contextvars 記錄的目前擷取分派紀錄，
+多個 thread 各自擷取 (例如 order_executor --all-accounts 同時同步多個帳戶) 時互不混入。
+with 區塊內 finlab 另外啟動的 thread 透過 finlab_patcher.inherit_context 沿用同一個擷取。
+"""
+import contextvars
+import logging
+import re
+import threading
+from contextlib import ExitStack
+from dataclasses import dataclass, asdict
+
+from utils.finlab_patcher import inherit_context
+
+FINLAB_ORDER_LOGGER = 'finlab.online.order_executor'
+
+# 目前 context 的 OrderCaptureHandler
+_active_capture = contextvars.ContextVar('order_capture', default=None)
+_install_lock = threading.Lock()
+
+# 下單訊息，例如: BUY 2330 X 1.0 @ 500.0 with extra bid 1.0% ROD
+ORDER_PATTERN = re.compile(
+    r"(?P<action>BUY|SELL)\s+(?P<stock_id>\S+)\s+X\s+(?P<quantity>[\d\.]+)\s+@\s+(?P<limit_price>[\d\.]+)"
+    r"(?:\s+with extra bid\s+(?P<extra_bid_pct>[\d\.]+)%){0,1}\s+(?P<order_condition>\S+)"
+)
+
+# 警示股訊息，例如: 買入 8101 0.429 張 - 總價約         2672.67
+ALERTING_STOCK_PATTERN = re.compile(
+    r"(?P<action>買入|賣出)\s+(?P<stock_id>\d{4,6})\s+(?P<quantity>[\d\.]+)\s+張\s+-\s+總價約\s+(?P<total_amount>[\d\.]+)"
+)
+
+
+@dataclass
+class OrderRecord:
+    """一筆下單資訊 (extra_bid_pct 為比例，例如 0.01 代表 1%)"""
+    action: str
+    stock_id: str
+    quantity: float
+    limit_price: float
+    extra_bid_pct: float
+    order_condition: str
+    stock_name: str = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class AlertingStockRecord:
+    """一筆警示股資訊 (quantity 單位為張)"""
+    action: str
+    stock_id: str
+    quantity: float
+    total_amount: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def parse_order_message(message):
+    """解析下單訊息，不是下單訊息時回傳 None"""
+    match = ORDER_PATTERN.search(message)
+    if not match:
+        return None
+    extra_bid_pct = match.group("extra_bid_pct")
+    return OrderRecord(
+        action=match.group("action"),
+        stock_id=match.group("stock_id"),
+        quantity=float(match.group("quantity")),
+        limit_price=float(match.group("limit_price")),
+        extra_bid_pct=float(extra_bid_pct) / 100 if extra_bid_pct is not None else 0.0,
+        order_condition=match.group("order_condition"),
+    )
+
+
+def parse_alerting_stock_message(message):
+    """解析警示股訊息，不是警示股訊息時回傳 None"""
+    match = ALERTING_STOCK_PATTERN.search(message)
+    if not match:
+        return None
+    return AlertingStockRecord(
+        action=match.group("action"),
+        stock_id=match.group("stock_id"),
+        quantity=float(match.group("quantity")),
+        total_amount=float(match.group("total_amount")),
+    )
+
+
+class OrderCaptureHandler(logging.Handler):
+    """掛在 finlab order_executor logger 上，將每則訊息轉為結構化紀錄"""
+
+    def __init__(self, level=logging.INFO):
+        super().__init__(level)
+        self.orders = []
+        self.alerting_stocks = []
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            order = parse_order_message(message)
+            if order is not None:
+                self.orders.append(order)
+                return
+            alerting_stock = parse_alerting_stock_message(message)
+            if alerting_stock is not None:
+                self.alerting_stocks.append(alerting_stock)
+        except Exception:
+            self.handleError(record)
+
+
+class _ContextDispatchHandler(logging.Handler):
+    """共用 handler: 將紀錄交給目前 context 的 OrderCaptureHandler"""
+
+    def emit(self, record):
+        handler = _active_capture.get()
+        if handler is not None:
+            handler.handle(record)
+
+
+def _install_dispatch_handler(logger):
+    """在 logger 上掛載共用 handler (每個 logger 只掛一次)"""
+    with _install_lock:
+        if any(isinstance(handler, _ContextDispatchHandler) for handler in logger.handlers):
+            return
+        # finlab logger 的 level 未設定時沿用 root，確保 INFO 訊息會送到 handler
+        if logger.getEffectiveLevel() > logging.INFO:
+            logger.setLevel(logging.INFO)
+        logger.addHandler(_ContextDispatchHandler(logging.INFO))
+
+
+class OrderCapture:
+    """
+    在 with 區塊內擷取目前 thread / context 的 finlab 下單與警示股紀錄
+
+    Args:
+        logger_name (str): 要掛載的 logger 名稱
+    """
+
+    def __init__(self, logger_name=FINLAB_ORDER_LOGGER):
+        self.logger = logging.getLogger(logger_name)
+        self.handler = OrderCaptureHandler()
+        self._token = None
+        self._stack = None
+
+    @property
+    def orders(self):
+        return self.handler.orders
+
+    @property
+    def alerting_stocks(self):
+        return self.handler.alerting_stocks
+
+    def __enter__(self):
+        _install_dispatch_handler(self.logger)
+        self._token = _active_capture.set(self.handler)
+        self._stack = ExitStack()
+        self._stack.enter_context(inherit_context())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        self._stack = None
+        _active_capture.reset(self._token)
+        self._token = None
+        return False
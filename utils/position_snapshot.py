@@ -0,0 +1,180 @@
+"""
+策略持倉快照
+22:00 回測完成後把策略的 report 序列化保存，08:00 / 13:00 下單時若 FinLab 收盤資料
+的最後交易日與快照相同，直接載入快照即可，不必重新從 2017 年跑一次完整回測。
+
+快照以 (策略名稱, 資料日期) 為 key，並記錄:
+- format_version: 快照格式版本，格式變更時舊快照自動失效
+- strategy_fingerprint: 策略所在 package (strategy_class/) 全部原始碼與建構參數的 hash，
+  策略或其共用模組 (chip_flow、ranking、taiwan_kd、indicator_cache、prescreen、live_window、
+  compact ...) 修改後，或以不同參數 (例如 compact=True) 建立時，舊快照自動失效
+
+目錄結構:
+    <directory>/<策略名稱>/<資料日期>.pkl
+    <directory>/<策略名稱>/<資料日期>.json
+"""
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def current_data_date() -> str:
+    """以 FinLab 收盤價的最後一個交易日作為資料日期 (YYYY-MM-DD)"""
+    from finlab import data
+    return data.get('price:收盤價').index.max().strftime("%Y-%m-%d")
+
+
+def _package_source_files(module) -> list:
+    """模組所在 package 的所有 .py 檔 (依檔名排序)；不在 package 內時只有模組本身"""
+    module_file = getattr(module, "__file__", None)
+    if not module_file:
+        return []
+    if not module.__package__:
+        return [module_file]
+    package_directory = os.path.dirname(module_file)
+    return sorted(
+        os.path.join(package_directory, name)
+        for name in os.listdir(package_directory)
+        if name.endswith(".py")
+    )
+
+
+def strategy_fingerprint(strategy_class, **constructor_kwargs) -> str:
+    """
+    策略程式與建構參數的 hash
+
+    Args:
+        strategy_class: 策略類別
+        constructor_kwargs: 建立策略時的參數 (例如 compact=True)；下單使用的快照必須來自
+            不帶參數 (完整精度、完整歷史) 的回測
+    """
+    digest = hashlib.sha1()
+    source_files = _package_source_files(inspect.getmodule(strategy_class))
+    if source_files:
+        for path in source_files:
+            digest.update(os.path.basename(path).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    else:
+        # 取不到原始碼時使用類別名稱
+        digest.update(f"{strategy_class.__module__}.{strategy_class.__qualname__}".encode("utf-8"))
+    digest.update(repr(sorted(constructor_kwargs.items())).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+class PositionSnapshotStore:
+    """保存與載入策略 report 快照"""
+
+    def __init__(self, directory="position_snapshots", keep=5):
+        self.directory = directory
+        self.keep = keep
+
+    def _strategy_directory(self, strategy_name: str) -> str:
+        return os.path.join(self.directory, strategy_name)
+
+    def _paths(self, strategy_name: str, data_date: str):
+        base = os.path.join(self._strategy_directory(strategy_name), data_date)
+        return f"{base}.pkl", f"{base}.json"
+
+    def save(self, strategy_name: str, data_date: str, report, fingerprint: str) -> Optional[str]:
+        """
+        保存 report 快照
+
+        Returns:
+            str | None: 快照檔案路徑，序列化失敗時回傳 None
+        """
+        os.makedirs(self._strategy_directory(strategy_name), exist_ok=True)
+        pickle_path, meta_path = self._paths(strategy_name, data_date)
+
+        try:
+            payload = pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"無法序列化 {strategy_name} 的 report，略過快照: {e}")
+            return None
+
+        tmp_path = f"{pickle_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, pickle_path)
+
+        meta = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "strategy": strategy_name,
+            "data_date": data_date,
+            "strategy_fingerprint": fingerprint,
+            "created_at": datetime.now(ZoneInfo("Asia/Taipei")).isoformat(),
+            "size_bytes": len(payload),
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"已保存持倉快照: {strategy_name} @ {data_date} ({len(payload) / 1024 / 1024:.1f} MB)")
+        self._prune(strategy_name)
+        return pickle_path
+
+    def load(self, strategy_name: str, data_date: str, fingerprint: str):
+        """
+        載入與資料日期、策略版本都相符的快照
+
+        Returns:
+            report | None: 快照不存在或已過期時回傳 None
+        """
+        pickle_path, meta_path = self._paths(strategy_name, data_date)
+        if not (os.path.exists(pickle_path) and os.path.exists(meta_path)):
+            logger.info(f"沒有 {strategy_name} @ {data_date} 的持倉快照")
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"無法讀取快照 metadata {meta_path}: {e}")
+            return None
+
+        if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            logger.info(f"快照格式版本不符，忽略: {meta_path}")
+            return None
+        if meta.get("strategy_fingerprint") != fingerprint:
+            logger.info(f"{strategy_name} 策略程式已變更，忽略舊快照")
+            return None
+
+        try:
+            with open(pickle_path, "rb") as f:
+                report = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"無法載入快照 {pickle_path}: {e}")
+            return None
+
+        logger.info(f"已載入持倉快照: {strategy_name} @ {data_date} (建立於 {meta.get('created_at')})")
+        return report
+
+    def _prune(self, strategy_name: str):
+        """只保留最近 keep 個資料日期的快照"""
+        directory = self._strategy_directory(strategy_name)
+        dates = sorted(
+            name[:-len(".pkl")] for name in os.listdir(directory) if name.endswith(".pkl")
+        )
+        for data_date in dates[:-self.keep] if self.keep else []:
+            for path in self._paths(strategy_name, data_date):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def create_position_snapshot_store(snapshot_config: dict) -> Optional[PositionSnapshotStore]:
+    """依 config.yaml 的 position_snapshot 區塊建立快照存放區，未啟用時回傳 None"""
+    if not snapshot_config.get("enabled", False):
+        return None
+    return PositionSnapshotStore(
+        directory=snapshot_config.get("directory", "position_snapshots"),
+        keep=snapshot_config.get("keep", 5),
+    )
@@ -0,0 +1,176 @@
+"""
+回測報告儲存
+report.display(save_report_path=...) 產生的 HTML 內含完整的 JS / CSS，每個策略每晚一份，
+大部分內容都相同。此模組:
+
+- 以 gzip 壓縮儲存報告 (<策略>/<時間>.html.gz)，dashboard 的 /reports/ 直接以
+  Content-Encoding: gzip 傳送壓縮檔，瀏覽器自行解壓 (不支援 gzip 的用戶端由伺服器解壓)
+- dedupe_scripts 開啟時，把大型 inline <script> 抽出為以內容 hash 命名的共用檔案
+  (_blobs/<sha256>.js.gz)，相同內容只存一份，瀏覽器也可長期快取
+
+目錄結構:
+    <base_directory>/<策略名稱>/<時間>.html.gz
+    <base_directory>/_blobs/<sha256>.js.gz
+
+未壓縮的舊報告 (<策略>/<時間>.html) 仍可透過 /reports/ 讀取。
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIRECTORY = "_blobs"
+URL_PREFIX = "/reports"
+# 小於此大小的 inline script 不抽出 (抽出後多一次請求反而較慢)
+MIN_BLOB_BYTES = 4096
+
+_INLINE_SCRIPT = re.compile(rb"<script(?P<attrs>[^>]*)>(?P<body>.*?)</script>", re.DOTALL | re.IGNORECASE)
+_SCRIPT_TYPE = re.compile(rb"""\btype\s*=\s*["']?(?P<type>[^"'\s>]+)""", re.IGNORECASE)
+_JAVASCRIPT_TYPES = {b"text/javascript", b"application/javascript", b"module"}
+
+
+def _write_atomic(path, data):
+    """先寫入暫存檔再 rename，避免 dashboard 讀到寫一半的檔案"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ReportStore:
+    def __init__(self, base_directory="assets", compress=True, dedupe_scripts=False, compresslevel=6):
+        self.base_directory = base_directory
+        self.compress = compress
+        self.dedupe_scripts = dedupe_scripts
+        self.compresslevel = compresslevel
+
+    def save(self, report, relative_path):
+        """
+        儲存 finlab report
+
+        Args:
+            report: finlab report 物件
+            relative_path (str): 相對於 base_directory 的報告路徑，例如 "AlanTWStrategyACE/2025-03-05_20-00-00.html"
+
+        Returns:
+            tuple: (實際儲存的檔案路徑, 檔案大小)
+        """
+        html_path = os.path.join(self.base_directory, relative_path)
+        os.makedirs(os.path.dirname(html_path), exist_ok=True)
+        if not self.compress:
+            report.display(save_report_path=html_path)
+            return html_path, os.path.getsize(html_path)
+
+        # 先讓 finlab 寫出 HTML 暫存檔再壓縮
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(html_path), prefix=".tmp-", suffix=".html")
+        os.close(fd)
+        try:
+            report.display(save_report_path=tmp_path)
+            with open(tmp_path, "rb") as f:
+                html = f.read()
+        finally:
+            os.remove(tmp_path)
+
+        return self.save_html(html, relative_path)
+
+    def save_html(self, html, relative_path):
+        """壓縮並儲存 HTML 內容 (bytes)，回傳 (檔案路徑, 檔案大小)"""
+        original_size = len(html)
+        if self.dedupe_scripts:
+            html = self._extract_scripts(html)
+
+        stored_path = os.path.join(self.base_directory, relative_path) + ".gz"
+        _write_atomic(stored_path, gzip.compress(html, compresslevel=self.compresslevel, mtime=0))
+        stored_size = os.path.getsize(stored_path)
+        logger.info(f"報告已儲存: {stored_path} ({original_size} → {stored_size} bytes)")
+        return stored_path, stored_size
+
+    def _extract_scripts(self, html):
+        """將大型 inline JavaScript 換成指向共用 blob 的 <script src>"""
+        def replace(match):
+            attrs, body = match.group("attrs"), match.group("body")
+            if len(body) < MIN_BLOB_BYTES or re.search(rb"\bsrc\s*=", attrs, re.IGNORECASE):
+                return match.group(0)
+            script_type = _SCRIPT_TYPE.search(attrs)
+            if script_type and script_type.group("type").lower() not in _JAVASCRIPT_TYPES:
+                # application/json 等資料區塊不能改為外部檔案
+                return match.group(0)
+
+            digest = hashlib.sha256(body).hexdigest()
+            blob_path = os.path.join(self.base_directory, BLOB_DIRECTORY, f"{digest}.js.gz")
+            if not os.path.exists(blob_path):
+                _write_atomic(blob_path, gzip.compress(body, compresslevel=self.compresslevel, mtime=0))
+            src = f"{URL_PREFIX}/{BLOB_DIRECTORY}/{digest}.js".encode()
+            return b"<script" + attrs + b' src="' + src + b'"></script>'
+
+        return _INLINE_SCRIPT.sub(replace, html)
+
+
+def create_report_store(storage_config, base_directory="assets"):
+    """依 config.yaml 的 report_storage 區塊建立 ReportStore (未設定時不壓縮，與原本相同)"""
+    storage_config = storage_config or {}
+    return ReportStore(
+        base_directory=base_directory,
+        compress=storage_config.get("compress", False),
+        dedupe_scripts=storage_config.get("dedupe_scripts", False),
+        compresslevel=storage_config.get("compresslevel", 6),
+    )
+
+
+def register_report_route(server, base_directory):
+    """
+    在 Flask server 註冊 /reports/<path>，優先讀取壓縮檔 (.gz) 並直接以 Content-Encoding 傳送
+
+    Args:
+        server: Flask app
+        base_directory (str): 報告根目錄 (assets)
+    """
+    from flask import Response, abort, request
+    from werkzeug.security import safe_join
+
+    mimetypes = {".html": "text/html; charset=utf-8", ".js": "application/javascript; charset=utf-8"}
+
+    @server.route(f"{URL_PREFIX}/<path:path>")
+    def serve_report(path):
+        extension = os.path.splitext(path)[1]
+        if extension not in mimetypes:
+            abort(404)
+        full_path = safe_join(base_directory, path)
+        if full_path is None:
+            abort(404)
+
+        immutable = path.startswith(f"{BLOB_DIRECTORY}/")
+        headers = {
+            "Vary": "Accept-Encoding",
+            # 報告與 blob 寫入後不會再變動 (blob 以內容 hash 命名)
+            "Cache-Control": "public, max-age=31536000, immutable" if immutable else "public, max-age=86400",
+        }
+
+        if os.path.isfile(full_path + ".gz"):
+            with open(full_path + ".gz", "rb") as f:
+                data = f.read()
+            # 以 werkzeug 解析的 Accept-Encoding 判斷 (q=0 表示不接受)
+            if request.accept_encodings["gzip"] > 0:
+                headers["Content-Encoding"] = "gzip"
+            else:
+                data = gzip.decompress(data)
+        elif os.path.isfile(full_path):
+            with open(full_path, "rb") as f:
+                data = f.read()
+        else:
+            abort(404)
+
+        return Response(data, content_type=mimetypes[extension], headers=headers)
+
+    return serve_report
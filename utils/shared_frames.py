@@ -0,0 +1,111 @@
+"""
+平行回測共用資料 (multiprocessing.shared_memory)
+平行回測時父行程先讀取本地快取中的 dataset，把數值寬表的值複製到 shared memory 一次，
+子行程只收到 SharedFrameSpec (shared memory 名稱、shape、dtype、index、columns)，
+以 numpy 陣列直接包裝 shared memory 成 DataFrame，不複製資料；
+資料只佔一份記憶體，不會隨子行程數倍增。
+
+限制:
+- 只共用日期索引、所有欄位為同一種數值 / 布林 dtype 的寬表 (可用單一 2D 陣列表示)；
+  其他 dataset 子行程照常從本地快取讀取
+- 子行程取得的是共用陣列的淺層複本: pandas Copy-on-Write 下策略就地修改會先複製，
+  陣列本身也設為唯讀，不會改到其他子行程看到的資料
+- 父行程在所有子行程結束後 close() 釋放 shared memory
+
+使用方式:
+    store = SharedFrameStore()
+    spec = store.publish('price:收盤價', df)     # 父行程
+    df, handle = attach_frame(spec)              # 子行程 (handle 需與 df 同時保留)
+    store.close()                                # 父行程，子行程全部結束後
+"""
+import logging
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedFrameSpec:
+    """子行程重建 DataFrame 需要的資訊 (不含資料本身)"""
+    dataset: str
+    shm_name: str
+    shape: tuple
+    dtype: str
+    index: pd.Index
+    columns: pd.Index
+    finlab_frame: bool = False
+
+
+def is_shareable(df: pd.DataFrame) -> bool:
+    """是否可以用單一 2D 數值陣列放進 shared memory"""
+    if not isinstance(df.index, pd.DatetimeIndex) or df.shape[0] == 0 or df.shape[1] == 0:
+        return False
+    dtypes = set(df.dtypes)
+    return len(dtypes) == 1 and np.dtype(dtypes.pop()).kind in "fiub"
+
+
+class SharedFrameStore:
+    """父行程: 將 DataFrame 的值放進 shared memory，並在結束時釋放"""
+
+    def __init__(self):
+        self._segments = []
+
+    @property
+    def nbytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    def publish(self, dataset: str, df: pd.DataFrame) -> Optional[SharedFrameSpec]:
+        """
+        複製 df 的值到 shared memory，無法共用時回傳 None
+
+        Args:
+            dataset: FinLab dataset 名稱
+            df: 日期索引、單一數值 dtype 的寬表
+        """
+        if not is_shareable(df):
+            return None
+        values = df.to_numpy()
+        segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self._segments.append(segment)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+        return SharedFrameSpec(
+            dataset=dataset,
+            shm_name=segment.name,
+            shape=values.shape,
+            dtype=values.dtype.str,
+            index=df.index,
+            columns=df.columns,
+            finlab_frame=type(df).__name__ == "FinlabDataFrame",
+        )
+
+    def close(self):
+        """釋放所有 shared memory (子行程全部結束後呼叫)"""
+        for segment in self._segments:
+            try:
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments.clear()
+
+
+def attach_frame(spec: SharedFrameSpec):
+    """
+    子行程: 以 shared memory 重建 DataFrame (不複製資料)
+
+    Returns:
+        tuple: (DataFrame, SharedMemory)；SharedMemory 需與 DataFrame 同時保留，不可提前 close
+    """
+    segment = shared_memory.SharedMemory(name=spec.shm_name)
+    values = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=segment.buf)
+    values.flags.writeable = False
+    df = pd.DataFrame(values, index=spec.index, columns=spec.columns, copy=False)
+    if spec.finlab_frame:
+        from finlab.dataframe import FinlabDataFrame
+        df = FinlabDataFrame(df)
+    return df, segment